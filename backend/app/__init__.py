@@ -3,12 +3,28 @@ from flask_cors import CORS
 from .config import Config
 from .database import init_db
 from .endpoints import register_blueprints
+from .json_provider import FastJSONProvider
+from .compression import init_compression
+from .access_log import init_access_log
+from .metrics import init_metrics
+from .profiling import init_profiling
+from .warmup import init_warmup
+from .quota import init_quota
+from .compaction import init_compaction
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
     CORS(app)
     with app.app_context():
         init_db()
+    init_access_log(app)
+    init_metrics(app)
+    init_profiling(app)
+    init_warmup(app)
+    init_quota(app)
     register_blueprints(app)
+    init_compression(app)
+    init_compaction(app)
     return app
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, request
+
+try:
+    import fcntl
+except ImportError:  # no other process to coordinate with on platforms without fcntl
+    fcntl = None
+
+_STOP = object()
+
+class AccessLogWriter:
+    """
+    Background writer for the access log. Request threads only enqueue a dict;
+    JSON encoding, file writes and size/time based rotation happen on the writer thread.
+    Every worker process appends to the same file: rotation runs under an flock on
+    `<path>.lock`, and a writer whose file was rotated by another worker reopens the path.
+    """
+
+    def __init__(self, path, max_bytes, rotate_seconds, backup_count, flush_seconds, batch_size, queue_size):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._inode = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own writer
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._file = None
+            self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, record):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout=5):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        try:
+            # A full queue must not hang shutdown; what is queued is lost either way
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_seconds)
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                while len(batch) < self.batch_size and not stopping:
+                    item = self.queue.get_nowait()
+                    if item is _STOP:
+                        stopping = True
+                    else:
+                        batch.append(item)
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(batch)
+        if self._file:
+            self._file.close()
+
+    def _write(self, batch):
+        try:
+            if self._file is None or self._moved():
+                self._open()
+            if self._should_rotate():
+                self._rotate()
+            self._file.write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+            self._file.flush()
+        except Exception as e:
+            logging.getLogger("market_research_api").error(f"Access log write failed: {e}")
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The lock file's mtime records the last rotation, for time-based rotation across workers
+        if not os.path.exists(self.lock_path):
+            open(self.lock_path, "a").close()
+        self._file = open(self.path, "a")
+        stat = os.fstat(self._file.fileno())
+        self._inode = (stat.st_dev, stat.st_ino)
+
+    def _moved(self):
+        """True when another worker rotated the log since this process opened it."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_dev, stat.st_ino) != self._inode
+
+    def _should_rotate(self):
+        if self.max_bytes and os.fstat(self._file.fileno()).st_size >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - os.stat(self.lock_path).st_mtime >= self.rotate_seconds
+
+    @contextmanager
+    def _rotation_lock(self):
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _rotate(self):
+        with self._rotation_lock():
+            # Another worker may have rotated while this one waited for the lock
+            if not self._moved() and self._should_rotate():
+                self._file.close()
+                self._file = None
+                for i in range(self.backup_count - 1, 0, -1):
+                    source = f"{self.path}.{i}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{i + 1}")
+                if self.backup_count > 0:
+                    os.replace(self.path, f"{self.path}.1")
+                else:
+                    os.remove(self.path)
+                os.utime(self.lock_path)
+            self._open()
+
+def init_access_log(app):
+    writer = AccessLogWriter(
+        path=app.config["LOG_FILE"],
+        max_bytes=app.config["ACCESS_LOG_MAX_BYTES"],
+        rotate_seconds=app.config["ACCESS_LOG_ROTATE_SECONDS"],
+        backup_count=app.config["ACCESS_LOG_BACKUP_COUNT"],
+        flush_seconds=app.config["ACCESS_LOG_FLUSH_SECONDS"],
+        batch_size=app.config["ACCESS_LOG_BATCH_SIZE"],
+        queue_size=app.config["ACCESS_LOG_QUEUE_SIZE"]
+    )
+    app.extensions["access_log"] = writer
+    atexit.register(writer.stop)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+    @app.after_request
+    def log_access(response):
+        started = getattr(g, "request_started", None)
+        duration_ms = (time.perf_counter() - started) * 1000 if started else None
+        writer.enqueue({
+            "timestamp": datetime.now().isoformat(),
+            "request_id": getattr(g, "request_id", None),
+            "method": request.method,
+            "path": request.path,
+            "params": dict(request.args),
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2) if duration_ms is not None else None,
+            # Measuring a streamed body would buffer all of it
+            "bytes": None if response.is_streamed else response.calculate_content_length(),
+            "user_id": getattr(request, "user_id", None),
+            "client_ip": request.remote_addr or "unknown",
+            "user_agent": request.headers.get("user-agent", "unknown")
+        })
+        if getattr(g, "request_id", None):
+            response.headers["X-Request-ID"] = g.request_id
+        return response
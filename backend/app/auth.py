@@ -1,8 +1,19 @@
 import hashlib
+import time
 import jwt
 from datetime import datetime, timedelta
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g, has_request_context
 from functools import wraps
+from .cache import TTLCache, shared_cache
+from .config import Config
+from .database import get_db
+from .http_cache import invalidate
+from .quota import set_user as set_quota_user
+
+# Verified claims cannot go stale before the token expires, so a per-process cache is safe
+_token_cache = TTLCache("auth_tokens", ttl=Config.TOKEN_CACHE_TTL, maxsize=10000)
+# User rows are shared so invalidate_user in one worker reaches the others
+_user_cache = shared_cache("users", Config.USER_CACHE_TTL, maxsize=10000)
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -15,13 +26,53 @@ def generate_token(user_id):
     return jwt.encode(payload, current_app.config['JWT_SECRET'], algorithm='HS256')
 
 def verify_token(token):
+    """
+    Return the user id for a valid token. Verified claims are cached by token digest
+    until the token expires, so repeat requests skip the signature check.
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    cached = _token_cache.get(digest)
+    now = time.time()
+    if cached and cached[1] > now:
+        return cached[0]
     try:
         payload = jwt.decode(token, current_app.config['JWT_SECRET'], algorithms=['HS256'])
-        return payload.get('user_id')
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    user_id = payload.get('user_id')
+    expires = payload.get('exp')
+    if user_id and expires:
+        _token_cache.set(digest, (user_id, expires), ttl=min(expires - now, current_app.config['TOKEN_CACHE_TTL']))
+    return user_id
+
+def get_user(user_id):
+    """
+    Public user fields (no password hash) for user_id, or None.
+    Looked up once per request and cached (across workers with SHARED_CACHE_PATH) until
+    invalidate_user or USER_CACHE_TTL.
+    """
+    request_users = g.setdefault('users', {}) if has_request_context() else {}
+    if user_id in request_users:
+        return request_users[user_id]
+    user = _user_cache.get(user_id)
+    if user is None:
+        cursor = get_db().cursor()
+        cursor.execute("SELECT id, username, email, business_name, created_at FROM users WHERE id = ?", (user_id,))
+        row = cursor.fetchone()
+        if row:
+            user = dict(row)
+            _user_cache.set(user_id, user)
+    request_users[user_id] = user
+    return user
+
+def invalidate_user(user_id):
+    """Call after any write to the users row so cached copies and profile validators are dropped."""
+    _user_cache.delete(user_id)
+    invalidate("profile", user_id)
+    if has_request_context():
+        g.setdefault('users', {}).pop(user_id, None)
 
 def auth_required(func):
     @wraps(func)
@@ -34,5 +85,6 @@ def auth_required(func):
         if not user_id:
             return jsonify({"error": "Invalid or expired token"}), 401
         request.user_id = user_id
+        set_quota_user(user_id)
         return func(*args, **kwargs)
     return wrapper
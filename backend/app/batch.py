@@ -0,0 +1,172 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .config import Config
+from .rate_limit import TokenBucket
+from .quota import carry_attribution
+from .google_maps import parse_coords, geocode_location, nearby_search, base_place, get_place_reviews
+from .spatial import distance_m
+
+BATCH_ANALYSES = ("competitors", "heatmap")
+
+# One upstream budget for every batch running in this process
+_batch_bucket = TokenBucket(Config.BATCH_RATE_PER_SECOND, Config.BATCH_RATE_BURST)
+
+def parse_batch_request(data):
+    locations = data.get("locations")
+    categories = data.get("categories")
+    analyses = data.get("analyses") or list(BATCH_ANALYSES)
+    if not isinstance(locations, list) or not locations or not all(isinstance(l, str) and l.strip() for l in locations):
+        raise ValueError("locations must be a non-empty list of location strings")
+    if not isinstance(categories, list) or not categories or not all(isinstance(c, str) and c.strip() for c in categories):
+        raise ValueError("categories must be a non-empty list of category strings")
+    unknown = [a for a in analyses if a not in BATCH_ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses: {', '.join(map(str, unknown))}")
+    locations = list(dict.fromkeys(l.strip() for l in locations))
+    categories = list(dict.fromkeys(c.strip() for c in categories))
+    if len(locations) * len(categories) > Config.BATCH_MAX_CELLS:
+        raise ValueError(f"At most {Config.BATCH_MAX_CELLS} location x category cells per batch")
+    radius = data.get("radius")
+    if radius is not None and (isinstance(radius, bool) or not isinstance(radius, int) or radius <= 0):
+        raise ValueError("radius must be a positive integer")
+    return {"locations": locations, "categories": categories, "analyses": analyses, "radius": radius}
+
+class BatchRunner:
+    """
+    Plans a location x category matrix globally: every distinct location is geocoded once,
+    every distinct (coords, category) nearby search runs once and every distinct place_id
+    gets one Details call, all on one thread pool under the shared token bucket.
+    """
+
+    def __init__(self, app, locations, categories, analyses, radius=None):
+        self.app = app
+        self.locations = locations
+        self.categories = categories
+        self.analyses = analyses
+        self.radius = radius
+        self.stats = {"cells": len(locations) * len(categories), "geocodes": 0, "searches": 0, "details": 0}
+
+    def _call(self, fn, *args):
+        _batch_bucket.acquire()
+        with self.app.app_context():
+            return fn(*args)
+
+    def _submit(self, pool, fn, *args):
+        return pool.submit(carry_attribution(self._call), fn, *args)
+
+    def run(self):
+        """Yield one result dict per cell as soon as everything it depends on is fetched."""
+        with ThreadPoolExecutor(max_workers=Config.BATCH_MAX_WORKERS) as pool:
+            coords = self._geocode_all(pool)
+            searches = self._search_all(pool, coords)
+            details = {}
+            waiting = {}
+            ready = []
+            for location in self.locations:
+                for category in self.categories:
+                    cell = (location, category)
+                    search = searches.get((location, category))
+                    needed = set()
+                    if search and "competitors" in self.analyses and not isinstance(search, Exception):
+                        needed = {p["place_id"] for p in search if p.get("place_id")}
+                    for place_id in needed:
+                        if place_id not in details:
+                            details[place_id] = self._submit(pool, get_place_reviews, place_id)
+                            self.stats["details"] += 1
+                    if needed:
+                        waiting[cell] = needed
+                    else:
+                        ready.append(cell)
+            resolved = {}
+            for cell in ready:
+                yield self._build_cell(cell, coords, searches, resolved)
+            pending_by_place = {}
+            for cell, needed in waiting.items():
+                for place_id in needed:
+                    pending_by_place.setdefault(place_id, []).append(cell)
+            futures = {future: place_id for place_id, future in details.items()}
+            for future in as_completed(futures):
+                place_id = futures[future]
+                try:
+                    resolved[place_id] = future.result()
+                except Exception:
+                    resolved[place_id] = ([], [], {})
+                for cell in pending_by_place.get(place_id, []):
+                    waiting[cell].discard(place_id)
+                    if not waiting[cell]:
+                        yield self._build_cell(cell, coords, searches, resolved)
+
+    def _geocode_all(self, pool):
+        coords, futures = {}, {}
+        for location in self.locations:
+            literal = parse_coords(location)
+            if literal:
+                coords[location] = literal
+            else:
+                futures[location] = self._submit(pool, geocode_location, location)
+                self.stats["geocodes"] += 1
+        for location, future in futures.items():
+            try:
+                result, error = future.result()
+            except Exception as e:
+                # Out of quota: the location's cells report the error, as failed searches do
+                coords[location] = e
+                continue
+            coords[location] = result if not error else ValueError(error)
+        return coords
+
+    def _search_all(self, pool, coords):
+        """
+        Nearby searches keyed by (location, category). A location within BATCH_DEDUP_METERS of
+        one already planned for the category shares that call, centred on the earlier location.
+        """
+        by_key, futures, planned = {}, {}, {}
+        for location in self.locations:
+            point = coords[location]
+            for category in self.categories:
+                if isinstance(point, Exception):
+                    by_key[(location, category)] = point
+                    continue
+                centres = planned.setdefault(category, [])
+                key = next((k for centre, k in centres
+                            if distance_m(centre["lat"], centre["lng"], point["lat"], point["lng"]) <= Config.BATCH_DEDUP_METERS), None)
+                if key is None:
+                    key = (round(point["lat"], 6), round(point["lng"], 6), category)
+                    futures[key] = self._submit(pool, nearby_search, point, None, category, self.radius)
+                    centres.append((point, key))
+                    self.stats["searches"] += 1
+                by_key[(location, category)] = key
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = [base_place(p) for p in future.result()]
+            except Exception as e:
+                results[key] = e
+        return {cell: (value if isinstance(value, Exception) else results[value]) for cell, value in by_key.items()}
+
+    def _build_cell(self, cell, coords, searches, resolved):
+        location, category = cell
+        result = {"location": location, "category": category}
+        point = coords[location]
+        places = searches.get(cell)
+        if isinstance(point, Exception) or isinstance(places, Exception):
+            result["error"] = str(point if isinstance(point, Exception) else places)
+            return result
+        result["center"] = point
+        if "heatmap" in self.analyses:
+            result["heatmap"] = {
+                "coordinates": [{"lat": p["lat"], "lng": p["lng"]} for p in places],
+                "count": len(places)
+            }
+        if "competitors" in self.analyses:
+            details = []
+            for place in places:
+                top_reviews, least_reviews, summaries = resolved.get(place["place_id"], ([], [], {}))
+                details.append({**place, "top_reviews": top_reviews, "least_reviews": least_reviews, "summaries": summaries})
+            total = len(details)
+            result["competitors"] = {
+                "total": total,
+                "avg_rating": round(sum(p["rating"] or 0 for p in details) / total, 2) if total else 0,
+                "avg_reviews": round(sum(p["user_ratings_total"] or 0 for p in details) / total, 2) if total else 0,
+                "details": details
+            }
+        return result
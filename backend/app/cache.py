@@ -0,0 +1,172 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from .config import Config
+from .metrics import record_cache
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, name, ttl, maxsize=1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] < time.monotonic():
+                del self._data[key]
+                entry = _MISSING
+            if entry is not _MISSING:
+                self._data.move_to_end(key)
+        record_cache(self.name, entry is not _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def __contains__(self, key):
+        """Membership check that does not count as a hit or miss or refresh LRU order."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[0] >= time.monotonic()
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteCache:
+    """
+    Cross-process cache in a SQLite file (WAL mode) with the TTLCache interface, so every
+    pre-forked worker shares the same entries. Values are pickled; expiry uses wall-clock time.
+    Each thread of each process keeps its own connection.
+    """
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, name, path, ttl, maxsize=None):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _key(key):
+        return repr(key)
+
+    def _lookup(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at >= ?",
+            (self.name, self._key(key), time.time())
+        ).fetchone()
+        return _MISSING if row is None else pickle.loads(row[0])
+
+    def get(self, key, default=None):
+        try:
+            value = self._lookup(key)
+        except sqlite3.Error:
+            value = _MISSING
+        record_cache(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key):
+        try:
+            return self._lookup(key) is not _MISSING
+        except sqlite3.Error:
+            return False
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self.prune()
+        except sqlite3.Error:
+            # The shared cache is an optimisation; a locked or broken file must not fail requests
+            pass
+
+    def prune(self):
+        """Drop expired entries, then the soonest-expiring ones beyond maxsize."""
+        conn = self._conn()
+        conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?", (self.name, time.time()))
+        if self.maxsize:
+            conn.execute("""
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.name, self.name, self.maxsize))
+
+    def delete(self, key):
+        try:
+            self._conn().execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, self._key(key)))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+
+    def __len__(self):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at >= ?", (self.name, time.time())
+        ).fetchone()[0]
+
+def shared_cache(name, ttl, maxsize=1024):
+    """
+    Cache for upstream results that every worker should share: a SQLiteCache in
+    Config.SHARED_CACHE_PATH when set, otherwise a per-process TTLCache.
+    """
+    if Config.SHARED_CACHE_PATH:
+        return SQLiteCache(name, Config.SHARED_CACHE_PATH, ttl, maxsize)
+    return TTLCache(name, ttl, maxsize)
@@ -0,0 +1,90 @@
+import json
+import zlib
+from collections.abc import Mapping
+
+# Compressed JSON blobs are stored as MAGIC + zlib(json). Anything else is legacy JSON text.
+MAGIC = b"ZJ1"
+COMPRESSION_LEVEL = 6
+
+JSON_BLOB_COLUMNS = [
+    ("heatmap_data", "heatmap_data"),
+    ("business_strategies", "trend_data"),
+    ("business_strategies", "competitor_data"),
+    ("analyzed_locations", "trend_data"),
+    ("landmark_data", "landmark_data"),
+    ("places", "reviews"),
+]
+
+def encode_json(data):
+    if data is None:
+        return None
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+    return MAGIC + zlib.compress(raw, COMPRESSION_LEVEL)
+
+def decode_json_text(value):
+    """Return the stored JSON as text without parsing it."""
+    if value is None:
+        return None
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, bytes):
+        if value.startswith(MAGIC):
+            return zlib.decompress(value[len(MAGIC):]).decode("utf-8")
+        return value.decode("utf-8")
+    return value
+
+def decode_json(value):
+    text = decode_json_text(value)
+    if not text:
+        return None
+    return json.loads(text)
+
+class LazyJSON(Mapping):
+    """
+    Read-only mapping over a stored blob that decompresses and parses it on first access.
+    Rows whose blob is never looked at cost nothing beyond the fetch.
+    """
+
+    __slots__ = ("_raw", "_data")
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._data = None
+
+    def _decoded(self):
+        if self._data is None:
+            self._data = decode_json(self._raw) or {}
+            self._raw = None
+        return self._data
+
+    def __bool__(self):
+        return bool(self._raw) if self._data is None else bool(self._data)
+
+    def __getitem__(self, key):
+        return self._decoded()[key]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __len__(self):
+        return len(self._decoded())
+
+    def to_python(self):
+        return self._decoded()
+
+def migrate_json_columns(cursor, columns=JSON_BLOB_COLUMNS):
+    """Re-encode legacy JSON text rows in place. Already encoded rows are skipped."""
+    migrated = 0
+    for table, column in columns:
+        cursor.execute(f"SELECT rowid, {column} FROM {table} WHERE typeof({column}) = 'text'")
+        rows = cursor.fetchall()
+        updates = []
+        for rowid, value in rows:
+            try:
+                updates.append((encode_json(json.loads(value)), rowid))
+            except ValueError:
+                continue
+        if updates:
+            cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+            migrated += len(updates)
+    return migrated
@@ -0,0 +1,214 @@
+import os
+import gzip
+import json
+import time
+import sqlite3
+import statistics
+from datetime import datetime, timedelta, timezone
+import click
+from .codec import decode_json
+
+# Table -> (columns identifying "the same analysis", stored result blob)
+RESULT_TABLES = {
+    "heatmap_data": (("user_id", "location", "category"), "heatmap_data"),
+    "landmark_data": (("user_id", "business", "location"), "landmark_data"),
+    "competitor_insights": (("user_id", "location", "category"), None),
+    "business_strategies": (("user_id", "business_type", "location_coords"), None),
+}
+BLOB_COLUMNS = {"heatmap_data", "landmark_data", "trend_data", "competitor_data"}
+
+def _cutoff(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+def _same_group(columns):
+    return " AND ".join(f"n.{c} = t.{c}" for c in columns)
+
+def _db_size(conn):
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return {
+        "bytes": conn.execute("PRAGMA page_count").fetchone()[0] * page_size,
+        "free_bytes": conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+    }
+
+def _median_ms(conn, sql, params, runs=5):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+def benchmark_queries(conn, user_id):
+    """Median latency of the history scans generate_pdf_report and the warm-up ranking run."""
+    window = _cutoff(14)
+    return {
+        "report_strategies": _median_ms(conn, "SELECT * FROM business_strategies WHERE user_id = ? ORDER BY created_at DESC", (user_id,)),
+        "report_heatmaps": _median_ms(conn, "SELECT * FROM heatmap_data WHERE user_id = ? ORDER BY created_at DESC", (user_id,)),
+        "report_landmarks": _median_ms(conn, "SELECT * FROM landmark_data WHERE user_id = ? ORDER BY created_at DESC", (user_id,)),
+        "hot_pairs": _median_ms(conn, """
+            SELECT location, category, created_at FROM competitor_insights WHERE created_at >= ?
+            UNION ALL SELECT location, category, created_at FROM heatmap_data WHERE created_at >= ?
+        """, (window, window)),
+    }
+
+def _busiest_user(conn):
+    row = conn.execute("""
+        SELECT user_id FROM (
+            SELECT user_id FROM heatmap_data UNION ALL SELECT user_id FROM competitor_insights
+            UNION ALL SELECT user_id FROM landmark_data UNION ALL SELECT user_id FROM business_strategies
+        ) GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    return row[0] if row else None
+
+def _archive(conn, table, ids, archive_dir, stamp):
+    """Append the rows about to be deleted to archive_dir/<table>-<stamp>.ndjson.gz."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{table}-{stamp}.ndjson.gz")
+    with gzip.open(path, "at", encoding="utf-8") as out:
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", chunk):
+                record = {k: decode_json(row[k]) if k in BLOB_COLUMNS else row[k] for k in row.keys()}
+                if table == "competitor_insights":
+                    record["place_ids"] = [r[0] for r in conn.execute(
+                        "SELECT place_id FROM insight_places WHERE insight_id = ?", (row["id"],))]
+                out.write(json.dumps(record, default=str) + "\n")
+    return path
+
+def _delete(conn, table, ids):
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        if table == "competitor_insights":
+            conn.execute(f"DELETE FROM insight_places WHERE insight_id IN ({placeholders})", chunk)
+        conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", chunk)
+
+def duplicate_ids(conn, table):
+    """Rows whose result is identical to a newer row for the same (user, location, category)."""
+    columns, blob = RESULT_TABLES[table]
+    if table == "competitor_insights":
+        # An insight's result is its summary numbers plus the set of places it linked
+        conn.execute("DROP TABLE IF EXISTS temp.insight_signatures")
+        conn.execute("""
+            CREATE TEMP TABLE insight_signatures AS
+            SELECT ci.id, ci.user_id, ci.location, ci.category, ci.total, ci.avg_rating, ci.avg_reviews,
+                   (SELECT group_concat(place_id, ',') FROM (
+                       SELECT place_id FROM insight_places WHERE insight_id = ci.id ORDER BY place_id
+                   )) AS places
+            FROM competitor_insights ci
+        """)
+        conn.execute("CREATE INDEX temp.idx_insight_signatures ON insight_signatures (user_id, location, category, id)")
+        rows = conn.execute(f"""
+            SELECT t.id FROM insight_signatures t WHERE EXISTS (
+                SELECT 1 FROM insight_signatures n
+                WHERE {_same_group(columns)} AND n.id > t.id AND n.total IS t.total
+                  AND n.avg_rating IS t.avg_rating AND n.avg_reviews IS t.avg_reviews AND n.places IS t.places
+            )
+        """).fetchall()
+        conn.execute("DROP TABLE temp.insight_signatures")
+        return [r[0] for r in rows]
+    if blob is None:
+        return []
+    rows = conn.execute(f"""
+        SELECT t.id FROM {table} t WHERE EXISTS (
+            SELECT 1 FROM {table} n WHERE {_same_group(columns)} AND n.id > t.id AND n.{blob} IS t.{blob}
+        )
+    """).fetchall()
+    return [r[0] for r in rows]
+
+def expired_ids(conn, table, days):
+    """Rows older than `days`, except the newest row of each (user, location, category)."""
+    if not days:
+        return []
+    columns, _ = RESULT_TABLES[table]
+    rows = conn.execute(f"""
+        SELECT t.id FROM {table} t
+        WHERE t.created_at < ? AND EXISTS (SELECT 1 FROM {table} n WHERE {_same_group(columns)} AND n.id > t.id)
+    """, (_cutoff(days),)).fetchall()
+    return [r[0] for r in rows]
+
+def prune_caches(conn, search_days, places_days):
+    """Old search coverage and trend sweeps, and stored places no insight refers to any more."""
+    removed = {}
+    if search_days:
+        cutoff = _cutoff(search_days)
+        removed["place_searches"] = conn.execute("DELETE FROM place_searches WHERE searched_at < ?", (cutoff,)).rowcount
+        conn.execute("DELETE FROM trend_places WHERE sweep_id IN (SELECT id FROM trend_sweeps WHERE swept_at < ?)", (cutoff,))
+        removed["trend_sweeps"] = conn.execute("DELETE FROM trend_sweeps WHERE swept_at < ?", (cutoff,)).rowcount
+    if places_days:
+        cutoff = _cutoff(places_days)
+        orphans = "SELECT place_id FROM places WHERE updated_at < ? AND place_id NOT IN (SELECT place_id FROM insight_places)"
+        conn.execute(f"DELETE FROM place_categories WHERE place_id IN ({orphans})", (cutoff,))
+        removed["places"] = conn.execute(f"DELETE FROM places WHERE place_id IN ({orphans})", (cutoff,)).rowcount
+    return removed
+
+def vacuum(conn):
+    """Hand free pages back to the filesystem; converts the file to incremental auto-vacuum once."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return "full (converted to incremental auto_vacuum)"
+    # execute() steps a statement once, which frees a single page; executescript runs it to completion
+    conn.executescript("PRAGMA incremental_vacuum;")
+    return "incremental"
+
+def compact(db_path, retention_days, search_days, places_days, archive_dir, dry_run=False, run_vacuum=True):
+    """
+    Deduplicate, apply retention (archiving what it removes), prune cache tables and vacuum.
+    Returns a report with row counts, database size and query timings before and after.
+    """
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        user_id = _busiest_user(conn)
+        report = {"dry_run": dry_run, "size_before": _db_size(conn), "deduplicated": {}, "expired": {}, "archives": []}
+        if user_id is not None:
+            report["queries_ms_before"] = benchmark_queries(conn, user_id)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in RESULT_TABLES:
+                duplicates = duplicate_ids(conn, table)
+                _delete(conn, table, duplicates)
+                report["deduplicated"][table] = len(duplicates)
+                expired = expired_ids(conn, table, retention_days.get(table))
+                if expired and not dry_run and archive_dir:
+                    report["archives"].append(_archive(conn, table, expired, archive_dir, stamp))
+                _delete(conn, table, expired)
+                report["expired"][table] = len(expired)
+            report["pruned"] = prune_caches(conn, search_days, places_days)
+            conn.execute("ROLLBACK" if dry_run else "COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if run_vacuum and not dry_run:
+            report["vacuum"] = vacuum(conn)
+        report["size_after"] = _db_size(conn)
+        report["reclaimed_bytes"] = report["size_before"]["bytes"] - report["size_after"]["bytes"]
+        if user_id is not None and not dry_run:
+            report["queries_ms_after"] = benchmark_queries(conn, user_id)
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+    finally:
+        conn.close()
+
+def init_compaction(app):
+    @app.cli.command("compact")
+    @click.option("--dry-run", is_flag=True, help="Report what would be removed without changing anything.")
+    @click.option("--no-vacuum", is_flag=True, help="Skip returning free pages to the filesystem.")
+    @click.option("--archive-dir", default=None, help="Where expired rows are archived (default: ARCHIVE_DIR).")
+    def compact_command(dry_run, no_vacuum, archive_dir):
+        """Deduplicate and expire stored analyses, archive what is removed and vacuum the database."""
+        config = app.config
+        report = compact(
+            config["DATABASE_PATH"],
+            retention_days=config["RETENTION_DAYS"],
+            search_days=config["RETENTION_SEARCH_DAYS"],
+            places_days=config["RETENTION_PLACES_DAYS"],
+            archive_dir=archive_dir or config["ARCHIVE_DIR"],
+            dry_run=dry_run,
+            run_vacuum=not no_vacuum
+        )
+        click.echo(json.dumps(report, indent=2))
@@ -0,0 +1,81 @@
+import gzip
+import time
+import logging
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html"}
+
+def parse_accept_encoding(header):
+    """Return {encoding: q} for an Accept-Encoding header."""
+    accepted = {}
+    for part in (header or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+def choose_encoding(header):
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress_body(body, encoding, level):
+    if encoding == "br":
+        return brotli.compress(body, quality=min(level, 11))
+    return gzip.compress(body, compresslevel=min(level, 9))
+
+def init_compression(app):
+    logger = logging.getLogger("market_research_api")
+
+    @app.after_request
+    def compress_response(response):
+        serialize_ms = getattr(g, "serialize_seconds", 0.0) * 1000
+        timings = [f"serialize;dur={serialize_ms:.2f}"]
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            response.headers["Server-Timing"] = ", ".join(timings)
+            return response
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        raw_size = len(body)
+        encoding = None
+        if raw_size >= app.config["COMPRESSION_MIN_SIZE"]:
+            encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding:
+            started = time.thread_time()
+            body = compress_body(body, encoding, app.config["COMPRESSION_LEVEL"])
+            timings.append(f"compress;dur={(time.thread_time() - started) * 1000:.2f}")
+            response.set_data(body)
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Server-Timing"] = ", ".join(timings)
+        logger.debug(
+            f"{request.method} {request.path} serialize={serialize_ms:.2f}ms "
+            f"bytes={raw_size} sent={len(body)} encoding={encoding or 'identity'}"
+        )
+        return response
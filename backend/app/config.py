@@ -9,5 +9,90 @@ class Config:
     DATABASE_PATH = os.getenv("DATABASE_PATH", "market_research.db")
     JWT_SECRET = os.getenv("JWT_SECRET")
     JWT_EXPIRATION = 24
-    LOG_FILE = "api_requests.log"
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 3600))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))
+    LOG_FILE = os.getenv("LOG_FILE", "api_requests.log")
+    ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", 10 * 1024 * 1024))
+    ACCESS_LOG_ROTATE_SECONDS = int(os.getenv("ACCESS_LOG_ROTATE_SECONDS", 24 * 3600))
+    ACCESS_LOG_BACKUP_COUNT = int(os.getenv("ACCESS_LOG_BACKUP_COUNT", 7))
+    ACCESS_LOG_FLUSH_SECONDS = float(os.getenv("ACCESS_LOG_FLUSH_SECONDS", 1.0))
+    ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", 256))
+    ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))
     MAPS_RADIUS = 3000
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 20))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 100))
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", 6))
+    HTTP_VALIDATOR_TTL = int(os.getenv("HTTP_VALIDATOR_TTL", 60))
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_BYTES", 50 * 1024 * 1024))
+    LANDMARK_CATEGORIES = {"hostels": "lodging", "schools": "school", "apartments": "apartment"}
+    LANDMARK_RADIUS = int(os.getenv("LANDMARK_RADIUS", 3000))
+    LANDMARK_MAX_RADIUS = int(os.getenv("LANDMARK_MAX_RADIUS", 10000))
+    LANDMARK_TIMEOUT = float(os.getenv("LANDMARK_TIMEOUT", 10))
+    LANDMARK_POOL_SIZE = int(os.getenv("LANDMARK_POOL_SIZE", 8))
+    FOOTFALL_CATEGORY_WEIGHTS = {"hostels": 1.0, "schools": 1.2, "apartments": 1.5}
+    FOOTFALL_GRID_STEP = int(os.getenv("FOOTFALL_GRID_STEP", 100))
+    FOOTFALL_BANDWIDTH = float(os.getenv("FOOTFALL_BANDWIDTH", 300))
+    FOOTFALL_COMPETITOR_WEIGHT = float(os.getenv("FOOTFALL_COMPETITOR_WEIGHT", -2.0))
+    FOOTFALL_TOP_K = int(os.getenv("FOOTFALL_TOP_K", 3))
+    HEATMAP_CACHE_TTL = int(os.getenv("HEATMAP_CACHE_TTL", 900))
+    BATCH_MAX_CELLS = int(os.getenv("BATCH_MAX_CELLS", 250))
+    BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", 8))
+    BATCH_RATE_PER_SECOND = float(os.getenv("BATCH_RATE_PER_SECOND", 10))
+    BATCH_RATE_BURST = int(os.getenv("BATCH_RATE_BURST", 20))
+    # Searches for one category whose centres are at most this many metres apart run once
+    BATCH_DEDUP_METERS = float(os.getenv("BATCH_DEDUP_METERS", 50))
+    GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 24 * 3600))
+    NEARBY_CACHE_TTL = int(os.getenv("NEARBY_CACHE_TTL", 1800))
+    DETAILS_CACHE_TTL = int(os.getenv("DETAILS_CACHE_TTL", 6 * 3600))
+    TRENDS_CACHE_TTL = int(os.getenv("TRENDS_CACHE_TTL", 6 * 3600))
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "false").lower() == "true"
+    WARMUP_INTERVAL = float(os.getenv("WARMUP_INTERVAL", 300))
+    WARMUP_QUIET_SECONDS = float(os.getenv("WARMUP_QUIET_SECONDS", 30))
+    WARMUP_API_BUDGET = int(os.getenv("WARMUP_API_BUDGET", 200))
+    WARMUP_TOP_PAIRS = int(os.getenv("WARMUP_TOP_PAIRS", 20))
+    WARMUP_WINDOW_DAYS = int(os.getenv("WARMUP_WINDOW_DAYS", 14))
+    WARMUP_HALF_LIFE_HOURS = float(os.getenv("WARMUP_HALF_LIFE_HOURS", 48))
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 24 * 3600))
+    QUOTA_PATH = os.getenv("QUOTA_PATH", "api_quota.db")
+    QUOTA_RATE_PER_SECOND = float(os.getenv("QUOTA_RATE_PER_SECOND", 10))
+    QUOTA_BURST = int(os.getenv("QUOTA_BURST", 20))
+    QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", 10))
+    # USD per user per day (0 = no per-user budget); see the README for what each endpoint costs
+    QUOTA_USER_DAILY_BUDGET = float(os.getenv("QUOTA_USER_DAILY_BUDGET", 0))
+    # USD per call; override to match the project's Google Maps Platform pricing
+    QUOTA_SKU_COSTS = {
+        "geocoding": 0.005,
+        "reverse_geocoding": 0.005,
+        "nearby_search": 0.032,
+        "place_details": 0.017
+    }
+    LOCAL_PLACES_MAX_AGE = int(os.getenv("LOCAL_PLACES_MAX_AGE", 6 * 3600))
+    LOCAL_SEARCH_TOLERANCE = float(os.getenv("LOCAL_SEARCH_TOLERANCE", 0.1))
+    TREND_SWEEP_MAX_AGE = int(os.getenv("TREND_SWEEP_MAX_AGE", 24 * 3600))
+    TREND_DEFAULT_RINGS = os.getenv("TREND_DEFAULT_RINGS", "500,1000,3000")
+    TREND_MAX_RINGS = int(os.getenv("TREND_MAX_RINGS", 10))
+    # Days a stored analysis is kept (0 = forever); the newest per user/location/category always stays
+    RETENTION_DAYS = {
+        "heatmap_data": int(os.getenv("RETENTION_HEATMAP_DAYS", 90)),
+        "competitor_insights": int(os.getenv("RETENTION_INSIGHT_DAYS", 180)),
+        "landmark_data": int(os.getenv("RETENTION_LANDMARK_DAYS", 180)),
+        "business_strategies": int(os.getenv("RETENTION_STRATEGY_DAYS", 0))
+    }
+    RETENTION_SEARCH_DAYS = int(os.getenv("RETENTION_SEARCH_DAYS", 30))
+    RETENTION_PLACES_DAYS = int(os.getenv("RETENTION_PLACES_DAYS", 90))
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+    NEARBY_DETAIL_WORKERS = int(os.getenv("NEARBY_DETAIL_WORKERS", 8))
+    EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 500))
+    # Worker processes for TextRank review extracts; 0 disables them
+    SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", 2))
+    SUMMARY_SENTENCES = int(os.getenv("SUMMARY_SENTENCES", 3))
+    SUMMARY_PROMPT_WAIT = float(os.getenv("SUMMARY_PROMPT_WAIT", 2.0))
@@ -1,11 +1,47 @@
 import sqlite3
 from flask import g, current_app
 import logging
+import time
+from .codec import migrate_json_columns
+from .spatial import init_spatial_index
+from .trend_rings import init_trend_store
+from .metrics import observe
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            observe("sqlite_query_duration_seconds", time.perf_counter() - started, {"op": _statement_type(sql)})
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            observe("sqlite_query_duration_seconds", time.perf_counter() - started, {"op": _statement_type(sql)})
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors report statement latency to the metrics registry."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _statement_type(sql):
+    head = sql.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
 
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(current_app.config['DATABASE_PATH'])
+        db = g._database = sqlite3.connect(current_app.config['DATABASE_PATH'], factory=TimedConnection)
         db.row_factory = sqlite3.Row
     return db
 
@@ -13,6 +49,8 @@ def init_db():
     try:
         with sqlite3.connect(current_app.config['DATABASE_PATH']) as conn:
             cursor = conn.cursor()
+            # Only takes effect on a new file; `flask compact` converts existing ones
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
             # Create users table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS users (
@@ -101,12 +139,12 @@ def init_db():
                 );
 
             ''')
+            # Create places table (one row per Google place_id, latest attributes win)
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS competitor_places (
+                CREATE TABLE IF NOT EXISTS places (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    insight_id INTEGER NOT NULL,
+                    place_id TEXT UNIQUE NOT NULL,
                     name TEXT,
-                    place_id TEXT,
                     lat REAL,
                     lng REAL,
                     rating REAL,
@@ -117,13 +155,94 @@ def init_db():
                     negative_summary TEXT,
                     positive_highlight TEXT,
                     negative_highlight TEXT,
-                    FOREIGN KEY (insight_id) REFERENCES competitor_insights(id)
-                );
+                    positive_extract TEXT,
+                    negative_extract TEXT,
+                    reviews TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
             ''')
+            # Create insight_places join table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS insight_places (
+                    insight_id INTEGER NOT NULL,
+                    place_id TEXT NOT NULL,
+                    PRIMARY KEY (insight_id, place_id),
+                    FOREIGN KEY (insight_id) REFERENCES competitor_insights(id),
+                    FOREIGN KEY (place_id) REFERENCES places(place_id)
+                ) WITHOUT ROWID
+            ''')
+            add_missing_columns(cursor, 'places', {'positive_extract': 'TEXT', 'negative_extract': 'TEXT'})
+            migrate_competitor_places(cursor)
+            init_spatial_index(cursor)
+            init_trend_store(cursor)
+            # Keyset pagination indexes for the history endpoints
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_strategies_user_created ON business_strategies (user_id, created_at, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_user_created ON generated_reports (user_id, created_at, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_heatmap_user_created ON heatmap_data (user_id, created_at, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_landmark_user_created ON landmark_data (user_id, created_at, id)")
+            # Latest-insight lookups and the compaction job group by (user, location, category)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_insights_user_key ON competitor_insights (user_id, location, category, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_heatmap_user_key ON heatmap_data (user_id, location, category, id)")
+            migrated = migrate_json_columns(cursor)
+            if migrated:
+                logging.getLogger("market_research_api").info(f"Compressed {migrated} legacy JSON blobs")
 
             conn.commit()
             logging.getLogger("market_research_api").info("Successfully initialized SQLite database")
     except Exception as e:
         logging.getLogger("market_research_api").error(f"Failed to initialize SQLite database: {e}")
         raise
-        
+
+def add_missing_columns(cursor, table, columns):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+def migrate_competitor_places(cursor):
+    """
+    Fold the legacy per-insight competitor_places copies into places/insight_places
+    and replace the table with a read-only view of the same shape.
+    """
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = 'competitor_places'")
+    existing = cursor.fetchone()
+    if existing and existing[0] == 'table':
+        cursor.execute('''
+            INSERT INTO places (
+                place_id, name, lat, lng, rating, user_ratings_total, vicinity, types,
+                positive_summary, negative_summary, positive_highlight, negative_highlight
+            )
+            SELECT place_id, name, lat, lng, rating, user_ratings_total, vicinity, types,
+                   positive_summary, negative_summary, positive_highlight, negative_highlight
+            FROM competitor_places
+            WHERE place_id IS NOT NULL
+            ORDER BY id
+            ON CONFLICT(place_id) DO UPDATE SET
+                name = excluded.name,
+                lat = excluded.lat,
+                lng = excluded.lng,
+                rating = excluded.rating,
+                user_ratings_total = excluded.user_ratings_total,
+                vicinity = excluded.vicinity,
+                types = excluded.types,
+                positive_summary = COALESCE(excluded.positive_summary, places.positive_summary),
+                negative_summary = COALESCE(excluded.negative_summary, places.negative_summary),
+                positive_highlight = COALESCE(excluded.positive_highlight, places.positive_highlight),
+                negative_highlight = COALESCE(excluded.negative_highlight, places.negative_highlight)
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO insight_places (insight_id, place_id)
+            SELECT insight_id, place_id FROM competitor_places WHERE place_id IS NOT NULL
+        ''')
+        cursor.execute("DROP TABLE competitor_places")
+        logging.getLogger("market_research_api").info("Migrated competitor_places into places/insight_places")
+    cursor.execute("DROP VIEW IF EXISTS competitor_places")
+    cursor.execute('''
+        CREATE VIEW competitor_places AS
+        SELECT p.id, ip.insight_id, p.name, p.place_id, p.lat, p.lng, p.rating, p.user_ratings_total,
+               p.vicinity, p.types, p.positive_summary, p.negative_summary,
+               p.positive_highlight, p.negative_highlight, p.positive_extract, p.negative_extract
+        FROM insight_places ip
+        JOIN places p ON p.place_id = ip.place_id
+    ''')
@@ -4,6 +4,10 @@ from .heatmap_endpoints import heatmap_bp
 from .strategy_endpoints import strategy_bp
 from .report_endpoints import report_bp
 from .landmark_endpoints import landmark_bp
+from .metrics_endpoints import metrics_bp
+from .profile_endpoints import profile_bp
+from .batch_endpoints import batch_bp
+from .export_endpoints import export_bp
 
 def register_blueprints(app):
     app.register_blueprint(auth_bp)
@@ -12,3 +16,7 @@ def register_blueprints(app):
     app.register_blueprint(strategy_bp)
     app.register_blueprint(report_bp)
     app.register_blueprint(landmark_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profile_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(export_bp)
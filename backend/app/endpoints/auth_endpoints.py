@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from ..database import get_db
-from ..auth import hash_password, generate_token, auth_required
+from ..auth import hash_password, generate_token, auth_required, get_user
+from ..http_cache import conditional
+from ..quota import quota
 import logging
 
 auth_bp = Blueprint('auth', __name__)
@@ -68,15 +70,18 @@ def login():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def profile_validator(user_id):
+    user = get_user(user_id)
+    if not user:
+        return None
+    return (user['id'], user['created_at'], user['username'], user['email'], user['business_name']), user['created_at']
+
 @auth_bp.route('/user-profile', methods=['GET'])
 @auth_required
+@conditional("profile", profile_validator)
 def get_user_profile():
     try:
-        user_id = request.user_id
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT id, username, email, business_name, created_at FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
+        user = get_user(request.user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
         return jsonify({
@@ -88,3 +93,20 @@ def get_user_profile():
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@auth_bp.route('/api-usage', methods=['GET'])
+@auth_required
+def get_api_usage():
+    """Today's billable Google API calls for the current user, by endpoint and SKU."""
+    try:
+        usage = quota.usage(request.user_id)
+        spent = round(sum(u["cost"] for u in usage), 4)
+        budget = quota.user_daily_budget
+        return jsonify({
+            "usage": usage,
+            "spent": spent,
+            "daily_budget": budget or None,
+            "remaining": round(max(0.0, budget - spent), 4) if budget else None
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,55 @@
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from ..auth import auth_required
+from ..batch import BatchRunner, parse_batch_request
+from ..database import get_db
+from ..places_store import save_competitor_insight
+from ..http_cache import invalidate
+from ..json_provider import dumps_bytes
+
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('/batch-analysis', methods=['POST'])
+@auth_required
+def batch_analysis():
+    """
+    Analyse a locations x categories matrix in one request.
+    Body: {"locations": [...], "categories": [...], "analyses": ["competitors", "heatmap"],
+           "radius": int, "stream": bool, "save": bool}
+    With stream=true every cell is sent as one NDJSON line as soon as it is complete,
+    followed by a final {"stats": ...} line.
+    """
+    data = request.get_json() or {}
+    try:
+        params = parse_batch_request(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    user_id = request.user_id
+    save = data.get("save", True)
+    runner = BatchRunner(current_app._get_current_object(), **params)
+
+    def cells():
+        saved = False
+        for cell in runner.run():
+            if save and "competitors" in cell:
+                competitors = cell["competitors"]
+                save_competitor_insight(get_db(), user_id, cell["location"], cell["category"], competitors, competitors["details"])
+                saved = True
+            yield cell
+        if saved:
+            invalidate("competitor_strategy", user_id)
+
+    if data.get("stream"):
+        def generate():
+            for cell in cells():
+                yield dumps_bytes(cell) + b"\n"
+            yield dumps_bytes({"stats": runner.stats}) + b"\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    try:
+        results = list(cells())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        "cells": results,
+        "stats": runner.stats
+    })
@@ -1,29 +1,181 @@
-from flask import Blueprint, request, jsonify
+import time
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from ..auth import auth_required
-from ..google_maps import get_nearby_places
-from ..utils import validate_location, dataframe_to_dict, format_json_response
+from ..google_maps import (
+    get_nearby_places, geocode_location, nearby_search, base_place, enrich_place,
+    check_fields, search_rows, iter_enriched_places
+)
+from ..utils import validate_location, dataframe_to_dict
 from ..database import get_db
-import json
-from flask import Blueprint, request, jsonify, current_app
-from ..auth import auth_required
-from ..database import get_db
-from ..groq_ai import call_groq_ai
+from ..places_store import save_competitor_insight, get_insight_places, get_latest_insight, stored_enrichment, SUMMARY_COLUMNS
+from ..groq_ai import call_groq_ai, GroqError
+from ..http_cache import conditional, invalidate
+from ..quota import QuotaExceeded
+from ..spatial import places_within, local_row_to_place
+from ..json_provider import dumps_bytes
 
 competitor_bp = Blueprint('competitor', __name__)
 
+
 # ...existing code...
 @competitor_bp.route('/api/nearby-places', methods=['GET'])
 @auth_required
 def nearby_places():
+    """
+    Nearby places with the requested `fields`. stream=1 answers with NDJSON: one line per place
+    as soon as its Details/sentiment enrichment finishes, then a final {"stats": ...} line.
+    include_reviews=0 leaves the review bodies out of top_reviews/least_reviews.
+    """
     location = request.args.get('location')
     place_type = request.args.get('type')
     keyword = request.args.get('keyword')
     radius = request.args.get('radius', type=int)
-    df, error = get_nearby_places(location, place_type, keyword, radius)
+    fields = request.args.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    include_reviews = request.args.get('include_reviews', '1') not in ('0', 'false')
+    if request.args.get('stream') in ('1', 'true'):
+        return stream_nearby_places(location, place_type, keyword, radius, fields, include_reviews)
+    df, error = get_nearby_places(location, place_type, keyword, radius, fields=fields)
     if error:
         return jsonify({'error': error}), 400
     # Convert DataFrame to list of dicts for JSON response
-    return jsonify(df.to_dict(orient='records'))
+    places = df.to_dict(orient='records')
+    if not include_reviews:
+        places = [without_review_text(p) for p in places]
+    return jsonify(places)
+
+
+def without_review_text(place):
+    for key in ('top_reviews', 'least_reviews'):
+        if key in place:
+            place[key] = [{k: v for k, v in r.items() if k != 'text'} for r in place[key] or []]
+    return place
+
+
+def stream_nearby_places(location, place_type, keyword, radius, fields, include_reviews):
+    # Validation, geocoding and the nearby search happen before the response starts,
+    # so their errors still get a proper status code
+    fields, needs_details, error = check_fields(fields)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        rows, error = search_rows(location, place_type, keyword, radius)
+    except QuotaExceeded:
+        raise
+    except Exception as e:
+        rows, error = None, f"Google Places API error: {str(e)}"
+    if error:
+        return jsonify({'error': error}), 400
+    app = current_app._get_current_object()
+    stats = {"places": 0, "enriched": 0, "degraded": None}
+
+    def generate():
+        started = time.perf_counter()
+        for place in iter_enriched_places(app, rows, fields, needs_details, stats, app.config['NEARBY_DETAIL_WORKERS']):
+            if not include_reviews:
+                place = without_review_text(place)
+            yield dumps_bytes(place) + b"\n"
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        yield dumps_bytes({"stats": stats}) + b"\n"
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def summarize_competitors(details):
+    total = len(details)
+    if not total:
+        return {"total": 0, "avg_rating": 0, "avg_reviews": 0, "details": []}
+    return {
+        "total": total,
+        "avg_rating": round(sum(p["rating"] or 0 for p in details) / total, 2),
+        "avg_reviews": round(sum(p["user_ratings_total"] or 0 for p in details) / total, 2),
+        "details": details
+    }
+
+
+def refresh_competitors(db, user_id, location, category):
+    """
+    Incremental version of the full competitor run: one nearby search, then Place Details
+    and sentiment only for places that are new since the last insight or whose
+    user_ratings_total changed. Everything else is carried forward from the places table.
+    """
+    coords, error = geocode_location(location)
+    if error:
+        return None, error
+    fresh = [base_place(p) for p in nearby_search(coords, keyword=category, use_cache=False)]
+
+    previous = get_latest_insight(db, user_id, location, category)
+    known = {}
+    if previous:
+        rows = get_insight_places(db, previous["id"], "p.place_id, p.user_ratings_total, p.reviews, " +
+                                  ", ".join(f"p.{c}" for c in SUMMARY_COLUMNS))
+        known = {row["place_id"]: row for row in rows}
+
+    details, refreshed, carried, deferred = [], [], [], []
+    for place in fresh:
+        row = known.get(place["place_id"])
+        if row is not None and row["user_ratings_total"] == place["user_ratings_total"]:
+            place.update(stored_enrichment(row))
+            carried.append(place["place_id"])
+            details.append(place)
+            continue
+        if not deferred:
+            try:
+                enrich_place(place, use_cache=False)
+                refreshed.append(place["place_id"])
+                details.append(place)
+                continue
+            except QuotaExceeded:
+                pass
+        # Out of quota: keep the stored (possibly stale) enrichment and retry on the next refresh
+        place.update(stored_enrichment(row) if row is not None else {"top_reviews": [], "least_reviews": [], "summaries": {}})
+        deferred.append(place["place_id"])
+        details.append(place)
+
+    current = {p["place_id"] for p in fresh}
+    response = summarize_competitors(details)
+    response["refresh"] = {
+        "mode": "incremental",
+        "previous_insight_id": previous["id"] if previous else None,
+        "refreshed": refreshed,
+        "carried_forward": carried,
+        "deferred": deferred,
+        "removed": [place_id for place_id in known if place_id not in current]
+    }
+    return response, None
+
+
+@competitor_bp.route('/api/local-places', methods=['GET'])
+@auth_required
+def local_places():
+    """
+    Stored places within `radius` metres of a point, answered from the local R*Tree index
+    without calling Google. Query: location or lat/lng, radius, category, max_age (seconds), limit.
+    """
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None:
+        location = request.args.get('location', '')
+        is_valid, error_msg = validate_location(location)
+        if not is_valid:
+            return jsonify({'error': error_msg}), 400
+        coords, error = geocode_location(location)
+        if error:
+            return jsonify({'error': error}), 400
+        lat, lng = coords['lat'], coords['lng']
+    radius = request.args.get('radius', current_app.config['MAPS_RADIUS'], type=float)
+    if not radius or radius <= 0 or radius > 50000:
+        return jsonify({'error': 'radius must be between 0 and 50000 metres'}), 400
+    max_age = request.args.get('max_age', type=int)
+    limit = request.args.get('limit', 100, type=int)
+    rows = places_within(get_db(), lat, lng, radius, request.args.get('category') or None, max_age, max(1, min(limit, 1000)))
+    return jsonify({
+        'center': {'lat': lat, 'lng': lng},
+        'radius': radius,
+        'count': len(rows),
+        'places': [{**local_row_to_place(row), 'distance_m': round(d, 1), 'updated_at': row['updated_at']} for d, row in rows]
+    })
+
+
 # ...existing code...
 @competitor_bp.route('/competitor-insights')
 @auth_required
@@ -38,76 +190,45 @@ def get_competitor_insights():
     if not category:
         return jsonify({"error": "Category parameter is required"}), 400
 
+    refresh = request.args.get("refresh", "full")
+    if refresh not in ("full", "incremental"):
+        return jsonify({"error": "refresh must be 'full' or 'incremental'"}), 400
+
     try:
-        competitors_df, error = get_nearby_places(location, keyword=category)
-        if error:
-            return jsonify({"error": error}), 500
-
-        if competitors_df.empty:
-            response = {
-                "total": 0,
-                "avg_rating": 0,
-                "avg_reviews": 0,
-                "details": []
-            }
+        db = get_db()
+        if refresh == "incremental":
+            response, error = refresh_competitors(db, user_id, location, category)
+            if error:
+                return jsonify({"error": error}), 500
         else:
-            total = len(competitors_df)
-            avg_rating = competitors_df['rating'].mean()
-            avg_reviews = competitors_df['user_ratings_total'].mean()
-
-            response = {
-                "total": total,
-                "avg_rating": round(float(avg_rating), 2),
-                "avg_reviews": round(float(avg_reviews), 2),
-                "details": dataframe_to_dict(competitors_df)
-            }
+            competitors_df, error = get_nearby_places(location, keyword=category)
+            if error:
+                return jsonify({"error": error}), 500
+            response = summarize_competitors(dataframe_to_dict(competitors_df))
+            if competitors_df.attrs.get("degraded"):
+                response["degraded"] = competitors_df.attrs["degraded"]
 
         # --- Save to DB ---
-        db = get_db()
-        cursor = db.cursor()
-
-        # Insert into main insights table
-        cursor.execute("""
-            INSERT INTO competitor_insights (user_id, location, category, total, avg_rating, avg_reviews)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_id, location, category, response["total"], response["avg_rating"], response["avg_reviews"]))
-
-        insight_id = cursor.lastrowid
-
-        # Insert each place (with summaries)
-        for _, row in competitors_df.iterrows():
-            summaries = row.get('summaries', {})
-            cursor.execute("""
-                INSERT INTO competitor_places (
-                    insight_id, name, place_id, lat, lng, rating, user_ratings_total, vicinity, types,
-                    positive_summary, negative_summary, positive_highlight, negative_highlight
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                insight_id,
-                row.get('name'),
-                row.get('place_id'),
-                row.get('lat'),
-                row.get('lng'),
-                row.get('rating', 0),
-                row.get('user_ratings_total', 0),
-                row.get('vicinity'),
-                json.dumps(row.get('types', [])),
-                summaries.get('positive_summary'),
-                summaries.get('negative_summary'),
-                summaries.get('positive_highlight'),
-                summaries.get('negative_highlight')
-            ))
-
-        db.commit()
-        return jsonify(format_json_response(response))
+        save_competitor_insight(db, user_id, location, category, response, response["details"])
+        invalidate("competitor_strategy", user_id)
+        return jsonify(response)
 
+    except QuotaExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-strategy_bp = Blueprint('strategy', __name__)
 
-@strategy_bp.route('/competitor-strategy', methods=['GET'])
+def competitor_strategy_validator(user_id):
+    insight = get_latest_insight(get_db(), user_id, request.args.get("location", ""), request.args.get("category", ""))
+    if not insight:
+        return None
+    return (insight['id'], insight['created_at']), insight['created_at']
+
+
+@competitor_bp.route('/competitor-strategy', methods=['GET'])
 @auth_required
+@conditional("competitor_strategy", competitor_strategy_validator)
 def generate_business_strategy():
     """
     Fetch stored competitor summaries & highlights,
@@ -136,14 +257,12 @@ def generate_business_strategy():
     insight_id = insight["id"]
 
     # Fetch all competitor places with summaries
-    cursor.execute("""
-        SELECT name, rating, user_ratings_total, 
-               positive_summary, negative_summary,
-               positive_highlight, negative_highlight
-        FROM competitor_places
-        WHERE insight_id = ?
-    """, (insight_id,))
-    competitors = cursor.fetchall()
+    competitors = get_insight_places(db, insight_id, """
+        p.name, p.rating, p.user_ratings_total,
+        p.positive_summary, p.negative_summary,
+        p.positive_highlight, p.negative_highlight,
+        p.positive_extract, p.negative_extract
+    """)
 
     if not competitors:
         return jsonify({"error": "No competitor data found"}), 404
@@ -158,14 +277,16 @@ def generate_business_strategy():
             "pos_summary": c["positive_summary"],
             "neg_summary": c["negative_summary"],
             "pos_highlight": c["positive_highlight"],
-            "neg_highlight": c["negative_highlight"]
+            "neg_highlight": c["negative_highlight"],
+            "pos_extract": c["positive_extract"],
+            "neg_extract": c["negative_extract"]
         })
 
     # Build structured text for LLM
     prompt = f"""
 You are an AI business strategist analyzing competitors for a new {category} business around {location}.
 
-Below is competitor sentiment and highlights data extracted from Google Maps reviews:
+Below is competitor sentiment, highlights and representative review sentences (pos_extract/neg_extract) extracted from Google Maps reviews:
 
 {review_summary}
 
@@ -180,11 +301,13 @@ Make it structured and concise.
 """
 
     try:
-        llm_response = call_groq_ai(prompt)
+        # A failed completion must not get an ETag, or clients would revalidate it with 304
+        llm_response = call_groq_ai(prompt, raise_errors=True)
         return jsonify({
             "strategy": llm_response,
             "context_used": review_summary
         })
+    except GroqError as e:
+        return jsonify({"error": str(e)}), 502
     except Exception as e:
         return jsonify({"error": f"LLM processing failed: {str(e)}"}), 500
-
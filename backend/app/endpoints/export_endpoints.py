@@ -0,0 +1,30 @@
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from ..auth import auth_required
+from ..database import get_db
+from ..export import EXPORT_DATASETS, EXPORT_FORMATS, export_stream, pa
+
+export_bp = Blueprint('export', __name__)
+
+@export_bp.route('/export', methods=['GET'])
+@auth_required
+def export_history():
+    """
+    Stream the caller's stored analyses for offline BI.
+    Query: dataset (strategies, competitor_insights, heatmaps, landmarks), format (ndjson, csv, arrow)
+    and after_id to resume from the last exported id. Rows are read from SQLite in batches of
+    EXPORT_BATCH_ROWS and written as they are read, so memory use does not grow with history size.
+    """
+    dataset = request.args.get('dataset', '')
+    fmt = request.args.get('format', 'ndjson').lower()
+    if dataset not in EXPORT_DATASETS:
+        return jsonify({"error": f"dataset must be one of: {', '.join(EXPORT_DATASETS)}"}), 400
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt == "arrow" and pa is None:
+        return jsonify({"error": "Arrow export requires pyarrow to be installed"}), 501
+    after_id = request.args.get('after_id', 0, type=int)
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    chunks = export_stream(get_db(), dataset, fmt, request.user_id, after_id, current_app.config['EXPORT_BATCH_ROWS'])
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{dataset}.{extension}"'
+    return response
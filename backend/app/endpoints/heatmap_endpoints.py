@@ -3,15 +3,50 @@ from ..auth import auth_required
 from ..google_maps import get_nearby_places, geocode_location, suggest_low_density_zones  # 👈 import new function
 from ..utils import validate_location
 from ..database import get_db
-import json
+from ..codec import encode_json
+from ..cache import TTLCache
+from ..config import Config
+from ..heatmap_tiles import aggregate_grid, aggregate_tile, WEIGHT_MODES, TILE_SIZE
+from ..quota import QuotaExceeded
+from flask import current_app
+
+MAX_ZOOM = 22
+HEATMAP_FIELDS = ('lat', 'lng', 'rating', 'user_ratings_total')
 
 heatmap_bp = Blueprint('heatmap', __name__)
 
+# Raw points per (location, category) and rendered tiles, shared by /heatmap and the tile endpoint
+_points_cache = TTLCache("heatmap_points", ttl=Config.HEATMAP_CACHE_TTL, maxsize=512)
+_tile_cache = TTLCache("heatmap_tiles", ttl=Config.HEATMAP_CACHE_TTL, maxsize=4096)
+
+def load_heatmap_points(location, category, coords=None):
+    key = (location, category)
+    points = _points_cache.get(key)
+    if points is not None:
+        return points, None
+    search_location = f"{coords['lat']},{coords['lng']}" if coords else location
+    places_df, error = get_nearby_places(search_location, keyword=category, fields=HEATMAP_FIELDS)
+    if error:
+        return None, error
+    points = places_df.to_dict('records')
+    _points_cache.set(key, points)
+    return points, None
+
+def parse_aggregation_args(args):
+    weight = args.get("weight", "none")
+    if weight not in WEIGHT_MODES:
+        raise ValueError(f"weight must be one of {', '.join(WEIGHT_MODES)}")
+    cell_px = args.get("cell", 32, type=int)
+    if not cell_px or not 8 <= cell_px <= TILE_SIZE:
+        raise ValueError(f"cell must be between 8 and {TILE_SIZE} pixels")
+    return weight, cell_px
+
 @heatmap_bp.route('/heatmap')
 @auth_required
 def get_heatmap_data():
     location = request.args.get("location", "")
     category = request.args.get("category", "")
+    zoom = request.args.get("zoom", type=int)
     user_id = request.user_id
     is_valid, error_msg = validate_location(location)
     if not is_valid:
@@ -19,34 +54,80 @@ def get_heatmap_data():
     if not category:
         return jsonify({"error": "Category parameter is required"}), 400
     try:
-        places_df, error = get_nearby_places(location, keyword=category)
-        if error:
-            return jsonify({"error": error}), 500
+        weight, cell_px = parse_aggregation_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if zoom is not None and not 0 <= zoom <= MAX_ZOOM:
+        return jsonify({"error": f"zoom must be between 0 and {MAX_ZOOM}"}), 400
+    try:
         coords, geocode_error = geocode_location(location)
         if geocode_error:
             return jsonify({"error": geocode_error}), 500
-        response = {}
-        if places_df.empty:
-            response = {
-                "coordinates": [],
-                "center": coords,
-                "count": 0
-            }
+        points, error = load_heatmap_points(location, category, coords)
+        if error:
+            return jsonify({"error": error}), 500
+        response = {
+            "center": coords,
+            "count": len(points)
+        }
+        if zoom is None:
+            response["coordinates"] = [{"lat": p["lat"], "lng": p["lng"]} for p in points]
         else:
-            coordinates = places_df[['lat', 'lng']].to_dict('records')
-            response = {
-                "coordinates": coordinates,
-                "center": coords,
-                "count": len(coordinates)
-            }
+            # Aggregated mode: one weighted cell per occupied cell_px square at this zoom
+            response["zoom"] = zoom
+            response["weight"] = weight
+            response["cells"] = aggregate_grid(points, zoom, cell_px, weight)
         db = get_db()
         cursor = db.cursor()
         cursor.execute(
             "INSERT INTO heatmap_data (user_id, location, category, heatmap_data) VALUES (?, ?, ?, ?)",
-            (user_id, location, category, json.dumps(response))
+            (user_id, location, category, encode_json(response))
         )
         db.commit()
         return jsonify(response)
+    except QuotaExceeded:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@heatmap_bp.route('/heatmap/tiles/<int:z>/<int:x>/<int:y>')
+@auth_required
+def get_heatmap_tile(z, x, y):
+    """
+    Weighted grid cells for one Web Mercator tile, so the payload depends on the viewport
+    rather than on how many places the category has.
+    """
+    location = request.args.get("location", "")
+    category = request.args.get("category", "")
+    is_valid, error_msg = validate_location(location)
+    if not is_valid:
+        return jsonify({"error": error_msg}), 400
+    if not category:
+        return jsonify({"error": "Category parameter is required"}), 400
+    if not 0 <= z <= MAX_ZOOM or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        return jsonify({"error": "Tile coordinates out of range"}), 400
+    try:
+        weight, cell_px = parse_aggregation_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        key = (location, category, weight, cell_px, z, x, y)
+        tile = _tile_cache.get(key)
+        if tile is None:
+            points, error = load_heatmap_points(location, category)
+            if error:
+                return jsonify({"error": error}), 500
+            tile = {
+                "z": z, "x": x, "y": y,
+                "weight": weight,
+                "cells": aggregate_tile(points, z, x, y, cell_px, weight)
+            }
+            _tile_cache.set(key, tile)
+        response = jsonify(tile)
+        response.headers["Cache-Control"] = f"private, max-age={current_app.config['HEATMAP_CACHE_TTL']}"
+        return response
+    except QuotaExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -79,5 +160,7 @@ def suggest_locations():
             "suggested_zones": suggestions,
             "count": len(suggestions)
         })
+    except QuotaExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
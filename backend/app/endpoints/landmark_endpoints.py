@@ -1,25 +1,26 @@
 from flask import Blueprint, request, jsonify
-from ..auth import auth_required
+from ..auth import auth_required, get_user
 from ..database import get_db
-import requests
-import json
+from ..codec import encode_json
+from ..landmarks import sweep_landmarks, parse_categories
+from ..google_maps import geocode_location, get_nearby_places
+from ..footfall import score_sites
+from ..quota import QuotaExceeded
 
 landmark_bp = Blueprint('landmark', __name__)
 
-def search_nearby(location, place_type, api_key):
-    endpoint = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    params = {
-        "location": location,
-        "radius": 3000,
-        "type": place_type,
-        "key": api_key
-    }
-    response = requests.get(endpoint, params=params)
-    return response.json().get("results", [])
-
 from flask import current_app
 from ..groq_ai import call_groq_ai
 
+def parse_radius(value):
+    """Search and scoring radius in metres: LANDMARK_RADIUS when omitted, else 1..LANDMARK_MAX_RADIUS."""
+    if value is None:
+        return current_app.config['LANDMARK_RADIUS']
+    max_radius = current_app.config['LANDMARK_MAX_RADIUS']
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= max_radius:
+        raise ValueError(f"radius must be an integer between 1 and {max_radius} metres")
+    return value
+
 @landmark_bp.route('/landmark-mapper', methods=['POST'])
 @auth_required
 def landmark_mapper():
@@ -29,34 +30,71 @@ def landmark_mapper():
     user_id = request.user_id
     if not business:
         return jsonify({"error": "Please provide a business type or name"}), 400
+    if not base_location:
+        return jsonify({"error": "Location parameter is required"}), 400
+    try:
+        categories = parse_categories(data.get("categories"))
+        radius = parse_radius(data.get("radius"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    coords, error = geocode_location(base_location)
+    if error:
+        return jsonify({"error": error}), 400
+    # Later searches reuse the geocoded point instead of geocoding the name again
+    center = f"{coords['lat']},{coords['lng']}"
     api_key = current_app.config['GOOGLE_MAPS_API_KEY']
-    hostels = search_nearby(base_location, "lodging", api_key)
-    schools = search_nearby(base_location, "school", api_key)
-    apartments = search_nearby(base_location, "apartment", api_key)
-    landmark_data = {
-        "hostels": [h["name"] for h in hostels[:5]],
-        "schools": [s["name"] for s in schools[:5]],
-        "apartments": [a["name"] for a in apartments[:5]]
+    landmarks, sweep_errors = sweep_landmarks(center, categories, api_key, radius=radius)
+    if not landmarks and sweep_errors:
+        return jsonify({"error": "Landmark search failed", "details": sweep_errors}), 502
+    landmark_data = {label: [p["name"] for p in places[:5]] for label, places in landmarks.items()}
+    competitors = []
+    try:
+        # Same radius as the candidate grid, so cells near its edge still see nearby competitors
+        competitors_df, competitor_error = get_nearby_places(center, keyword=business, radius=radius, fields=('lat', 'lng'))
+    except QuotaExceeded as e:
+        # The landmark sweep is already paid for; score without competitors rather than fail
+        competitors_df, competitor_error = None, str(e)
+    if not competitor_error:
+        competitors = competitors_df.to_dict('records')
+    landmark_points = {
+        label: [{
+            "lat": p["geometry"]["location"]["lat"],
+            "lng": p["geometry"]["location"]["lng"],
+            "user_ratings_total": p.get("user_ratings_total", 0)
+        } for p in places if p.get("geometry")]
+        for label, places in landmarks.items()
     }
+    config = current_app.config
+    recommended_sites = score_sites(
+        coords, landmark_points, competitors,
+        category_weights=config['FOOTFALL_CATEGORY_WEIGHTS'],
+        radius=radius,
+        grid_step=config['FOOTFALL_GRID_STEP'],
+        bandwidth=config['FOOTFALL_BANDWIDTH'],
+        competitor_weight=config['FOOTFALL_COMPETITOR_WEIGHT'],
+        top_k=config['FOOTFALL_TOP_K']
+    )
     user_context = ""
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("SELECT business_name FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
+    user = get_user(user_id)
     if user and user['business_name']:
         user_context = f"For the business '{user['business_name']}', "
+    # Coordinates are chosen by the scoring engine; the LLM only explains them
     prompt = f"""
-    {user_context}I am opening a new business: '{business}'.\nBased on the nearby landmarks data: {landmark_data},\nsuggest the best location (lat/lng) where customer footfall is likely to be highest.\nReturn only the coordinates and a short explanation.
+    {user_context}I am opening a new business: '{business}'.\nNearby landmarks: {landmark_data}.\nA footfall model (landmark density minus competitor density) ranked these sites best: {recommended_sites}.\nExplain briefly why the top site is the best choice and how the others compare. Do not suggest different coordinates.
     """
     ai_response = call_groq_ai(prompt, system_message="You are a helpful business advisor with geospatial reasoning.")
+    db = get_db()
+    cursor = db.cursor()
     cursor.execute(
         "INSERT INTO landmark_data (user_id, business, location, landmark_data, recommendation) VALUES (?, ?, ?, ?, ?)",
-        (user_id, business, base_location, json.dumps(landmark_data), ai_response)
+        (user_id, business, base_location, encode_json({**landmark_data, "recommended_sites": recommended_sites}), ai_response)
     )
     db.commit()
     return jsonify({
         "business": business,
         "base_location": base_location,
         "landmarks_analyzed": landmark_data,
-        "recommended_location": ai_response
+        "recommended_sites": recommended_sites,
+        "recommended_location": ai_response,
+        "errors": sweep_errors
     })
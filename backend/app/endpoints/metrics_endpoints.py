@@ -0,0 +1,13 @@
+import hmac
+from flask import Blueprint, request, jsonify, current_app
+from ..metrics import collect
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.headers.get('Authorization', '')
+    if token and not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return jsonify({"error": "Authentication required"}), 401
+    return current_app.response_class(collect(), mimetype="text/plain; version=0.0.4")
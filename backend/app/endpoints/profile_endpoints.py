@@ -0,0 +1,33 @@
+import hmac
+from flask import Blueprint, request, jsonify, send_file, current_app
+from functools import wraps
+
+profile_bp = Blueprint('profile', __name__)
+
+def admin_required(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('PROFILE_ADMIN_TOKEN')
+        supplied = request.headers.get('X-Admin-Token', '')
+        # Constant-time comparison so response timing does not leak the token
+        if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+            return jsonify({"error": "Admin token required"}), 401
+        return func(*args, **kwargs)
+    return wrapper
+
+@profile_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    profiles = current_app.extensions["profile_store"].list()
+    return jsonify({
+        "total": len(profiles),
+        "profiles": profiles
+    })
+
+@profile_bp.route('/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    path = current_app.extensions["profile_store"].path(name)
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=name)
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify, send_file, current_app
-from ..auth import auth_required
+from ..auth import auth_required, get_user
 from ..database import get_db
+from ..codec import LazyJSON
+from ..http_cache import conditional, invalidate
+from ..utils import parse_fields, parse_page_args, keyset_page
 import os
-import json
 from datetime import datetime
 from io import BytesIO
 from reportlab.lib.pagesizes import letter
@@ -13,11 +15,13 @@ from ..groq_ai import call_groq_ai
 
 report_bp = Blueprint('report', __name__)
 
+REPORT_FIELDS = ("id", "user_id", "report_name", "report_path", "created_at")
+REPORT_LIST_FIELDS = ("id", "report_name", "created_at")
+
 def call_groq_for_conclusion(user_id):
     db = get_db()
     cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
+    user = get_user(user_id)
     cursor.execute("SELECT * FROM business_strategies WHERE user_id = ? ORDER BY created_at DESC LIMIT 3", (user_id,))
     strategies = cursor.fetchall()
     strategy_summary = ""
@@ -39,8 +43,7 @@ def call_groq_for_conclusion(user_id):
 def generate_pdf_report(user_id):
     db = get_db()
     cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
+    user = get_user(user_id)
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     styles = getSampleStyleSheet()
@@ -68,7 +71,7 @@ def generate_pdf_report(user_id):
             elements.append(Paragraph(strategy['strategy'], styles['Normal']))
             elements.append(Spacer(1, 12))
             if strategy['trend_data']:
-                trend_data = json.loads(strategy['trend_data'])
+                trend_data = LazyJSON(strategy['trend_data'])
                 elements.append(Paragraph("Market Trends:", styles['Heading4']))
                 if 'top_categories' in trend_data:
                     elements.append(Paragraph("Top Business Categories:", styles['Heading4']))
@@ -89,7 +92,7 @@ def generate_pdf_report(user_id):
                         elements.append(table)
                         elements.append(Spacer(1, 12))
             if strategy['competitor_data']:
-                competitor_data = json.loads(strategy['competitor_data'])
+                competitor_data = LazyJSON(strategy['competitor_data'])
                 elements.append(Paragraph("Competitor Analysis:", styles['Heading4']))
                 elements.append(Paragraph(f"Total Competitors: {competitor_data.get('total', 0)}", styles['Normal']))
                 elements.append(Paragraph(f"Average Rating: {competitor_data.get('avg_rating', 0)}", styles['Normal']))
@@ -103,7 +106,7 @@ def generate_pdf_report(user_id):
         elements.append(Spacer(1, 12))
         for heatmap in heatmaps:
             elements.append(Paragraph(f"Heatmap for {heatmap['category']} in {heatmap['location']}", styles['Heading3']))
-            heatmap_data = json.loads(heatmap['heatmap_data'])
+            heatmap_data = LazyJSON(heatmap['heatmap_data'])
             elements.append(Paragraph(f"Number of Locations: {heatmap_data.get('count', 0)}", styles['Normal']))
             elements.append(Paragraph(f"Center Coordinates: {heatmap_data.get('center', {})}", styles['Normal']))
             elements.append(Spacer(1, 12))
@@ -115,7 +118,7 @@ def generate_pdf_report(user_id):
         for landmark in landmarks:
             elements.append(Paragraph(f"Landmark Analysis for {landmark['business']} in {landmark['location']}", styles['Heading3']))
             if landmark['landmark_data']:
-                landmark_data = json.loads(landmark['landmark_data'])
+                landmark_data = LazyJSON(landmark['landmark_data'])
                 if 'hostels' in landmark_data:
                     elements.append(Paragraph("Nearby Hostels:", styles['Heading4']))
                     for hostel in landmark_data['hostels']:
@@ -151,6 +154,7 @@ def generate_pdf_report(user_id):
         (user_id, f"Market Research Report {datetime.now().strftime('%Y-%m-%d')}", file_path)
     )
     db.commit()
+    invalidate("reports", user_id)
     return file_path
 
 @report_bp.route('/generate-report', methods=['POST'])
@@ -179,24 +183,34 @@ def download_report(report_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def reports_validator(user_id):
+    cursor = get_db().cursor()
+    cursor.execute("SELECT COUNT(*) AS n, MAX(id) AS last_id, MAX(created_at) AS last_created FROM generated_reports WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    return (row['n'], row['last_id'], row['last_created']), row['last_created']
+
 @report_bp.route('/reports', methods=['GET'])
 @auth_required
+@conditional("reports", reports_validator)
 def list_reports():
     try:
         user_id = request.user_id
+        try:
+            fields = parse_fields(request.args.get("fields"), REPORT_FIELDS, REPORT_LIST_FIELDS)
+            page = parse_page_args(request.args, current_app.config['PAGE_SIZE_DEFAULT'], current_app.config['PAGE_SIZE_MAX'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         db = get_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT * FROM generated_reports WHERE user_id = ? ORDER BY created_at DESC", (user_id,))
-        reports = []
-        for row in cursor.fetchall():
-            reports.append({
-                "id": row['id'],
-                "report_name": row['report_name'],
-                "created_at": row['created_at']
-            })
-        return jsonify({
-            "total": len(reports),
-            "reports": reports
-        })
+        reports, next_cursor, total = keyset_page(
+            db.cursor(), "generated_reports", fields, user_id,
+            page["limit"], page["cursor"], page["include_total"]
+        )
+        response = {
+            "reports": reports,
+            "next_cursor": next_cursor
+        }
+        if total is not None:
+            response["total"] = total
+        return jsonify(response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
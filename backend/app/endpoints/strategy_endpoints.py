@@ -1,57 +1,30 @@
 from flask import Blueprint, request, jsonify
-from ..auth import auth_required
-from ..google_maps import geocode_location, get_nearby_places
-from ..utils import format_json_response, dataframe_to_dict
+from ..auth import auth_required, get_user
+from ..google_maps import geocode_location, get_nearby_places, fetch_business_trends, sweep_establishments, remember_sweep
+from ..utils import dataframe_to_dict, parse_fields, parse_page_args, keyset_page, validate_location
 from ..database import get_db
-import json
+from ..places_store import save_competitor_insight
+from ..textrank import attach_extracts
+from ..trend_rings import covering_sweep, sweep_places, ring_counts
+from ..codec import encode_json, decode_json
+from ..http_cache import conditional, invalidate
+from ..metrics import timed, record_cache
+from ..quota import spend, QuotaExceeded
 from flask import current_app
 from ..groq_ai import call_groq_ai
 
 strategy_bp = Blueprint('strategy', __name__)
 
+STRATEGY_FIELDS = (
+    "id", "user_id", "business_type", "location_name", "location_coords",
+    "trend_data", "competitor_data", "strategy", "created_at"
+)
+STRATEGY_LIST_FIELDS = ("id", "user_id", "business_type", "location_name", "location_coords", "strategy", "created_at")
+
 def get_business_trends(location, radius=3000, user_id=None):
-    import requests
-    from collections import Counter
-    endpoint = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    all_types = []
-    business_relevant_types = {
-        "restaurant", "cafe", "bar", "store", "clothing_store", "shopping_mall", "grocery_or_supermarket",
-        "pharmacy", "bank", "atm", "beauty_salon", "hair_care", "car_repair", "gym", "spa", "electronics_store",
-        "furniture_store", "pet_store", "hardware_store", "book_store", "shoe_store", "bakery", "laundry",
-        "jewelry_store", "travel_agency", "insurance_agency", "real_estate_agency", "hospital", "doctor",
-        "dentist", "physiotherapist", "veterinary_care"
-    }
-    params = {
-        "location": location,
-        "radius": radius,
-        "type": "establishment",
-        "key": current_app.config['GOOGLE_MAPS_API_KEY']
-    }
-    while True:
-        response = requests.get(endpoint, params=params)
-        data = response.json()
-        for result in data.get("results", []):
-            types = result.get("types", [])
-            filtered = [t for t in types if t in business_relevant_types]
-            all_types.extend(filtered)
-        next_page_token = data.get("next_page_token")
-        if next_page_token:
-            import time
-            time.sleep(2)
-            params["pagetoken"] = next_page_token
-        else:
-            break
-    from collections import Counter
-    type_counts = Counter(all_types)
-    if not type_counts:
-        return {"error": "No relevant business data found in this location."}
-    most_common = type_counts.most_common(5)
-    least_common = sorted(type_counts.items(), key=lambda x: x[1])[:5]
-    result = {
-        "location": location,
-        "top_categories": most_common,
-        "untapped_categories": least_common
-    }
+    result = fetch_business_trends(location, radius)
+    if "error" in result:
+        return result
     if user_id:
         try:
             db = get_db()
@@ -63,7 +36,9 @@ def get_business_trends(location, radius=3000, user_id=None):
                     try:
                         import googlemaps
                         gmaps = googlemaps.Client(key=current_app.config['GOOGLE_MAPS_API_KEY'])
-                        reverse_geocode = gmaps.reverse_geocode((coords['lat'], coords['lng']))
+                        spend("reverse_geocoding")
+                        with timed("reverse_geocode"):
+                            reverse_geocode = gmaps.reverse_geocode((coords['lat'], coords['lng']))
                         location_name = reverse_geocode[0]['formatted_address'] if reverse_geocode else location
                     except Exception:
                         location_name = location
@@ -73,20 +48,31 @@ def get_business_trends(location, radius=3000, user_id=None):
                 location_name = location
             cursor.execute(
                 "INSERT OR REPLACE INTO analyzed_locations (user_id, location_coords, location_name, trend_data) VALUES (?, ?, ?, ?)",
-                (user_id, location, location_name, json.dumps(result))
+                (user_id, location, location_name, encode_json(result))
             )
             db.commit()
         except Exception as e:
             pass
     return result
 
+def customer_voice(details, limit=5):
+    """One prompt line per most-reviewed competitor with its TextRank review extracts."""
+    lines = []
+    ranked = sorted(details, key=lambda d: d.get("user_ratings_total") or 0, reverse=True)
+    for place in ranked:
+        summaries = place.get("summaries") or {}
+        liked, disliked = summaries.get("positive_extract"), summaries.get("negative_extract")
+        if not liked and not disliked:
+            continue
+        lines.append(f"- {place.get('name')} ({place.get('rating')}/5): liked: {liked or 'n/a'} | disliked: {disliked or 'n/a'}")
+        if len(lines) == limit:
+            break
+    return lines
+
 def call_groq_for_strategy(business_type, location_name, location_coords, trend_data, competitor_data, user_id=None):
     user_context = ""
     if user_id:
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT business_name FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
+        user = get_user(user_id)
         if user and user['business_name']:
             user_context = f"For the business '{user['business_name']}', "
     trend_summary = "No trend data available."
@@ -100,6 +86,9 @@ def call_groq_for_strategy(business_type, location_name, location_coords, trend_
         avg_rating = competitor_data.get("avg_rating", 0)
         avg_reviews = competitor_data.get("avg_reviews", 0)
         competitor_summary = f"There are {total} similar businesses with average rating of {avg_rating}/5 and {avg_reviews} reviews on average."
+        voices = customer_voice(competitor_data.get("details") or [])
+        if voices:
+            competitor_summary += "\nWhat customers say about the most-reviewed competitors:\n" + "\n".join(voices)
     prompt = f"""
     {user_context}I'm planning to open a {business_type} business in {location_name} (coordinates: {location_coords}).\n\nLocal market data:\n{trend_summary}\n\nCompetitor analysis:\n{competitor_summary}\n\nPlease provide:\n1. A business strategy recommendation (3 key points)\n2. Suggested unique selling proposition\n3. Target customer demographic\n4. One innovative location-specific marketing idea\n    """
     return call_groq_ai(prompt, system_message="You are a business strategy expert who provides concise, actionable advice.")
@@ -115,8 +104,8 @@ def generate_business_strategy(location_name, location_coords, business_type, us
     )
     db = get_db()
     cursor = db.cursor()
-    trend_data_json = json.dumps(trend_data) if trend_data else None
-    competitor_data_json = json.dumps(competitor_data) if competitor_data else None
+    trend_data_json = encode_json(trend_data) if trend_data else None
+    competitor_data_json = encode_json(competitor_data) if competitor_data else None
     cursor.execute('''
         INSERT INTO business_strategies 
         (user_id, business_type, location_name, location_coords, trend_data, competitor_data, strategy)
@@ -150,7 +139,9 @@ def strategy_generator_endpoint():
         try:
             import googlemaps
             gmaps = googlemaps.Client(key=current_app.config['GOOGLE_MAPS_API_KEY'])
-            reverse_geocode = gmaps.reverse_geocode((coords['lat'], coords['lng']))
+            spend("reverse_geocoding")
+            with timed("reverse_geocode"):
+                reverse_geocode = gmaps.reverse_geocode((coords['lat'], coords['lng']))
             location_name = reverse_geocode[0]['formatted_address'] if reverse_geocode else location
         except Exception:
             location_name = location
@@ -159,7 +150,7 @@ def strategy_generator_endpoint():
         cursor.execute("SELECT * FROM analyzed_locations WHERE user_id = ? AND location_coords = ?", (user_id, location_coords))
         existing_location = cursor.fetchone()
         if existing_location and existing_location['trend_data']:
-            trend_data = json.loads(existing_location['trend_data'])
+            trend_data = decode_json(existing_location['trend_data'])
         else:
             trend_data = get_business_trends(location_coords, user_id=user_id)
         competitors_df, error = get_nearby_places(location, keyword=business_type)
@@ -175,11 +166,9 @@ def strategy_generator_endpoint():
                 "avg_reviews": round(float(avg_reviews), 2) if avg_reviews else 0,
                 "details": dataframe_to_dict(competitors_df) if not competitors_df.empty else []
             }
-            cursor.execute(
-                "INSERT INTO competitor_insights (user_id, location, category, insight_data) VALUES (?, ?, ?, ?)",
-                (user_id, location, business_type, json.dumps(competitor_data))
-            )
-            db.commit()
+            attach_extracts(competitor_data["details"], wait=current_app.config['SUMMARY_PROMPT_WAIT'])
+            save_competitor_insight(db, user_id, location, business_type, competitor_data, competitor_data["details"])
+            invalidate("competitor_strategy", user_id)
         strategy_result = generate_business_strategy(
             location_name,
             location_coords,
@@ -198,35 +187,109 @@ def strategy_generator_endpoint():
             "competitors": competitor_data,
             "strategy": strategy_result
         }
-        return jsonify(format_json_response(response))
+        return jsonify(response)
+    except QuotaExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def parse_rings(value, max_rings):
+    """Comma-separated ring radii in metres, or (None, error)."""
+    try:
+        rings = sorted({float(r) for r in value.split(",") if r.strip()})
+    except ValueError:
+        return None, "rings must be a comma-separated list of radii in metres"
+    if not rings or len(rings) > max_rings:
+        return None, f"Between 1 and {max_rings} rings are supported"
+    if rings[0] <= 0 or rings[-1] > 50000:
+        return None, "Ring radii must be between 0 and 50000 metres"
+    return rings, None
+
+@strategy_bp.route('/trend-rings', methods=['GET'])
+@auth_required
+def trend_rings():
+    """
+    Business-type counts for several catchment radii (?rings=500,1000,3000) from a single
+    establishment sweep at the outer radius. Sweeps are stored with every place's position,
+    so later ring sets inside a fresh stored sweep are answered without calling Google.
+    """
+    location = request.args.get('location', '')
+    is_valid, error_msg = validate_location(location)
+    if not is_valid:
+        return jsonify({"error": error_msg}), 400
+    rings, error = parse_rings(request.args.get('rings', current_app.config['TREND_DEFAULT_RINGS']),
+                               current_app.config['TREND_MAX_RINGS'])
+    if error:
+        return jsonify({"error": error}), 400
+    coords, error = geocode_location(location)
+    if error:
+        return jsonify({"error": error}), 400
+    lat, lng, outer = coords['lat'], coords['lng'], rings[-1]
+    db = get_db()
+    sweep = covering_sweep(db, lat, lng, outer, current_app.config['TREND_SWEEP_MAX_AGE'])
+    record_cache("trend_sweeps", sweep is not None)
+    if sweep is not None:
+        places = sweep_places(db, sweep["id"])
+        source = {"id": sweep["id"], "lat": sweep["lat"], "lng": sweep["lng"], "radius": sweep["radius"],
+                  "swept_at": sweep["swept_at"], "stored": True}
+    else:
+        center = f"{lat},{lng}"
+        places, error, complete = sweep_establishments(center, outer)
+        if error:
+            return jsonify({"error": error}), 503
+        sweep_id = remember_sweep(center, outer, places) if complete else None
+        source = {"id": sweep_id, "lat": lat, "lng": lng, "radius": outer, "swept_at": None,
+                  "stored": False, "complete": complete}
+    source["place_count"] = len(places)
+    return jsonify({
+        "location": location,
+        "center": {"lat": lat, "lng": lng},
+        "sweep": source,
+        "rings": ring_counts(lat, lng, places, rings)
+    })
+
 @strategy_bp.route('/strategies', methods=['GET'])
 @auth_required
 def list_strategies():
     try:
         user_id = request.user_id
+        try:
+            # Trend and competitor blobs are only fetched and decoded when asked for via fields=
+            fields = parse_fields(request.args.get("fields"), STRATEGY_FIELDS, STRATEGY_LIST_FIELDS)
+            page = parse_page_args(request.args, current_app.config['PAGE_SIZE_DEFAULT'], current_app.config['PAGE_SIZE_MAX'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         db = get_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT * FROM business_strategies WHERE user_id = ? ORDER BY created_at DESC", (user_id,))
-        strategies = []
-        for row in cursor.fetchall():
-            strategy_dict = dict(row)
-            if strategy_dict.get('trend_data'):
-                strategy_dict['trend_data'] = json.loads(strategy_dict['trend_data'])
-            if strategy_dict.get('competitor_data'):
-                strategy_dict['competitor_data'] = json.loads(strategy_dict['competitor_data'])
-            strategies.append(strategy_dict)
-        return jsonify({
-            "total": len(strategies),
-            "strategies": strategies
-        })
+        strategies, next_cursor, total = keyset_page(
+            db.cursor(), "business_strategies", fields, user_id,
+            page["limit"], page["cursor"], page["include_total"]
+        )
+        for strategy_dict in strategies:
+            if "trend_data" in strategy_dict:
+                strategy_dict['trend_data'] = decode_json(strategy_dict['trend_data'])
+            if "competitor_data" in strategy_dict:
+                strategy_dict['competitor_data'] = decode_json(strategy_dict['competitor_data'])
+        response = {
+            "strategies": strategies,
+            "next_cursor": next_cursor
+        }
+        if total is not None:
+            response["total"] = total
+        return jsonify(response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def strategy_validator(user_id, strategy_id):
+    cursor = get_db().cursor()
+    cursor.execute("SELECT id, created_at FROM business_strategies WHERE id = ? AND user_id = ?", (strategy_id, user_id))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return (row['id'], row['created_at']), row['created_at']
+
 @strategy_bp.route('/strategies/<int:strategy_id>', methods=['GET'])
 @auth_required
+@conditional("strategy", strategy_validator, cache_control="private, max-age=3600")
 def get_strategy(strategy_id):
     try:
         user_id = request.user_id
@@ -237,10 +300,8 @@ def get_strategy(strategy_id):
         if not strategy:
             return jsonify({"error": "Strategy not found or unauthorized"}), 404
         strategy_dict = dict(strategy)
-        if strategy_dict.get('trend_data'):
-            strategy_dict['trend_data'] = json.loads(strategy_dict['trend_data'])
-        if strategy_dict.get('competitor_data'):
-            strategy_dict['competitor_data'] = json.loads(strategy_dict['competitor_data'])
+        strategy_dict['trend_data'] = decode_json(strategy_dict.get('trend_data'))
+        strategy_dict['competitor_data'] = decode_json(strategy_dict.get('competitor_data'))
         return jsonify(strategy_dict)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,125 @@
+import io
+import csv
+from .codec import decode_json, decode_json_text
+from .json_provider import dumps_bytes
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # Arrow export is unavailable without pyarrow
+    pa = None
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+# Every dataset is (SELECT over the user's rows, ordered by id; JSON blob columns; {column: arrow type name})
+EXPORT_DATASETS = {
+    "strategies": (
+        """
+        SELECT id, business_type, location_name, location_coords, trend_data, competitor_data, strategy, created_at
+        FROM business_strategies WHERE user_id = ? AND id > ? ORDER BY id
+        """,
+        ("trend_data", "competitor_data"),
+        {"id": "int64"}
+    ),
+    "competitor_insights": (
+        """
+        SELECT ci.id AS insight_id, ci.location, ci.category, ci.total, ci.avg_rating, ci.avg_reviews,
+               ci.created_at, p.place_id, p.name, p.lat, p.lng, p.rating, p.user_ratings_total,
+               p.vicinity, p.types, p.positive_summary, p.negative_summary, p.positive_highlight,
+               p.negative_highlight, p.positive_extract, p.negative_extract
+        FROM competitor_insights ci
+        LEFT JOIN insight_places ip ON ip.insight_id = ci.id
+        LEFT JOIN places p ON p.place_id = ip.place_id
+        WHERE ci.user_id = ? AND ci.id > ? ORDER BY ci.id
+        """,
+        ("types",),
+        {"insight_id": "int64", "total": "int64", "avg_rating": "float64", "avg_reviews": "float64",
+         "lat": "float64", "lng": "float64", "rating": "float64", "user_ratings_total": "int64"}
+    ),
+    "heatmaps": (
+        """
+        SELECT id, location, category, heatmap_data, created_at
+        FROM heatmap_data WHERE user_id = ? AND id > ? ORDER BY id
+        """,
+        ("heatmap_data",),
+        {"id": "int64"}
+    ),
+    "landmarks": (
+        """
+        SELECT id, business, location, landmark_data, recommendation, created_at
+        FROM landmark_data WHERE user_id = ? AND id > ? ORDER BY id
+        """,
+        ("landmark_data",),
+        {"id": "int64"}
+    ),
+}
+
+def iter_batches(db, sql, params, batch_size):
+    """Yield lists of at most `batch_size` rows; only one batch is ever held in memory."""
+    cursor = db.cursor()
+    cursor.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+def ndjson_chunks(columns, json_columns, batches):
+    for rows in batches:
+        yield b"".join(
+            dumps_bytes({c: decode_json(row[c]) if c in json_columns else row[c] for c in columns}) + b"\n"
+            for row in rows
+        )
+
+def csv_chunks(columns, json_columns, batches):
+    # JSON columns go out as their JSON text, so a BI tool can parse them when it needs to
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([decode_json_text(row[c]) if c in json_columns else row[c] for c in columns] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def arrow_chunks(columns, json_columns, types, batches):
+    """Arrow IPC stream: the schema message, then one record batch per fetched batch."""
+    schema = pa.schema([(c, getattr(pa, types.get(c, "string"))()) for c in columns])
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            arrays = []
+            for c in columns:
+                values = [decode_json_text(row[c]) if c in json_columns else row[c] for row in rows]
+                if types.get(c, "string") == "string":
+                    values = [None if v is None else str(v) for v in values]
+                arrays.append(pa.array(values, type=schema.field(c).type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # End-of-stream marker written on close
+    yield sink.getvalue()
+
+def export_stream(db, dataset, fmt, user_id, after_id=0, batch_size=500):
+    """Generator of encoded chunks for one dataset of one user's history, oldest first."""
+    sql, json_columns, types = EXPORT_DATASETS[dataset]
+    cursor = db.cursor()
+    cursor.execute(f"SELECT * FROM ({sql}) LIMIT 0", (user_id, after_id))
+    columns = [d[0] for d in cursor.description]
+    cursor.close()
+    batches = iter_batches(db, sql, (user_id, after_id), batch_size)
+    if fmt == "csv":
+        return csv_chunks(columns, json_columns, batches)
+    if fmt == "arrow":
+        return arrow_chunks(columns, json_columns, types, batches)
+    return ndjson_chunks(columns, json_columns, batches)
@@ -0,0 +1,99 @@
+import math
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+def to_local_xy(lat, lng, origin_lat, origin_lng):
+    """Equirectangular projection to metres around an origin; accurate to well under 1% within a few km."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    x = np.radians(lng - origin_lng) * EARTH_RADIUS_M * math.cos(math.radians(origin_lat))
+    y = np.radians(lat - origin_lat) * EARTH_RADIUS_M
+    return x, y
+
+def from_local_xy(x, y, origin_lat, origin_lng):
+    lat = origin_lat + np.degrees(np.asarray(y) / EARTH_RADIUS_M)
+    lng = origin_lng + np.degrees(np.asarray(x) / (EARTH_RADIUS_M * math.cos(math.radians(origin_lat))))
+    return lat, lng
+
+def candidate_grid(radius, step):
+    """Grid points (metres, relative to the centre) inside a circle of `radius`."""
+    axis = np.arange(-radius, radius + step, step, dtype=np.float64)
+    gx, gy = np.meshgrid(axis, axis)
+    inside = gx ** 2 + gy ** 2 <= radius ** 2
+    return gx[inside], gy[inside]
+
+def kernel_density(cx, cy, px, py, weights, bandwidth, chunk=4096):
+    """
+    Weighted Gaussian kernel sum of the points (px, py) evaluated at every candidate (cx, cy).
+    Candidates are processed in chunks so memory stays at chunk x points.
+    """
+    scores = np.zeros(len(cx), dtype=np.float64)
+    if len(px) == 0:
+        return scores
+    inv = -0.5 / (bandwidth ** 2)
+    for start in range(0, len(cx), chunk):
+        dx = cx[start:start + chunk, None] - px[None, :]
+        dy = cy[start:start + chunk, None] - py[None, :]
+        scores[start:start + chunk] = np.exp((dx * dx + dy * dy) * inv) @ weights
+    return scores
+
+def pick_top(cx, cy, scores, k, min_separation):
+    """Greedy top-k that skips candidates closer than min_separation to an already chosen one."""
+    chosen = []
+    for idx in np.argsort(-scores):
+        if len(chosen) >= k or scores[idx] <= 0:
+            break
+        if all((cx[idx] - cx[j]) ** 2 + (cy[idx] - cy[j]) ** 2 >= min_separation ** 2 for j in chosen):
+            chosen.append(idx)
+    return chosen
+
+def _points(places):
+    lat = [p["lat"] for p in places if p.get("lat") is not None and p.get("lng") is not None]
+    lng = [p["lng"] for p in places if p.get("lat") is not None and p.get("lng") is not None]
+    reviews = [p.get("user_ratings_total") or 0 for p in places if p.get("lat") is not None and p.get("lng") is not None]
+    return lat, lng, reviews
+
+def score_sites(center, landmarks, competitors, category_weights, radius, grid_step, bandwidth,
+                competitor_weight, top_k=3, min_separation=None):
+    """
+    Score a candidate grid around `center` by landmark footfall minus competitor pressure.
+
+    landmarks: {label: [place dicts with lat/lng/user_ratings_total]}; each landmark contributes
+    category_weight * (1 + log1p(reviews)) so busier landmarks pull harder.
+    competitors: place dicts with lat/lng, each contributing competitor_weight (negative).
+    Returns the top_k sites with their score and the landmark counts within one bandwidth.
+    """
+    lat0, lng0 = center["lat"], center["lng"]
+    cx, cy = candidate_grid(radius, grid_step)
+
+    lm_lat, lm_lng, lm_weight, lm_label = [], [], [], []
+    for label, places in landmarks.items():
+        lat, lng, reviews = _points(places)
+        weight = category_weights.get(label, 1.0)
+        lm_lat += lat
+        lm_lng += lng
+        lm_weight += [weight * (1.0 + math.log1p(r)) for r in reviews]
+        lm_label += [label] * len(lat)
+    lx, ly = to_local_xy(lm_lat, lm_lng, lat0, lng0)
+    scores = kernel_density(cx, cy, lx, ly, np.asarray(lm_weight, dtype=np.float64), bandwidth)
+
+    comp_lat, comp_lng, _ = _points(competitors or [])
+    kx, ky = to_local_xy(comp_lat, comp_lng, lat0, lng0)
+    scores += kernel_density(cx, cy, kx, ky, np.full(len(kx), competitor_weight, dtype=np.float64), bandwidth)
+
+    chosen = pick_top(cx, cy, scores, top_k, min_separation or 2 * bandwidth)
+    labels = np.asarray(lm_label)
+    sites = []
+    for idx in chosen:
+        site_lat, site_lng = from_local_xy(cx[idx], cy[idx], lat0, lng0)
+        near_lm = (lx - cx[idx]) ** 2 + (ly - cy[idx]) ** 2 <= bandwidth ** 2
+        near_comp = (kx - cx[idx]) ** 2 + (ky - cy[idx]) ** 2 <= bandwidth ** 2
+        sites.append({
+            "lat": round(float(site_lat), 6),
+            "lng": round(float(site_lng), 6),
+            "score": round(float(scores[idx]), 4),
+            "landmarks_nearby": {label: int(np.sum(near_lm & (labels == label))) for label in landmarks},
+            "competitors_nearby": int(np.sum(near_comp))
+        })
+    return sites
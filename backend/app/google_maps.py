@@ -1,32 +1,65 @@
+import logging
 import googlemaps
+import requests
 import pandas as pd
 from flask import current_app
 import time
 from textblob import TextBlob
-from sumy.summarizers.text_rank import TextRankSummarizer
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from textblob import TextBlob
 from collections import Counter
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed, CancelledError
+from .metrics import timed, record_cache
+from .cache import shared_cache
+from .singleflight import coalesce
+from .quota import spend, QuotaExceeded, carry_attribution
+from .database import get_db
+from .textrank import summary_pool, cached_extracts
+from .trend_rings import record_sweep
+from .spatial import search_category, covering_search, places_within, record_search, local_row_to_place, SEARCH_PAGE_SIZE
+from .config import Config
+
+# Upstream results shared by request handlers and the warm-up scheduler
+_geocode_cache = shared_cache("geocode", Config.GEOCODE_CACHE_TTL, maxsize=4096)
+_nearby_cache = shared_cache("places_nearby", Config.NEARBY_CACHE_TTL)
+_details_cache = shared_cache("place_details", Config.DETAILS_CACHE_TTL, maxsize=4096)
+_trends_cache = shared_cache("business_trends", Config.TRENDS_CACHE_TTL)
 
 def get_gmaps_client():
     return googlemaps.Client(key=current_app.config['GOOGLE_MAPS_API_KEY'])
 
-def geocode_location(location):
-    gmaps = get_gmaps_client()
+def parse_coords(location):
+    """{"lat", "lng"} for a literal 'lat,lng' string, otherwise None."""
     if "," in location:
         try:
             lat, lng = location.split(",")
-            return {"lat": float(lat.strip()), "lng": float(lng.strip())}, None
+            return {"lat": float(lat.strip()), "lng": float(lng.strip())}
         except ValueError:
             pass
+    return None
+
+def geocode_key(location):
+    return " ".join(location.lower().split())
+
+def geocode_location(location):
+    coords = parse_coords(location)
+    if coords:
+        return coords, None
+    key = geocode_key(location)
+    cached = _geocode_cache.get(key)
+    if cached is not None:
+        return dict(cached), None
     try:
-        geocode_result = gmaps.geocode(location)
+        gmaps = get_gmaps_client()
+        spend("geocoding")
+        with timed("geocode"):
+            geocode_result = gmaps.geocode(location)
         if not geocode_result:
             return None, "Location not found"
         location_coords = geocode_result[0]['geometry']['location']
+        _geocode_cache.set(key, dict(location_coords))
         return location_coords, None
+    except QuotaExceeded:
+        raise
     except Exception as e:
         return None, f"Geocoding error: {str(e)}"
         
@@ -90,17 +123,30 @@ def summarize_for_llm(reviews, sentiment_type="positive"):
 
     return compact_summary.strip(), highlight.strip()
 
-def get_place_reviews(place_id):
+def with_extracts(place_id, details):
+    top_reviews, least_reviews, summaries = details
+    extracts = cached_extracts(place_id)
+    return top_reviews, least_reviews, ({**summaries, **extracts} if extracts else summaries)
+
+def get_place_reviews(place_id, use_cache=True):
     """
     Fetch up to 5 'good' and 'bad' reviews, analyze sentiment, and create summaries + highlights.
+    Successful results are cached per place_id; use_cache=False forces a fresh Details call.
     """
+    if use_cache:
+        cached = _details_cache.get(place_id)
+        if cached is not None:
+            return with_extracts(place_id, cached)
     gmaps = get_gmaps_client()
     try:
-        details = gmaps.place(place_id=place_id, fields=["reviews", "name"])
+        spend("place_details")
+        with timed("place"):
+            details = gmaps.place(place_id=place_id, fields=["reviews", "name"])
         result = details.get("result", {})
         reviews = result.get("reviews", [])
 
         if not reviews:
+            _details_cache.set(place_id, ([], [], {}))
             return [], [], {}
 
         analyzed_reviews = []
@@ -118,6 +164,7 @@ def get_place_reviews(place_id):
             })
 
         if not analyzed_reviews:
+            _details_cache.set(place_id, ([], [], {}))
             return [], [], {}
 
         sorted_positive = sorted(analyzed_reviews, key=lambda r: r["sentiment"], reverse=True)
@@ -136,57 +183,305 @@ def get_place_reviews(place_id):
             "negative_highlight": neg_highlight
         }
 
-        return top_reviews, least_reviews, summaries
+        _details_cache.set(place_id, (top_reviews, least_reviews, summaries))
+        # TextRank extracts are computed in the background and merged in once ready
+        summary_pool.submit(place_id, analyzed_reviews, current_app.config['DATABASE_PATH'])
+        return with_extracts(place_id, (top_reviews, least_reviews, summaries))
 
+    except QuotaExceeded:
+        raise
     except Exception as e:
         import logging
         logging.error(f"Error fetching reviews for {place_id}: {e}")
         return [], [], {}
 
-def get_nearby_places(location, place_type=None, keyword=None, radius=None):
-    gmaps = get_gmaps_client()
-    coords, error = geocode_location(location)
-    if error:
-        return None, error
+# Attributes available from a single nearby search, and the ones that need a Place Details call
+BASE_PLACE_FIELDS = ('name', 'place_id', 'lat', 'lng', 'rating', 'user_ratings_total', 'vicinity', 'types')
+REVIEW_PLACE_FIELDS = ('top_reviews', 'least_reviews', 'summaries')
+PLACE_FIELDS = BASE_PLACE_FIELDS + REVIEW_PLACE_FIELDS
+
+def base_place(place):
+    return {
+        'name': place.get('name'),
+        'place_id': place.get('place_id'),
+        'lat': place['geometry']['location']['lat'],
+        'lng': place['geometry']['location']['lng'],
+        'rating': place.get('rating', 0),
+        'user_ratings_total': place.get('user_ratings_total', 0),
+        'vicinity': place.get('vicinity'),
+        'types': place.get('types', [])
+    }
 
-    try:
+def enrich_place(row, use_cache=True):
+    """Add reviews, sentiment and summaries (one Place Details call) to a base_place dict."""
+    top_reviews, least_reviews, summaries = get_place_reviews(row['place_id'], use_cache)
+    row.update({
+        'top_reviews': top_reviews,
+        'least_reviews': least_reviews,
+        'summaries': summaries
+    })
+    return row
+
+def nearby_key(coords, place_type=None, keyword=None, radius=None):
+    radius = radius or current_app.config.get('MAPS_RADIUS', 2000)
+    return (round(coords['lat'], 5), round(coords['lng'], 5), place_type, keyword, radius)
+
+def nearby_search(coords, place_type=None, keyword=None, radius=None, use_cache=True):
+    """Raw nearby search results around already geocoded coords (one API call, cached)."""
+    key = nearby_key(coords, place_type, keyword, radius)
+    results = _nearby_cache.get(key) if use_cache else None
+    if results is not None:
+        return results
+    gmaps = get_gmaps_client()
+    spend("nearby_search")
+    with timed("places_nearby"):
         places_result = gmaps.places_nearby(
             location=(coords['lat'], coords['lng']),
-            radius=radius or current_app.config.get('MAPS_RADIUS', 2000),
+            radius=key[4],
             type=place_type,
             keyword=keyword
         )
+    results = places_result.get('results', [])
+    _nearby_cache.set(key, results)
+    return results
 
-        places = []
-        for place in places_result.get('results', []):
-            place_id = place.get('place_id')
-            top_reviews, least_reviews, summaries = get_place_reviews(place_id)
-            # print("Good reviews summary:", summaries["positive_summary"],"\n",summaries["positive_highlight"])
-            # print("Bad reviews summary:", summaries["negative_summary"],"\n",summaries["negative_highlight"])
-            places.append({
-                'name': place.get('name'),
-                'place_id': place_id,
-                'lat': place['geometry']['location']['lat'],
-                'lng': place['geometry']['location']['lng'],
-                'rating': place.get('rating', 0),
-                'user_ratings_total': place.get('user_ratings_total', 0),
-                'vicinity': place.get('vicinity'),
-                'types': place.get('types', []),
-                'top_reviews': top_reviews,
-                'least_reviews': least_reviews,
-                'summaries': summaries
-            })
-            # Sleep to avoid hitting rate limits
-            time.sleep(0.2)
+def local_nearby(coords, category, radius):
+    """
+    Places for a nearby search answered from the local R*Tree index, or None when no fresh
+    stored search covers this circle and category (LOCAL_PLACES_MAX_AGE = 0 disables it).
+    """
+    max_age = current_app.config.get('LOCAL_PLACES_MAX_AGE')
+    if not max_age:
+        return None
+    try:
+        db = get_db()
+        search = covering_search(db, category, coords['lat'], coords['lng'], radius, max_age,
+                                 current_app.config.get('LOCAL_SEARCH_TOLERANCE', 0.1))
+        record_cache("local_places", search is not None)
+        if search is None:
+            return None
+        rows = places_within(db, coords['lat'], coords['lng'], radius, category, max_age, SEARCH_PAGE_SIZE)
+        return [local_row_to_place(row) for _, row in rows]
+    except Exception as e:
+        logging.getLogger("market_research_api").warning(f"Local places lookup failed: {e}")
+        return None
 
-        return pd.DataFrame(places) if places else pd.DataFrame(), None
+def remember_search(coords, category, radius, places):
+    try:
+        record_search(get_db(), category, coords['lat'], coords['lng'], radius, places)
+    except Exception as e:
+        logging.getLogger("market_research_api").warning(f"Could not index nearby search: {e}")
 
+def search_rows(location, place_type=None, keyword=None, radius=None):
+    """Base places (no Details) for one nearby search, served locally when a stored search covers it."""
+    coords, error = geocode_location(location)
+    if error:
+        return None, error
+    category = search_category(place_type, keyword)
+    radius = radius or current_app.config.get('MAPS_RADIUS', 2000)
+    rows = local_nearby(coords, category, radius)
+    if rows is None:
+        rows = [base_place(place) for place in nearby_search(coords, place_type, keyword, radius)]
+        remember_search(coords, category, radius, rows)
+    return rows, None
+
+def check_fields(fields):
+    """(fields tuple, needs_details, error) for a requested field list."""
+    fields = tuple(fields) if fields else PLACE_FIELDS
+    unknown = [f for f in fields if f not in PLACE_FIELDS]
+    if unknown:
+        return None, False, f"Unknown place fields: {', '.join(unknown)}"
+    return fields, any(f in REVIEW_PLACE_FIELDS for f in fields), None
+
+def cached_enrichment(row):
+    # Out of quota: keep whatever reviews are already cached and skip the rest
+    top_reviews, least_reviews, summaries = _details_cache.get(row['place_id']) or ([], [], {})
+    row.update({'top_reviews': top_reviews, 'least_reviews': least_reviews, 'summaries': summaries})
+    return row
+
+@coalesce("get_nearby_places")
+def get_nearby_places(location, place_type=None, keyword=None, radius=None, fields=None):
+    """
+    Nearby places as a DataFrame with the requested `fields` (default: all of PLACE_FIELDS).
+    Place Details, reviews and sentiment are only fetched when a field in REVIEW_PLACE_FIELDS
+    is requested, so coordinate-only callers cost a single nearby search. QuotaExceeded from the
+    geocode or search propagates; running out during Details falls back to cached enrichment.
+    """
+    fields, needs_details, error = check_fields(fields)
+    if error:
+        return None, error
+    try:
+        rows, error = search_rows(location, place_type, keyword, radius)
+        if error:
+            return None, error
+        places = []
+        degraded = None
+        for row in rows:
+            if needs_details and degraded is None:
+                try:
+                    enrich_place(row)
+                except QuotaExceeded as e:
+                    degraded = str(e)
+            if needs_details and degraded is not None:
+                cached_enrichment(row)
+            places.append({f: row[f] for f in fields})
+
+        df = pd.DataFrame(places, columns=list(fields))
+        if degraded:
+            df.attrs['degraded'] = degraded
+        return df, None
+
+    except QuotaExceeded:
+        raise
     except Exception as e:
         return None, f"Google Places API error: {str(e)}"
 
+def iter_enriched_places(app, rows, fields, needs_details, stats, workers=8):
+    """
+    Yield each row restricted to `fields` as soon as its Place Details enrichment finishes,
+    running the Details calls on a thread pool. `stats` is filled in as rows complete; after a
+    QuotaExceeded the rows still pending fall back to cached details and stats["degraded"] is set.
+    """
+    if not needs_details:
+        for row in rows:
+            stats["places"] += 1
+            yield {f: row[f] for f in fields}
+        return
+
+    def enrich(row):
+        with app.app_context():
+            return enrich_place(row)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(rows)))) as pool:
+        futures = {pool.submit(carry_attribution(enrich), row): row for row in rows}
+        try:
+            for future in as_completed(futures):
+                row = futures[future]
+                try:
+                    future.result()
+                    stats["enriched"] += 1
+                except QuotaExceeded as e:
+                    stats["degraded"] = str(e)
+                    for pending in futures:
+                        pending.cancel()
+                    cached_enrichment(row)
+                except CancelledError:
+                    cached_enrichment(row)
+                except Exception as e:
+                    logging.getLogger("market_research_api").error(f"Enriching {row['place_id']} failed: {e}")
+                    cached_enrichment(row)
+                stats["places"] += 1
+                yield {f: row[f] for f in fields}
+        finally:
+            # A client that disconnects mid-stream should not keep paying for Details calls
+            for pending in futures:
+                pending.cancel()
+
+NEARBY_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+PAGE_TOKEN_DELAY = 0.5
+PAGE_TOKEN_RETRIES = 8
+BUSINESS_RELEVANT_TYPES = {
+    "restaurant", "cafe", "bar", "store", "clothing_store", "shopping_mall", "grocery_or_supermarket",
+    "pharmacy", "bank", "atm", "beauty_salon", "hair_care", "car_repair", "gym", "spa", "electronics_store",
+    "furniture_store", "pet_store", "hardware_store", "book_store", "shoe_store", "bakery", "laundry",
+    "jewelry_store", "travel_agency", "insurance_agency", "real_estate_agency", "hospital", "doctor",
+    "dentist", "physiotherapist", "veterinary_care"
+}
+
+@coalesce("sweep_establishments")
+def sweep_establishments(location, radius):
+    """
+    Every establishment a paginated nearby search returns around `location` ("lat,lng"), as
+    {"place_id", "lat", "lng", "types"} with only BUSINESS_RELEVANT_TYPES kept. Returns
+    (places, error, complete); hitting the quota after the first page keeps the pages already
+    fetched with complete=False.
+    """
+    places = []
+    complete = True
+    params = {
+        "location": location,
+        "radius": radius,
+        "type": "establishment",
+        "key": current_app.config['GOOGLE_MAPS_API_KEY']
+    }
+    page_retries = 0
+    while True:
+        # Retries of a not-yet-valid page token return no results, so only a page's first attempt is charged
+        if not page_retries:
+            try:
+                spend("nearby_search")
+            except QuotaExceeded as e:
+                if not places:
+                    return None, str(e), False
+                complete = False
+                break
+        with timed("nearbysearch"):
+            response = requests.get(NEARBY_SEARCH_URL, params=params)
+        data = response.json()
+        if data.get("status") == "INVALID_REQUEST" and "pagetoken" in params and page_retries < PAGE_TOKEN_RETRIES:
+            # A fresh next_page_token only becomes valid after a short delay
+            page_retries += 1
+            time.sleep(PAGE_TOKEN_DELAY)
+            continue
+        for result in data.get("results", []):
+            position = result.get("geometry", {}).get("location")
+            if not position:
+                continue
+            places.append({
+                "place_id": result.get("place_id"),
+                "lat": position["lat"],
+                "lng": position["lng"],
+                "types": [t for t in result.get("types", []) if t in BUSINESS_RELEVANT_TYPES]
+            })
+        next_page_token = data.get("next_page_token")
+        if not next_page_token:
+            break
+        params["pagetoken"] = next_page_token
+        page_retries = 0
+    return places, None, complete
+
+def remember_sweep(location, radius, places):
+    coords = parse_coords(location)
+    if coords is None:
+        return None
+    try:
+        return record_sweep(get_db(), coords['lat'], coords['lng'], radius, places)
+    except Exception as e:
+        logging.getLogger("market_research_api").warning(f"Could not store trend sweep: {e}")
+        return None
+
+@coalesce("fetch_business_trends")
+def fetch_business_trends(location, radius=3000):
+    """
+    Most and least common business types around `location` ("lat,lng"), following every
+    result page. Cached per (location, radius); "no data" results are not cached. Place
+    positions are stored so /trend-rings can re-bucket the sweep without calling Google.
+    """
+    key = (location, radius)
+    cached = _trends_cache.get(key)
+    if cached is not None:
+        return cached
+    places, error, complete = sweep_establishments(location, radius)
+    if error:
+        return {"error": error}
+    if complete:
+        # Partial trends from the pages already fetched are still useful, but not worth storing
+        remember_sweep(location, radius, places)
+    type_counts = Counter(t for place in places for t in place["types"])
+    if not type_counts:
+        return {"error": "No relevant business data found in this location."}
+    result = {
+        "location": location,
+        "top_categories": type_counts.most_common(5),
+        "untapped_categories": sorted(type_counts.items(), key=lambda x: x[1])[:5]
+    }
+    _trends_cache.set(key, result)
+    return result
+
 import math
 from geopy.distance import geodesic
 
+@coalesce("suggest_low_density_zones")
 def suggest_low_density_zones(location, store_type, radius=5000, grid_step=1000):
     """
     Suggests up to 5 coordinates (circles) near a location where a given store type is less present.
@@ -218,18 +513,22 @@ def suggest_low_density_zones(location, store_type, radius=5000, grid_step=1000)
     density_map = []
     for (lat_s, lng_s) in sample_points:
         try:
-            places_result = gmaps.places_nearby(
-                location=(lat_s, lng_s),
-                radius=800,  # check density around point
-                type=store_type
-            )
+            spend("nearby_search")
+            with timed("places_nearby"):
+                places_result = gmaps.places_nearby(
+                    location=(lat_s, lng_s),
+                    radius=800,  # check density around point
+                    type=store_type
+                )
             count = len(places_result.get("results", []))
             density_map.append({
                 "lat": lat_s,
                 "lng": lng_s,
                 "count": count
             })
-            time.sleep(0.2)
+        except QuotaExceeded:
+            # Rank the points sampled so far rather than failing the whole request
+            break
         except Exception:
             continue
 
@@ -240,7 +539,9 @@ def suggest_low_density_zones(location, store_type, radius=5000, grid_step=1000)
     suggestions = []
     for zone in low_density:
         try:
-            rev = gmaps.reverse_geocode((zone["lat"], zone["lng"]))
+            spend("reverse_geocoding")
+            with timed("reverse_geocode"):
+                rev = gmaps.reverse_geocode((zone["lat"], zone["lng"]))
             zone_name = rev[0]["formatted_address"] if rev else "Unknown area"
         except Exception:
             zone_name = "Unknown area"
@@ -1,29 +1,56 @@
+import hashlib
 import requests
 from flask import current_app
+from .cache import shared_cache
+from .config import Config
+from .metrics import timed
 
-def call_groq_ai(prompt, system_message="You are a helpful business advisor."):
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
+# Completions keyed by a digest of (model, system message, prompt); errors are never cached
+_completion_cache = shared_cache("groq_completions", Config.LLM_CACHE_TTL, maxsize=2048)
+
+def completion_key(prompt, system_message):
+    return hashlib.sha256(f"{GROQ_MODEL}\0{system_message}\0{prompt}".encode("utf-8")).hexdigest()
+
+class GroqError(Exception):
+    """A failed completion; the message is the text call_groq_ai returns by default."""
+
+def call_groq_ai(prompt, system_message="You are a helpful business advisor.", raise_errors=False):
+    """
+    Return the completion text. Failures come back as an error message in place of the
+    completion, or raise GroqError with raise_errors so callers can answer with an error status.
+    """
+    key = completion_key(prompt, system_message)
+    cached = _completion_cache.get(key)
+    if cached is not None:
+        return cached
     headers = {
         "Authorization": f"Bearer {current_app.config['GROQ_API_KEY']}",
         "Content-Type": "application/json"
     }
     data = {
-        "model": "llama-3.3-70b-versatile",
+        "model": GROQ_MODEL,
         "messages": [
             {"role": "system", "content": system_message},
             {"role": "user", "content": prompt}
         ]
     }
     try:
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
+        with timed("groq_chat"):
+            response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
         response.raise_for_status()
         result = response.json()
         if 'choices' in result and result['choices']:
-            return result['choices'][0]['message']['content']
+            content = result['choices'][0]['message']['content']
+            _completion_cache.set(key, content)
+            return content
         else:
-            return f"Groq API Error: Unexpected response format\n{result}"
+            error = f"Groq API Error: Unexpected response format\n{result}"
     except requests.exceptions.RequestException as e:
-        return f"HTTP error from Groq API: {e}"
+        error = f"HTTP error from Groq API: {e}"
     except Exception as e:
-        return f"Unexpected error: {e}"
-
-
+        error = f"Unexpected error: {e}"
+    if raise_errors:
+        raise GroqError(error)
+    return error
@@ -0,0 +1,66 @@
+import math
+import numpy as np
+
+TILE_SIZE = 256
+MAX_LAT = 85.05112878
+WEIGHT_MODES = ("none", "rating", "reviews")
+
+def project(lat, lng, zoom):
+    """Web Mercator world pixel coordinates at `zoom` (same scheme as Google/OSM tiles)."""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_LAT, MAX_LAT)
+    lng = np.asarray(lng, dtype=np.float64)
+    scale = TILE_SIZE * (2 ** zoom)
+    px = (lng + 180.0) / 360.0 * scale
+    sin_lat = np.sin(np.radians(lat))
+    py = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return px, py
+
+def unproject(px, py, zoom):
+    scale = TILE_SIZE * (2 ** zoom)
+    lng = np.asarray(px) / scale * 360.0 - 180.0
+    n = math.pi - 2 * math.pi * np.asarray(py) / scale
+    lat = np.degrees(np.arctan(np.sinh(n)))
+    return lat, lng
+
+def point_weights(points, mode):
+    if mode == "rating":
+        return np.asarray([p.get("rating") or 0 for p in points], dtype=np.float64)
+    if mode == "reviews":
+        return np.log1p(np.asarray([p.get("user_ratings_total") or 0 for p in points], dtype=np.float64))
+    return np.ones(len(points), dtype=np.float64)
+
+def _bin(px, py, weights, origin_x, origin_y, extent, cell_px, zoom):
+    """Sum weights into cell_px-sized cells of the square [origin, origin + extent)."""
+    inside = (px >= origin_x) & (px < origin_x + extent) & (py >= origin_y) & (py < origin_y + extent)
+    if not inside.any():
+        return []
+    cells_per_side = int(math.ceil(extent / cell_px))
+    col = ((px[inside] - origin_x) // cell_px).astype(np.int64)
+    row = ((py[inside] - origin_y) // cell_px).astype(np.int64)
+    occupied, inverse = np.unique(row * cells_per_side + col, return_inverse=True)
+    total = np.bincount(inverse, weights=weights[inside])
+    count = np.bincount(inverse)
+    centre_x = origin_x + (occupied % cells_per_side + 0.5) * cell_px
+    centre_y = origin_y + (occupied // cells_per_side + 0.5) * cell_px
+    lat, lng = unproject(centre_x, centre_y, zoom)
+    return [
+        {"lat": round(float(a), 6), "lng": round(float(b), 6), "weight": round(float(w), 4), "count": int(c)}
+        for a, b, w, c in zip(lat, lng, total, count)
+    ]
+
+def aggregate_tile(points, zoom, x, y, cell_px=32, weight="none"):
+    """Weighted grid cells for one z/x/y tile. Payload size is bounded by (256 / cell_px)^2 cells."""
+    if not points:
+        return []
+    px, py = project([p["lat"] for p in points], [p["lng"] for p in points], zoom)
+    return _bin(px, py, point_weights(points, weight), x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, cell_px, zoom)
+
+def aggregate_grid(points, zoom, cell_px=32, weight="none"):
+    """Weighted grid cells covering every point at `zoom` (the whole-area version of aggregate_tile)."""
+    if not points:
+        return []
+    px, py = project([p["lat"] for p in points], [p["lng"] for p in points], zoom)
+    origin_x = math.floor(px.min() / cell_px) * cell_px
+    origin_y = math.floor(py.min() / cell_px) * cell_px
+    extent = max(px.max() - origin_x, py.max() - origin_y) + cell_px
+    return _bin(px, py, point_weights(points, weight), origin_x, origin_y, extent, cell_px, zoom)
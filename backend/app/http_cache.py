@@ -0,0 +1,81 @@
+import time
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, current_app
+from .cache import TTLCache, SQLiteCache
+from .config import Config
+
+# Validators computed for (resource, user, generation, arguments). A hit lets a conditional
+# request be answered with 304 before the view or its validator query touches the database.
+_validators = TTLCache("http_validators", ttl=Config.HTTP_VALIDATOR_TTL, maxsize=4096)
+# Generations live in SQLite so a write in one worker invalidates every worker's validators.
+# They must outlive any validator cached under them, and are never reused once expired.
+_generations = SQLiteCache(
+    "http_generations", Config.SHARED_CACHE_PATH or Config.QUOTA_PATH,
+    ttl=max(Config.HTTP_VALIDATOR_TTL * 10, 3600), maxsize=100000
+)
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+
+def parse_timestamp(value):
+    """SQLite CURRENT_TIMESTAMP values are UTC 'YYYY-MM-DD HH:MM:SS' strings."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def invalidate(resource, user_id):
+    """Drop cached validators for a user's resource after a write, in every worker."""
+    _generations.set((resource, user_id), time.time_ns())
+
+def _generation(resource, user_id):
+    return _generations.get((resource, user_id), 0)
+
+def not_modified(etag, last_modified):
+    if request.if_none_match:
+        # If-None-Match uses weak comparison, so W/"x" and "x" both match
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+def conditional(resource, validator, cache_control="private, no-cache"):
+    """
+    Add ETag/Last-Modified/Cache-Control to a view and answer 304 when the client copy is current.
+
+    `validator(user_id, **view_kwargs)` runs a cheap query and returns (etag_parts, last_modified_value),
+    or None when the resource does not exist (the view then runs and reports the error itself).
+    Must be applied below @auth_required so request.user_id is set.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            user_id = request.user_id
+            key = (resource, user_id, _generation(resource, user_id), tuple(sorted(kwargs.items())), request.query_string)
+            validated = _validators.get(key)
+            if validated is None:
+                parts = validator(user_id, **kwargs)
+                if parts is None:
+                    return func(*args, **kwargs)
+                etag_parts, last_modified = parts
+                validated = (make_etag(resource, user_id, request.query_string, *etag_parts), parse_timestamp(last_modified))
+                _validators.set(key, validated)
+            etag, last_modified = validated
+            if not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(func(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Weak: the same representation is sent identity, gzip or br encoded
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = cache_control
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,60 @@
+import json
+import time
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from flask import g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional speedup, the stdlib encoder is used otherwise
+    orjson = None
+
+def json_default(obj):
+    """Convert the numpy/pandas/datetime values our DataFrames produce into plain JSON types."""
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "to_python"):
+        return obj.to_python()
+    return str(obj)
+
+def dumps_bytes(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Single pass JSON provider: numpy/pandas scalars and datetimes are handled by json_default,
+    so view code can hand DataFrame records straight to jsonify.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault("default", json_default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        started = time.thread_time()
+        body = dumps_bytes(obj)
+        if has_request_context():
+            g.serialize_seconds = getattr(g, "serialize_seconds", 0.0) + (time.thread_time() - started)
+        return self._app.response_class(body, mimetype="application/json")
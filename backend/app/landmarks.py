@@ -0,0 +1,66 @@
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from .config import Config
+from .metrics import timed
+from .quota import spend, carry_attribution
+
+NEARBY_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+
+# Pooled keep-alive connections shared by every sweep in this process
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=Config.LANDMARK_POOL_SIZE))
+
+def search_nearby(location, place_type, api_key, radius=None, timeout=None):
+    params = {
+        "location": location,
+        "radius": radius or Config.LANDMARK_RADIUS,
+        "type": place_type,
+        "key": api_key
+    }
+    spend("nearby_search")
+    with timed("nearbysearch"):
+        response = _session.get(NEARBY_SEARCH_URL, params=params, timeout=timeout or Config.LANDMARK_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    status = data.get("status", "OK")
+    if status not in ("OK", "ZERO_RESULTS"):
+        raise RuntimeError(f"Places API status {status}: {data.get('error_message', '')}".strip())
+    return data.get("results", [])
+
+def parse_categories(raw):
+    """
+    Accept either {label: place_type} or a list of place types (label = type).
+    Falls back to Config.LANDMARK_CATEGORIES.
+    """
+    if not raw:
+        return dict(Config.LANDMARK_CATEGORIES)
+    if isinstance(raw, dict):
+        return {str(label): str(place_type) for label, place_type in raw.items()}
+    if isinstance(raw, (list, tuple)):
+        return {str(place_type): str(place_type) for place_type in raw}
+    raise ValueError("categories must be a list of place types or a {label: type} object")
+
+def sweep_landmarks(location, categories, api_key, radius=None, timeout=None):
+    """
+    Run one nearby search per landmark category concurrently.
+    Returns (results, errors): {label: [places]} for the categories that succeeded
+    and {label: message} for the ones that failed, so one bad category never loses the rest.
+    """
+    results, errors = {}, {}
+    if not categories:
+        return results, errors
+    workers = min(len(categories), Config.LANDMARK_POOL_SIZE)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            label: pool.submit(carry_attribution(search_nearby), location, place_type, api_key, radius, timeout)
+            for label, place_type in categories.items()
+        }
+        for label, future in futures.items():
+            try:
+                results[label] = future.result()
+            except Exception as e:
+                logging.getLogger("market_research_api").warning(f"Landmark search for {label} failed: {e}")
+                errors[label] = str(e)
+    return results, errors
@@ -0,0 +1,256 @@
+import os
+import json
+import glob
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from .config import Config
+
+try:
+    import fcntl
+except ImportError:  # no other process to coordinate with on platforms without fcntl
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    "http_requests_total": ("counter", "Flask requests by endpoint, method and status"),
+    "http_request_duration_seconds": ("histogram", "Flask request latency by endpoint"),
+    "http_response_bytes_total": ("counter", "Response bytes sent by endpoint and content encoding"),
+    "upstream_request_duration_seconds": ("histogram", "Latency of upstream API calls by call type"),
+    "upstream_errors_total": ("counter", "Upstream API calls that raised, by call type"),
+    "cache_requests_total": ("counter", "Cache lookups by cache name and result (hit/miss)"),
+    "sqlite_query_duration_seconds": ("histogram", "SQLite statement latency by statement type"),
+}
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+class Registry:
+    """
+    Process-local counters and histograms. When METRICS_DIR is set every process also
+    dumps a snapshot there so /metrics can sum the values of all workers.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(h[0]), h[1], h[2]] for (name, labels), h in self._histograms.items()]
+            }
+
+registry = Registry()
+
+def inc(name, labels=None, value=1):
+    registry.inc(name, labels, value)
+
+def observe(name, value, labels=None):
+    registry.observe(name, value, labels)
+
+def record_cache(cache_name, hit):
+    registry.inc("cache_requests_total", {"cache": cache_name, "result": "hit" if hit else "miss"})
+
+@contextmanager
+def timed(call_type, metric="upstream_request_duration_seconds"):
+    """Time an upstream call: `with timed("geocode"): gmaps.geocode(...)`."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registry.inc("upstream_errors_total", {"call": call_type})
+        raise
+    finally:
+        registry.observe(metric, time.perf_counter() - started, {"call": call_type})
+
+def merge_snapshots(snapshots):
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap.get("counters", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snap.get("histograms", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def render(counters, histograms, buckets=DEFAULT_BUCKETS):
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    for name in names:
+        kind, help_text = METRIC_HELP.get(name, ("counter" if any(n == name for n, _ in counters) else "histogram", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (metric, labels), (bucket_counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+def snapshot_from(counters, histograms):
+    """Inverse of merge_snapshots: merged values back in the snapshot file format."""
+    return {
+        "counters": [[name, [list(pair) for pair in labels], value] for (name, labels), value in counters.items()],
+        "histograms": [[name, [list(pair) for pair in labels], h[0], h[1], h[2]] for (name, labels), h in histograms.items()]
+    }
+
+@contextmanager
+def _snapshot_lock(directory, exclusive):
+    """Readers share the lock; retiring a worker takes it exclusively so no reader sees it twice."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "metrics.lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+def read_snapshots(directory):
+    snapshots = []
+    with _snapshot_lock(directory, exclusive=False):
+        for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return snapshots
+
+def retire_snapshot(directory, pid):
+    """
+    Fold an exited worker's snapshot into METRICS_DIR/metrics_retired.json and remove it, so
+    its counts stay in /metrics exactly once and a new worker reusing the pid starts from zero.
+    Called from the gunicorn master, which reaps one worker at a time.
+    """
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    if not os.path.exists(path):
+        return
+    retired_path = os.path.join(directory, "metrics_retired.json")
+    with _snapshot_lock(directory, exclusive=True):
+        snapshots = []
+        for source in (retired_path, path):
+            try:
+                with open(source) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        tmp = retired_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot_from(*merge_snapshots(snapshots)), f)
+        os.replace(tmp, retired_path)
+        os.remove(path)
+
+class SnapshotWriter:
+    """Periodically dumps this process's registry to METRICS_DIR/metrics_<pid>.json."""
+
+    def __init__(self, directory, interval):
+        self.directory = directory
+        self.interval = interval
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def path(self):
+        return os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+
+    def flush(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(tmp, self.path())
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="metrics-snapshot", daemon=True).start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+_snapshot_writer = SnapshotWriter(Config.METRICS_DIR, Config.METRICS_FLUSH_SECONDS) if Config.METRICS_DIR else None
+
+def ensure_exporting():
+    if _snapshot_writer:
+        _snapshot_writer.ensure_started()
+
+def collect():
+    """Render metrics for this process, or for every worker when METRICS_DIR is shared."""
+    if not _snapshot_writer:
+        return render(*merge_snapshots([registry.snapshot()]))
+    _snapshot_writer.flush()
+    return render(*merge_snapshots(read_snapshots(_snapshot_writer.directory)))
+
+def init_metrics(app):
+    from flask import g, request
+
+    @app.before_request
+    def start_metrics_timer():
+        ensure_exporting()
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = getattr(g, "metrics_started", None)
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = {"endpoint": endpoint, "method": request.method, "status": str(response.status_code)}
+        registry.inc("http_requests_total", labels)
+        if started is not None:
+            registry.observe("http_request_duration_seconds", time.perf_counter() - started, {"endpoint": endpoint})
+        if not response.is_streamed:
+            registry.inc(
+                "http_response_bytes_total",
+                {"endpoint": endpoint, "encoding": response.headers.get("Content-Encoding", "identity")},
+                response.calculate_content_length() or 0
+            )
+        return response
@@ -0,0 +1,118 @@
+import json
+from .codec import encode_json, decode_json
+
+SUMMARY_COLUMNS = (
+    'positive_summary', 'negative_summary', 'positive_highlight', 'negative_highlight',
+    'positive_extract', 'negative_extract'
+)
+
+UPSERT_PLACE_SQL = """
+    INSERT INTO places (
+        place_id, name, lat, lng, rating, user_ratings_total, vicinity, types,
+        positive_summary, negative_summary, positive_highlight, negative_highlight,
+        positive_extract, negative_extract, reviews, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(place_id) DO UPDATE SET
+        name = excluded.name,
+        lat = excluded.lat,
+        lng = excluded.lng,
+        rating = excluded.rating,
+        user_ratings_total = excluded.user_ratings_total,
+        vicinity = excluded.vicinity,
+        types = excluded.types,
+        positive_summary = COALESCE(excluded.positive_summary, places.positive_summary),
+        negative_summary = COALESCE(excluded.negative_summary, places.negative_summary),
+        positive_highlight = COALESCE(excluded.positive_highlight, places.positive_highlight),
+        negative_highlight = COALESCE(excluded.negative_highlight, places.negative_highlight),
+        positive_extract = COALESCE(excluded.positive_extract, places.positive_extract),
+        negative_extract = COALESCE(excluded.negative_extract, places.negative_extract),
+        reviews = COALESCE(excluded.reviews, places.reviews),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+def place_row(place):
+    """
+    Flatten one place dict (as produced by get_nearby_places) into UPSERT_PLACE_SQL parameters.
+    Summaries and reviews are NULL when the caller did not fetch them, so the stored ones are kept.
+    """
+    summaries = place.get('summaries') or {}
+    reviews = None
+    if place.get('top_reviews') or place.get('least_reviews'):
+        reviews = encode_json({
+            "top_reviews": place.get('top_reviews') or [],
+            "least_reviews": place.get('least_reviews') or []
+        })
+    return (
+        place.get('place_id'),
+        place.get('name'),
+        place.get('lat'),
+        place.get('lng'),
+        place.get('rating', 0),
+        place.get('user_ratings_total', 0),
+        place.get('vicinity'),
+        json.dumps(place.get('types') or []),
+        summaries.get('positive_summary'),
+        summaries.get('negative_summary'),
+        summaries.get('positive_highlight'),
+        summaries.get('negative_highlight'),
+        summaries.get('positive_extract'),
+        summaries.get('negative_extract'),
+        reviews
+    )
+
+def upsert_places(cursor, places):
+    rows = [place_row(p) for p in places if p.get('place_id')]
+    if rows:
+        cursor.executemany(UPSERT_PLACE_SQL, rows)
+    return [row[0] for row in rows]
+
+def save_competitor_insight(db, user_id, location, category, summary, places):
+    """
+    Store one competitor insight and link it to its places in a single transaction.
+    Places are upserted by place_id, so storage grows with unique places rather than runs.
+    """
+    cursor = db.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO competitor_insights (user_id, location, category, total, avg_rating, avg_reviews)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, location, category, summary.get("total", 0), summary.get("avg_rating", 0), summary.get("avg_reviews", 0)))
+        insight_id = cursor.lastrowid
+        place_ids = upsert_places(cursor, places)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO insight_places (insight_id, place_id) VALUES (?, ?)",
+            [(insight_id, place_id) for place_id in place_ids]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return insight_id
+
+def get_insight_places(db, insight_id, columns="p.*"):
+    cursor = db.cursor()
+    cursor.execute(f"""
+        SELECT {columns}
+        FROM insight_places ip
+        JOIN places p ON p.place_id = ip.place_id
+        WHERE ip.insight_id = ?
+    """, (insight_id,))
+    return cursor.fetchall()
+
+def get_latest_insight(db, user_id, location, category):
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT id, total, avg_rating, avg_reviews, created_at FROM competitor_insights
+        WHERE user_id = ? AND location = ? AND category = ?
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    """, (user_id, location, category))
+    return cursor.fetchone()
+
+def stored_enrichment(row):
+    """The review fields enrich_place() would add, rebuilt from a stored places row."""
+    reviews = decode_json(row['reviews']) or {}
+    return {
+        'top_reviews': reviews.get('top_reviews', []),
+        'least_reviews': reviews.get('least_reviews', []),
+        'summaries': {k: row[k] for k in SUMMARY_COLUMNS if row[k] is not None}
+    }
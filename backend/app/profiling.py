@@ -0,0 +1,123 @@
+import os
+import re
+import hmac
+import sys
+import time
+import random
+import threading
+from collections import Counter
+from flask import g, request
+
+PROFILE_SUFFIX = ".folded"
+
+class StackSampler:
+    """
+    Statistical profiler for a single thread. A helper thread snapshots the target
+    thread's stack every `interval` seconds and counts collapsed stacks, which is the
+    input format of flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfileStore:
+    """Directory of collapsed-stack profiles, pruned oldest first to stay under max_bytes."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def save(self, request_id, endpoint, content):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "root"
+        request_id = re.sub(r"[^A-Za-z0-9-]+", "", str(request_id))[:64] or "unknown"
+        name = f"{int(time.time() * 1000)}_{request_id}_{slug}{PROFILE_SUFFIX}"
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(content)
+        self.prune()
+        return name
+
+    def list(self):
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(PROFILE_SUFFIX):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            profiles.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+        return sorted(profiles, key=lambda p: p["name"], reverse=True)
+
+    def path(self, name):
+        if os.path.basename(name) != name or not name.endswith(PROFILE_SUFFIX):
+            return None
+        path = os.path.join(self.directory, name)
+        return os.path.abspath(path) if os.path.isfile(path) else None
+
+    def prune(self):
+        with self._lock:
+            profiles = sorted(self.list(), key=lambda p: p["name"])
+            total = sum(p["size"] for p in profiles)
+            while profiles and total > self.max_bytes:
+                oldest = profiles.pop(0)
+                try:
+                    os.remove(os.path.join(self.directory, oldest["name"]))
+                except OSError:
+                    pass
+                total -= oldest["size"]
+
+def init_profiling(app):
+    store = ProfileStore(app.config["PROFILE_DIR"], app.config["PROFILE_MAX_BYTES"])
+    app.extensions["profile_store"] = store
+    admin_token = app.config["PROFILE_ADMIN_TOKEN"]
+    sample_rate = app.config["PROFILE_SAMPLE_RATE"]
+    interval = app.config["PROFILE_INTERVAL"]
+    if not admin_token and sample_rate <= 0:
+        # Profiling disabled: no hooks are registered, so requests pay nothing
+        return
+
+    @app.before_request
+    def maybe_start_profiler():
+        requested = admin_token and hmac.compare_digest(request.headers.get("X-Profile", "").encode(), admin_token.encode())
+        if requested or (sample_rate > 0 and random.random() < sample_rate):
+            g.profiler = StackSampler(threading.get_ident(), interval)
+            g.profiler.start()
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return
+        profiler.stop()
+        if profiler.samples:
+            endpoint = request.url_rule.rule if request.url_rule else request.path
+            store.save(getattr(g, "request_id", "unknown"), endpoint, profiler.folded())
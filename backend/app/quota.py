@@ -0,0 +1,222 @@
+import os
+import time
+import logging
+import sqlite3
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from flask import has_request_context, request, jsonify
+from .config import Config
+from .metrics import inc, observe
+
+# Who an upstream call is charged to; set per request and carried onto pool threads
+_user = ContextVar("quota_user", default=None)
+_endpoint = ContextVar("quota_endpoint", default=None)
+
+class QuotaExceeded(Exception):
+    def __init__(self, message, reason, retry_after):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class QuotaStore:
+    """
+    SQLite file shared by every worker process: one token bucket row per limiter
+    and per-day usage rows keyed by (day, user, endpoint, SKU).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS quota_buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS api_usage (
+                    day TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    sku TEXT NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    cost REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, user_id, endpoint, sku)
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in the QuotaStore, so `rate` is a limit for all workers together."""
+
+    def __init__(self, store, name, rate, burst):
+        self.store = store
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+
+    def try_acquire(self, tokens=1):
+        """Take `tokens` if available; returns 0 on success, otherwise the seconds to wait."""
+        conn = self.store.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Read the clock only once the write lock is held, or waiting writers over-credit
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM quota_buckets WHERE name = ?", (self.name,)).fetchone()
+            available = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / self.rate
+            conn.execute(
+                "INSERT OR REPLACE INTO quota_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, available, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, tokens=1, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class QuotaManager:
+    """
+    Central gate for billable Google calls: per-user daily cost budget, a cross-process
+    rate limit that queues callers for up to `max_wait` seconds, and usage accounting
+    per day, user, endpoint and SKU.
+    """
+
+    def __init__(self, path, rate, burst, sku_costs, user_daily_budget, max_wait):
+        self.store = QuotaStore(path)
+        self.bucket = SharedTokenBucket(self.store, "google_maps", rate, burst)
+        self.sku_costs = sku_costs
+        self.user_daily_budget = user_daily_budget
+        self.max_wait = max_wait
+
+    def spent_today(self, user_id):
+        row = self.store.conn().execute(
+            "SELECT COALESCE(SUM(cost), 0) FROM api_usage WHERE day = ? AND user_id = ?",
+            (_today(), user_id)
+        ).fetchone()
+        return row[0]
+
+    def _record(self, user_id, endpoint, sku, cost):
+        self.store.conn().execute("""
+            INSERT INTO api_usage (day, user_id, endpoint, sku, calls, cost) VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(day, user_id, endpoint, sku) DO UPDATE SET
+                calls = calls + 1,
+                cost = cost + excluded.cost
+        """, (_today(), user_id or 0, endpoint, sku, cost))
+
+    def spend(self, sku):
+        """
+        Charge one `sku` call to the current user/endpoint, waiting for the shared rate limit.
+        Raises QuotaExceeded when the user's daily budget is used up or no slot frees up in time.
+        Background work (no user) never queues, so it cannot hold up interactive requests.
+        """
+        user_id, endpoint = attribution()
+        cost = self.sku_costs.get(sku, 0.0)
+        try:
+            if user_id and self.user_daily_budget and self.spent_today(user_id) + cost > self.user_daily_budget:
+                inc("quota_rejections_total", {"sku": sku, "reason": "budget"})
+                raise QuotaExceeded("Daily Google API budget exhausted", "budget", _seconds_until_midnight())
+            started = time.monotonic()
+            if not self.bucket.acquire(1, timeout=self.max_wait if user_id else 0):
+                inc("quota_rejections_total", {"sku": sku, "reason": "rate"})
+                raise QuotaExceeded("Google API rate limit reached, try again shortly", "rate", 1)
+            observe("quota_wait_seconds", time.monotonic() - started, {"sku": sku})
+            self._record(user_id, endpoint, sku, cost)
+        except sqlite3.Error as e:
+            # Accounting must never take the API down with it
+            logging.getLogger("market_research_api").warning(f"Quota store unavailable, allowing {sku} call: {e}")
+        inc("google_api_calls_total", {"sku": sku})
+        inc("google_api_cost_usd_total", {"sku": sku}, cost)
+
+    def usage(self, user_id, day=None):
+        rows = self.store.conn().execute("""
+            SELECT endpoint, sku, calls, cost FROM api_usage
+            WHERE day = ? AND user_id = ? ORDER BY cost DESC
+        """, (day or _today(), user_id)).fetchall()
+        return [{"endpoint": r[0], "sku": r[1], "calls": r[2], "cost": round(r[3], 4)} for r in rows]
+
+def _today():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+def _seconds_until_midnight():
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int((midnight - now).total_seconds()) + 1
+
+def attribution():
+    user_id = _user.get()
+    endpoint = _endpoint.get()
+    if has_request_context():
+        user_id = user_id or getattr(request, "user_id", None)
+        endpoint = endpoint or request.endpoint
+    return user_id, endpoint or "background"
+
+def set_user(user_id):
+    _user.set(user_id)
+
+def carry_attribution(fn):
+    """Wrap `fn` so calls it makes on a pool thread are charged to the submitting request."""
+    user_id, endpoint = attribution()
+
+    def wrapper(*args, **kwargs):
+        user_token, endpoint_token = _user.set(user_id), _endpoint.set(endpoint)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _user.reset(user_token)
+            _endpoint.reset(endpoint_token)
+    return wrapper
+
+quota = QuotaManager(
+    Config.QUOTA_PATH,
+    rate=Config.QUOTA_RATE_PER_SECOND,
+    burst=Config.QUOTA_BURST,
+    sku_costs=Config.QUOTA_SKU_COSTS,
+    user_daily_budget=Config.QUOTA_USER_DAILY_BUDGET,
+    max_wait=Config.QUOTA_MAX_WAIT
+)
+
+def spend(sku):
+    quota.spend(sku)
+
+def init_quota(app):
+    @app.before_request
+    def reset_quota_attribution():
+        # Threads are reused across requests, so clear whatever the last one set
+        _user.set(None)
+        _endpoint.set(request.endpoint)
+
+    @app.errorhandler(QuotaExceeded)
+    def quota_exceeded(e):
+        response = jsonify({"error": str(e), "reason": e.reason})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
@@ -0,0 +1,82 @@
+import copy
+import inspect
+import threading
+from functools import wraps
+from .metrics import inc
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one: the first caller runs the function,
+    callers arriving while it is in flight wait and receive the same result (or exception).
+    Each waiter gets its own deep copy, taken from a snapshot made before the leader returns,
+    so callers may mutate what they get back. Nothing is cached once the call completes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            inc("singleflight_coalesced_total", {"call": self.name})
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # No waiter can join now; snapshot before the leader's caller can mutate the result
+            if call.waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.event.set()
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+def coalesce(name):
+    """Decorator: identical concurrent calls (after binding defaults) share one execution."""
+    def decorator(fn):
+        group = SingleFlight(name)
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((k, _freeze(v)) for k, v in bound.arguments.items())
+            return group.do(key, fn, *args, **kwargs)
+
+        wrapper.singleflight = group
+        return wrapper
+    return decorator
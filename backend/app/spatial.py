@@ -0,0 +1,167 @@
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from .places_store import upsert_places
+
+EARTH_RADIUS_M = 6371000.0
+METRES_PER_DEGREE = 111320.0
+# A single nearby search returns at most one page of results
+SEARCH_PAGE_SIZE = 20
+
+def init_spatial_index(cursor):
+    """R*Tree over places.id kept in sync by triggers, plus the search coverage tables."""
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(
+            id, min_lat, max_lat, min_lng, max_lng
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS places_rtree_insert AFTER INSERT ON places
+        WHEN NEW.lat IS NOT NULL AND NEW.lng IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO places_rtree VALUES (NEW.id, NEW.lat, NEW.lat, NEW.lng, NEW.lng);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS places_rtree_update AFTER UPDATE OF lat, lng ON places
+        BEGIN
+            DELETE FROM places_rtree WHERE id = OLD.id;
+            INSERT INTO places_rtree
+            SELECT NEW.id, NEW.lat, NEW.lat, NEW.lng, NEW.lng
+            WHERE NEW.lat IS NOT NULL AND NEW.lng IS NOT NULL;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS places_rtree_delete AFTER DELETE ON places
+        BEGIN
+            DELETE FROM places_rtree WHERE id = OLD.id;
+        END
+    ''')
+    # Backfill rows stored before the index existed
+    cursor.execute('''
+        INSERT INTO places_rtree
+        SELECT id, lat, lat, lng, lng FROM places
+        WHERE lat IS NOT NULL AND lng IS NOT NULL
+          AND id NOT IN (SELECT id FROM places_rtree)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS place_categories (
+            place_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            PRIMARY KEY (category, place_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS place_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            radius REAL NOT NULL,
+            result_count INTEGER NOT NULL,
+            searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_place_searches_category ON place_searches (category, searched_at)")
+
+def search_category(place_type=None, keyword=None):
+    """The label a nearby search is indexed under: its keyword, its type, or both."""
+    if place_type and keyword:
+        return f"{place_type}:{keyword}"
+    return keyword or place_type or ""
+
+def distance_m(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+def _bbox(lat, lng, radius):
+    dlat = radius / METRES_PER_DEGREE
+    dlng = radius / (METRES_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+def _cutoff(max_age):
+    return (datetime.now(timezone.utc) - timedelta(seconds=max_age)).strftime("%Y-%m-%d %H:%M:%S")
+
+def places_within(db, lat, lng, radius, category=None, max_age=None, limit=None):
+    """
+    Stored places within `radius` metres of (lat, lng), nearest first, optionally limited to
+    a search category and to rows refreshed in the last `max_age` seconds. The R*Tree narrows
+    the candidates to the bounding box; the exact great-circle distance does the rest.
+    """
+    min_lat, max_lat, min_lng, max_lng = _bbox(lat, lng, radius)
+    sql = '''
+        SELECT p.* FROM places_rtree r
+        JOIN places p ON p.id = r.id
+        WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lng >= ? AND r.min_lng <= ?
+    '''
+    params = [min_lat, max_lat, min_lng, max_lng]
+    if max_age:
+        sql += " AND p.updated_at >= ?"
+        params.append(_cutoff(max_age))
+    if category:
+        sql += " AND EXISTS (SELECT 1 FROM place_categories pc WHERE pc.category = ? AND pc.place_id = p.place_id)"
+        params.append(category)
+    cursor = db.cursor()
+    cursor.execute(sql, params)
+    results = []
+    for row in cursor.fetchall():
+        d = distance_m(lat, lng, row["lat"], row["lng"])
+        if d <= radius:
+            results.append((d, row))
+    results.sort(key=lambda item: item[0])
+    return results[:limit] if limit else results
+
+def covering_search(db, category, lat, lng, radius, max_age, tolerance):
+    """
+    A fresh stored search for `category` whose results are complete for the requested circle:
+    either it returned less than a full page and its circle contains the requested one, or it
+    was (almost) the same query, centre within `tolerance` x radius and at least as wide.
+    """
+    cursor = db.cursor()
+    cursor.execute('''
+        SELECT id, lat, lng, radius, result_count, searched_at FROM place_searches
+        WHERE category = ? AND searched_at >= ? AND radius >= ?
+        ORDER BY searched_at DESC
+        LIMIT 50
+    ''', (category, _cutoff(max_age), radius))
+    for search in cursor.fetchall():
+        offset = distance_m(lat, lng, search["lat"], search["lng"])
+        if search["result_count"] < SEARCH_PAGE_SIZE and offset + radius <= search["radius"]:
+            return search
+        if offset <= tolerance * radius and search["radius"] <= radius * (1 + tolerance):
+            return search
+    return None
+
+def record_search(db, category, lat, lng, radius, places):
+    """Store the places of one API nearby search and remember which circle it covered."""
+    cursor = db.cursor()
+    try:
+        place_ids = upsert_places(cursor, places)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO place_categories (category, place_id) VALUES (?, ?)",
+            [(category, place_id) for place_id in place_ids]
+        )
+        cursor.execute(
+            "INSERT INTO place_searches (category, lat, lng, radius, result_count) VALUES (?, ?, ?, ?, ?)",
+            (category, lat, lng, radius, len(places))
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def local_row_to_place(row):
+    """A stored places row in the shape of google_maps.base_place()."""
+    return {
+        'name': row['name'],
+        'place_id': row['place_id'],
+        'lat': row['lat'],
+        'lng': row['lng'],
+        'rating': row['rating'],
+        'user_ratings_total': row['user_ratings_total'],
+        'vicinity': row['vicinity'],
+        'types': json.loads(row['types']) if row['types'] else []
+    }
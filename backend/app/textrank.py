@@ -0,0 +1,214 @@
+import os
+import re
+import queue
+import time
+import logging
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, wait as wait_futures
+import numpy as np
+from .cache import shared_cache
+from .config import Config
+from .metrics import inc, observe
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+_WORD = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset({
+    "the", "and", "for", "was", "very", "had", "with", "but", "are", "this", "that", "were",
+    "also", "at", "in", "on", "a", "of", "to", "is", "it", "we", "as", "from", "they", "you",
+    "be", "an", "by", "so", "if", "or", "not", "i", "my", "me", "our", "their", "there",
+    "have", "has", "here", "its", "it's", "just", "all", "one", "would", "will", "can"
+})
+# Sentences shorter than this many content words carry too little to rank
+MIN_SENTENCE_WORDS = 3
+
+# Finished extracts per place_id, shared by request handlers and the pool callbacks
+_extract_cache = shared_cache("review_extracts", Config.DETAILS_CACHE_TTL, maxsize=4096)
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s.strip()]
+
+def _content_words(sentence):
+    return {w for w in _WORD.findall(sentence.lower()) if w not in STOPWORDS}
+
+def textrank(sentences, damping=0.85, tolerance=1e-6, max_iterations=100):
+    """
+    TextRank scores for `sentences` (Mihalcea & Tarau 2004). Similarity is the number of shared
+    content words over log|Si| + log|Sj|, computed for every pair at once from a sentence x word
+    incidence matrix; scores come from power iteration on the row-normalised similarity graph.
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    words = [_content_words(s) for s in sentences]
+    vocabulary = {w: i for i, w in enumerate(set().union(*words))}
+    incidence = np.zeros((n, max(len(vocabulary), 1)), dtype=np.float64)
+    rows = np.repeat(np.arange(n), [len(w) for w in words])
+    cols = np.fromiter((vocabulary[w] for ws in words for w in ws), dtype=np.int64, count=len(rows))
+    incidence[rows, cols] = 1.0
+
+    overlap = incidence @ incidence.T
+    log_lengths = np.log(np.maximum(incidence.sum(axis=1), 1.0))
+    norm = log_lengths[:, None] + log_lengths[None, :]
+    similarity = np.divide(overlap, norm, out=np.zeros_like(overlap), where=norm > 0)
+    np.fill_diagonal(similarity, 0.0)
+
+    # Sentences with no neighbours link uniformly to everyone, as PageRank does with dangling nodes
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / n), where=out_weight > 0)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def extract_summary(texts, sentences=3):
+    """The `sentences` highest-ranked sentences of a review corpus, in their original order."""
+    corpus, seen = [], set()
+    for text in texts:
+        for sentence in split_sentences(text):
+            key = sentence.lower()
+            if key not in seen and len(_content_words(sentence)) >= MIN_SENTENCE_WORDS:
+                seen.add(key)
+                corpus.append(sentence)
+    if len(corpus) <= sentences:
+        return " ".join(corpus)
+    scores = textrank(corpus)
+    chosen = np.sort(np.argsort(-scores, kind="stable")[:sentences])
+    return " ".join(corpus[i] for i in chosen)
+
+def summarize_place(place_id, positive_texts, negative_texts, sentences):
+    """Process-pool entry point: one place's positive and negative review extracts."""
+    started = time.perf_counter()
+    extracts = {
+        "positive_extract": extract_summary(positive_texts, sentences),
+        "negative_extract": extract_summary(negative_texts, sentences)
+    }
+    return place_id, extracts, time.perf_counter() - started
+
+def review_corpora(reviews):
+    """Split analysed reviews into the positive and negative corpora the extracts are taken from."""
+    positive = [r["text"] for r in reviews if r.get("sentiment", 0) >= 0]
+    negative = [r["text"] for r in reviews if r.get("sentiment", 0) < 0]
+    return positive, negative
+
+class SummaryPool:
+    """
+    Computes review extracts in worker processes, off the request path. Request threads only
+    enqueue; a dispatcher thread owns the process pool, so starting the worker processes never
+    delays a request. Finished extracts go to the review_extracts cache and to the place's row
+    in `places`; a place already queued is not queued twice.
+    """
+
+    def __init__(self, workers, sentences):
+        self.workers = workers
+        self.sentences = sentences
+        self._queue = None
+        self._pid = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Threads and executors do not survive fork, so each worker process starts its own
+        if self._pid != os.getpid():
+            self._queue = queue.SimpleQueue()
+            self._pending = {}
+            self._pid = os.getpid()
+            threading.Thread(target=self._dispatch, args=(self._queue,), name="review-summaries", daemon=True).start()
+
+    def _dispatch(self, jobs):
+        # Forking a threaded server can copy held locks into the child, so workers come from a
+        # fork server that imports the app once instead of once per worker process
+        try:
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            # Start the worker processes now rather than on the first real job
+            executor.submit(int)
+        except Exception as e:
+            # Keep draining the queue so callers see a failed future instead of one that never resolves
+            logging.getLogger("market_research_api").error(f"Review summary pool could not start: {e}")
+            executor = None
+        while True:
+            placeholder, args = jobs.get()
+            if executor is None:
+                placeholder.set_exception(RuntimeError("review summary pool is unavailable"))
+                continue
+            try:
+                future = executor.submit(summarize_place, *args)
+            except Exception as e:
+                placeholder.set_exception(e)
+                continue
+            future.add_done_callback(lambda f, placeholder=placeholder: _chain(f, placeholder))
+
+    def submit(self, place_id, reviews, db_path):
+        """Queue extraction for one place; returns the future, or None when disabled or empty."""
+        if not self.workers or not reviews:
+            return None
+        positive, negative = review_corpora(reviews)
+        with self._lock:
+            self._ensure_started()
+            future = self._pending.get(place_id)
+            if future is not None:
+                return future
+            future = self._pending[place_id] = Future()
+        future.add_done_callback(lambda f: self._finished(place_id, db_path, f))
+        self._queue.put((future, (place_id, positive, negative, self.sentences)))
+        return future
+
+    def _finished(self, place_id, db_path, future):
+        with self._lock:
+            if self._pending.get(place_id) is future:
+                del self._pending[place_id]
+        try:
+            place_id, extracts, seconds = future.result()
+        except Exception as e:
+            inc("review_summaries_total", {"result": "error"})
+            logging.getLogger("market_research_api").error(f"Review summary failed for {place_id}: {e}")
+            return
+        observe("review_summary_seconds", seconds)
+        inc("review_summaries_total", {"result": "ok"})
+        _extract_cache.set(place_id, extracts)
+        try:
+            conn = sqlite3.connect(db_path, timeout=5)
+            try:
+                with conn:
+                    conn.execute(
+                        "UPDATE places SET positive_extract = ?, negative_extract = ? WHERE place_id = ?",
+                        (extracts["positive_extract"], extracts["negative_extract"], place_id)
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.getLogger("market_research_api").warning(f"Could not store review summary for {place_id}: {e}")
+
+    def wait(self, place_ids, timeout):
+        """Block up to `timeout` seconds for any of `place_ids` still being summarised."""
+        with self._lock:
+            futures = [self._pending[p] for p in place_ids if p in self._pending]
+        if futures and timeout > 0:
+            wait_futures(futures, timeout=timeout)
+
+def _chain(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+summary_pool = SummaryPool(Config.SUMMARY_WORKERS, Config.SUMMARY_SENTENCES)
+
+def cached_extracts(place_id):
+    return _extract_cache.get(place_id) or {}
+
+def attach_extracts(places, wait=0):
+    """Merge finished extracts into each place's `summaries`, waiting up to `wait` seconds for pending ones."""
+    summary_pool.wait([p.get("place_id") for p in places], wait)
+    for place in places:
+        extracts = cached_extracts(place.get("place_id"))
+        if extracts:
+            place["summaries"] = {**(place.get("summaries") or {}), **extracts}
+    return places
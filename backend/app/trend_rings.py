@@ -0,0 +1,114 @@
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from .spatial import EARTH_RADIUS_M, distance_m
+
+def init_trend_store(cursor):
+    """One row per establishment sweep plus the positions and types of every place it returned."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trend_sweeps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            radius REAL NOT NULL,
+            place_count INTEGER NOT NULL,
+            swept_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_sweeps_swept ON trend_sweeps (swept_at)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trend_places (
+            sweep_id INTEGER NOT NULL,
+            place_id TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            types TEXT NOT NULL,
+            PRIMARY KEY (sweep_id, place_id),
+            FOREIGN KEY (sweep_id) REFERENCES trend_sweeps(id)
+        ) WITHOUT ROWID
+    ''')
+
+def record_sweep(db, lat, lng, radius, places):
+    cursor = db.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO trend_sweeps (lat, lng, radius, place_count) VALUES (?, ?, ?, ?)",
+            (lat, lng, radius, len(places))
+        )
+        sweep_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT OR IGNORE INTO trend_places (sweep_id, place_id, lat, lng, types) VALUES (?, ?, ?, ?, ?)",
+            [(sweep_id, p["place_id"], p["lat"], p["lng"], json.dumps(p["types"])) for p in places if p.get("place_id")]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return sweep_id
+
+def covering_sweep(db, lat, lng, radius, max_age):
+    """The newest sweep younger than `max_age` seconds whose circle contains the requested one."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=max_age)).strftime("%Y-%m-%d %H:%M:%S")
+    cursor = db.cursor()
+    cursor.execute('''
+        SELECT id, lat, lng, radius, place_count, swept_at FROM trend_sweeps
+        WHERE swept_at >= ? AND radius >= ?
+        ORDER BY swept_at DESC, id DESC
+        LIMIT 50
+    ''', (cutoff, radius))
+    for sweep in cursor.fetchall():
+        if distance_m(lat, lng, sweep["lat"], sweep["lng"]) + radius <= sweep["radius"]:
+            return sweep
+    return None
+
+def sweep_places(db, sweep_id):
+    cursor = db.cursor()
+    cursor.execute("SELECT place_id, lat, lng, types FROM trend_places WHERE sweep_id = ?", (sweep_id,))
+    return [
+        {"place_id": row["place_id"], "lat": row["lat"], "lng": row["lng"], "types": json.loads(row["types"])}
+        for row in cursor.fetchall()
+    ]
+
+def _distances(lat, lng, lats, lngs):
+    """Great-circle distances in metres from one point to arrays of points."""
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lngs - lng)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def ring_counts(lat, lng, places, rings):
+    """
+    Business-type counts within each radius in `rings` around (lat, lng). Every place is assigned
+    to its innermost ring with one searchsorted over the distance array; a cumulative sum over the
+    ring axis then turns per-band counts into per-catchment counts.
+    """
+    rings = sorted(set(rings))
+    type_names = sorted({t for p in places for t in p["types"]})
+    band_counts = np.zeros((len(rings), len(type_names)), dtype=np.int64)
+    band_places = np.zeros(len(rings), dtype=np.int64)
+    if places and rings:
+        lats = np.fromiter((p["lat"] for p in places), dtype=np.float64, count=len(places))
+        lngs = np.fromiter((p["lng"] for p in places), dtype=np.float64, count=len(places))
+        bands = np.searchsorted(np.asarray(rings, dtype=np.float64), _distances(lat, lng, lats, lngs), side="left")
+        type_index = {t: i for i, t in enumerate(type_names)}
+        place_idx = np.fromiter((i for i, p in enumerate(places) for _ in p["types"]), dtype=np.int64)
+        type_idx = np.fromiter((type_index[t] for p in places for t in p["types"]), dtype=np.int64)
+        # Places past the outer ring land in band len(rings) and are dropped
+        inside = bands[place_idx] < len(rings)
+        np.add.at(band_counts, (bands[place_idx][inside], type_idx[inside]), 1)
+        band_places = np.bincount(bands[bands < len(rings)], minlength=len(rings))
+    catchment_counts = np.cumsum(band_counts, axis=0)
+    catchment_places = np.cumsum(band_places)
+    result = []
+    for i, radius in enumerate(rings):
+        counts = Counter({t: int(c) for t, c in zip(type_names, catchment_counts[i]) if c})
+        result.append({
+            "radius": radius,
+            "establishments": int(catchment_places[i]),
+            "top_categories": counts.most_common(5),
+            "untapped_categories": sorted(counts.items(), key=lambda x: x[1])[:5],
+            "counts": dict(counts.most_common())
+        })
+    return result
@@ -1,24 +1,7 @@
 import json
-from datetime import datetime
-from flask import request
+import base64
 import pandas as pd
 
-def log_request(req, log_file):
-    timestamp = datetime.now().isoformat()
-    client_host = request.remote_addr or "unknown"
-    params = dict(request.args)
-    log_data = {
-        "timestamp": timestamp,
-        "method": request.method,
-        "url": request.url,
-        "path": request.path,
-        "params": params,
-        "client_ip": client_host,
-        "user_agent": request.headers.get("user-agent", "unknown")
-    }
-    with open(log_file, "a") as f:
-        f.write(json.dumps(log_data) + "\n")
-
 def validate_location(location: str):
     if not location:
         return False, "Location parameter is required"
@@ -32,10 +15,77 @@ def validate_location(location: str):
             pass
     return True, "Valid location"
 
-def format_json_response(data):
-    return json.loads(json.dumps(data, default=str))
-
 def dataframe_to_dict(df):
     if isinstance(df, pd.DataFrame):
         return df.to_dict(orient="records")
     return df
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return created_at, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def parse_fields(raw, allowed, default):
+    """
+    Parse a comma separated `fields=` parameter against a whitelist of column names.
+    Unknown names raise ValueError so they never reach the SQL.
+    """
+    if not raw:
+        return list(default)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def parse_page_args(args, default_limit, max_limit):
+    """
+    keyset_page arguments from the query string. Pages default to default_limit rows; the total
+    is only counted when include_total is set.
+    """
+    limit = args.get("limit", default_limit, type=int)
+    if not limit or limit < 1:
+        raise ValueError("limit must be a positive integer")
+    cursor = args.get("cursor")
+    return {
+        "limit": min(limit, max_limit),
+        "cursor": decode_cursor(cursor) if cursor else None,
+        "include_total": args.get("include_total", "").lower() in ("1", "true", "yes")
+    }
+
+def keyset_page(cursor, table, fields, user_id, limit, after=None, include_total=False):
+    """
+    Fetch one page of a user's rows newest first, keyed on (created_at, id).
+    Only the requested columns are selected; id and created_at are always read for the cursor.
+    Returns (rows, next_cursor, total) where total is None unless include_total is set.
+    """
+    columns = list(dict.fromkeys(["id", "created_at"] + list(fields)))
+    sql = f"SELECT {', '.join(columns)} FROM {table} WHERE user_id = ?"
+    params = [user_id]
+    if after:
+        sql += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+    cursor.execute(sql, params)
+    rows = [dict(row) for row in cursor.fetchall()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    total = None
+    if include_total:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (user_id,))
+        total = cursor.fetchone()[0]
+    for row in rows:
+        for column in columns:
+            if column not in fields:
+                row.pop(column, None)
+    return rows, next_cursor, total
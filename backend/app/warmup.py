@@ -0,0 +1,211 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from flask import g
+from .database import get_db
+from .http_cache import parse_timestamp
+from .metrics import inc
+from .quota import QuotaExceeded
+from .google_maps import (
+    parse_coords, geocode_key, geocode_location, nearby_key, nearby_search, get_place_reviews,
+    fetch_business_trends, _geocode_cache, _nearby_cache, _details_cache, _trends_cache
+)
+
+# A trends sweep follows up to three result pages
+TRENDS_COST = 3
+TRENDS_RADIUS = 3000
+
+def hot_pairs(db, window_days, half_life_hours, limit):
+    """
+    Rank (location, category) pairs seen in competitor_insights, heatmap_data and
+    analyzed_locations (category None: trend lookups) by frequency x recency, where each
+    query counts 0.5 ** (age / half_life).
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=window_days)).strftime("%Y-%m-%d %H:%M:%S")
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT location, category, created_at AS seen FROM competitor_insights WHERE created_at >= ?
+        UNION ALL
+        SELECT location, category, created_at FROM heatmap_data WHERE created_at >= ?
+        UNION ALL
+        SELECT location_coords, NULL, updated_at FROM analyzed_locations WHERE updated_at >= ?
+    """, (cutoff, cutoff, cutoff))
+    now = datetime.now(timezone.utc)
+    pairs = {}
+    for row in cursor.fetchall():
+        seen = parse_timestamp(row["seen"])
+        if not row["location"] or seen is None:
+            continue
+        age_hours = max(0.0, (now - seen).total_seconds() / 3600)
+        key = (geocode_key(row["location"]), row["category"])
+        pair = pairs.setdefault(key, {"location": row["location"].strip(), "category": row["category"], "score": 0.0, "hits": 0})
+        pair["score"] += 0.5 ** (age_hours / half_life_hours)
+        pair["hits"] += 1
+    return sorted(pairs.values(), key=lambda p: p["score"], reverse=True)[:limit]
+
+def warm_pair(location, category, take):
+    """
+    Fill the geocode, nearby-search and place-details caches for one competitor/heatmap pair,
+    or the trends cache for a trend location (category None). `take(cost)` is asked before
+    every upstream call that would miss the cache; warming stops as soon as it says no.
+    """
+    if category is None:
+        if (location, TRENDS_RADIUS) not in _trends_cache and take(TRENDS_COST):
+            fetch_business_trends(location, TRENDS_RADIUS)
+        return
+    coords = parse_coords(location)
+    if coords is None:
+        if geocode_key(location) not in _geocode_cache and not take(1):
+            return
+        coords, error = geocode_location(location)
+        if error:
+            return
+    if nearby_key(coords, keyword=category) not in _nearby_cache and not take(1):
+        return
+    for place in nearby_search(coords, keyword=category):
+        place_id = place.get("place_id")
+        if not place_id or place_id in _details_cache:
+            continue
+        if not take(1):
+            return
+        get_place_reviews(place_id)
+
+class CallBudget:
+    """Rolling one-hour allowance of upstream API calls."""
+
+    def __init__(self, per_hour):
+        self.per_hour = per_hour
+        self._spent = deque()
+        self._lock = threading.Lock()
+
+    def _remaining(self):
+        cutoff = time.monotonic() - 3600
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return self.per_hour - sum(cost for _, cost in self._spent)
+
+    def remaining(self):
+        with self._lock:
+            return self._remaining()
+
+    def take(self, cost=1):
+        with self._lock:
+            if self._remaining() < cost:
+                return False
+            self._spent.append((time.monotonic(), cost))
+            return True
+
+class WarmupScheduler:
+    """
+    Background thread that refreshes upstream caches for the hottest (location, category)
+    pairs while the worker is idle: no request in flight and none for `quiet_seconds`.
+    """
+
+    def __init__(self, app, interval, quiet_seconds, budget, top_pairs, window_days, half_life_hours):
+        self.app = app
+        self.interval = interval
+        self.quiet_seconds = quiet_seconds
+        self.budget = CallBudget(budget)
+        self.top_pairs = top_pairs
+        self.window_days = window_days
+        self.half_life_hours = half_life_hours
+        self._in_flight = 0
+        self._last_request = time.monotonic()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def request_started(self):
+        self.ensure_started()
+        with self._lock:
+            self._in_flight += 1
+            self._last_request = time.monotonic()
+
+    def request_finished(self):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._last_request = time.monotonic()
+
+    def is_quiet(self):
+        with self._lock:
+            return self._in_flight == 0 and time.monotonic() - self._last_request >= self.quiet_seconds
+
+    def ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own scheduler
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._in_flight = 0
+            threading.Thread(target=self._run, name="cache-warmup", daemon=True).start()
+
+    def _take(self, cost):
+        if not self.is_quiet() or not self.budget.take(cost):
+            return False
+        inc("warmup_upstream_calls_total", value=cost)
+        return True
+
+    def run_once(self):
+        """Warm the hottest pairs until the budget runs out or traffic resumes."""
+        started = time.perf_counter()
+        warmed = 0
+        with self.app.app_context():
+            try:
+                pairs = hot_pairs(get_db(), self.window_days, self.half_life_hours, self.top_pairs)
+                for pair in pairs:
+                    if not self.is_quiet() or self.budget.remaining() <= 0:
+                        break
+                    try:
+                        warm_pair(pair["location"], pair["category"], self._take)
+                    except QuotaExceeded:
+                        # The shared API quota outranks warm-up; try again next cycle
+                        break
+                    warmed += 1
+            finally:
+                db = g.pop("_database", None)
+                if db is not None:
+                    db.close()
+        inc("warmup_runs_total")
+        logging.getLogger("market_research_api").info(
+            f"Cache warm-up: {warmed} pairs in {time.perf_counter() - started:.2f}s, "
+            f"{self.budget.remaining()} calls left this hour"
+        )
+        return warmed
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self.is_quiet() or self.budget.remaining() <= 0:
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.getLogger("market_research_api").error(f"Cache warm-up failed: {e}")
+
+def init_warmup(app):
+    if not app.config["WARMUP_ENABLED"]:
+        return None
+    scheduler = WarmupScheduler(
+        app,
+        interval=app.config["WARMUP_INTERVAL"],
+        quiet_seconds=app.config["WARMUP_QUIET_SECONDS"],
+        budget=app.config["WARMUP_API_BUDGET"],
+        top_pairs=app.config["WARMUP_TOP_PAIRS"],
+        window_days=app.config["WARMUP_WINDOW_DAYS"],
+        half_life_hours=app.config["WARMUP_HALF_LIFE_HOURS"]
+    )
+    app.extensions["warmup"] = scheduler
+
+    @app.before_request
+    def mark_request_started():
+        scheduler.request_started()
+
+    @app.teardown_request
+    def mark_request_finished(exc):
+        scheduler.request_finished()
+
+    return scheduler
@@ -0,0 +1,44 @@
+"""
+Rough throughput check: python bench.py URL [--token JWT] [--requests 2000] [--concurrency 32]
+Run it against `python main.py` and against gunicorn with the same database to compare.
+"""
+import sys
+import time
+import argparse
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("--token")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+    def hit(_):
+        started = time.perf_counter()
+        try:
+            ok = session.get(args.url, headers=headers, timeout=30).status_code < 500
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(hit, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for r in results if not r[1])
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {errors} errors")
+    print(f"{args.requests / elapsed:.1f} req/s  p50 {pct(0.5):.1f} ms  p95 {pct(0.95):.1f} ms  p99 {pct(0.99):.1f} ms")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
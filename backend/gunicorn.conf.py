@@ -0,0 +1,43 @@
+import os
+import glob
+import multiprocessing
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+
+# Import the app (and run init_db) once in the master; workers fork from it.
+# See "Production serving" in the README for what workers share and what stays per worker.
+preload_app = True
+
+# Recycle workers gradually so slow leaks never build up, and let in-flight requests finish
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+
+def on_starting(server):
+    # Snapshots left by workers of a previous run would otherwise be merged into /metrics
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, "metrics_*.json*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def child_exit(server, worker):
+    # A recycled worker's counts move into the retired snapshot, so totals never go backwards
+    # and a new worker that reuses the pid does not overwrite them
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        from app.metrics import retire_snapshot
+        try:
+            retire_snapshot(metrics_dir, worker.pid)
+        except OSError as e:
+            server.log.warning(f"Could not retire metrics for worker {worker.pid}: {e}")
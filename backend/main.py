@@ -1,11 +1,14 @@
-from app import create_app
+import os
 from app import init_db  # Ensure database module is imported to register functions
+from wsgi import app  # Module-level app, so `flask --app main` and `gunicorn main:app` keep working
 
-app = create_app()
-
-with app.app_context():
-    init_db()
-    print("Database initialized!")
-
+# Review-summary pool children re-import this file as __mp_main__. Building the app there is
+# harmless (migrations are idempotent and background threads start lazily), but the dev
+# server must only start from the real entry point.
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    with app.app_context():
+        init_db()
+        print("Database initialized!")
+
+    # Development server only; use gunicorn (see gunicorn.conf.py) in production
+    app.run(host="0.0.0.0", port=5000, debug=os.getenv("FLASK_DEBUG", "false").lower() == "true")
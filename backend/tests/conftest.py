@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+from collections import Counter
+import pytest
+
+# Config is read at import time, so module-level stores (quota, validator generations, the
+# access log) are pointed at a scratch directory before anything from `app` is imported
+_scratch = tempfile.mkdtemp(prefix="market-research-tests-")
+os.environ.setdefault("JWT_SECRET", "test-secret-" + "x" * 32)
+os.environ["QUOTA_PATH"] = os.path.join(_scratch, "api_quota.db")
+os.environ["SHARED_CACHE_PATH"] = ""
+os.environ["DATABASE_PATH"] = os.path.join(_scratch, "market_research.db")
+os.environ["LOG_FILE"] = os.path.join(_scratch, "api_requests.log")
+os.environ["PROFILE_DIR"] = os.path.join(_scratch, "profiles")
+os.environ["SUMMARY_WORKERS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app import create_app
+from app.auth import generate_token, hash_password
+from app.config import Config
+from app.database import init_db, get_db
+
+@pytest.fixture
+def app(tmp_path):
+    """A bare Flask app with a freshly initialised database; no blueprints or background threads."""
+    application = Flask(__name__)
+    application.config.update(TESTING=True, DATABASE_PATH=str(tmp_path / "market_research.db"))
+    with application.app_context():
+        init_db()
+    return application
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        yield get_db()
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """The full application on a fresh database."""
+    monkeypatch.setattr(Config, "DATABASE_PATH", str(tmp_path / "market_research.db"))
+    application = create_app()
+    application.config["TESTING"] = True
+    return application
+
+@pytest.fixture
+def auth_header(api):
+    """Bearer header for a new user; call with a username to get further users."""
+    def make(username="owner"):
+        with api.app_context():
+            db = get_db()
+            user_id = db.execute(
+                "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
+                (username, hash_password("secret"), f"{username}@example.com")
+            ).lastrowid
+            db.commit()
+            return {"Authorization": f"Bearer {generate_token(user_id)}"}
+    return make
+
+class FakeMaps:
+    """Stand-in googlemaps client: counts calls and returns `count` places around the searched point."""
+
+    def __init__(self, count=3):
+        self.count = count
+        self.calls = Counter()
+        self.searches = []
+
+    def geocode(self, location):
+        self.calls["geocode"] += 1
+        return [{"geometry": {"location": {"lat": 51.5, "lng": -0.12}}}]
+
+    def places_nearby(self, location, radius, type=None, keyword=None):
+        self.calls["places_nearby"] += 1
+        self.searches.append({"location": location, "radius": radius, "type": type, "keyword": keyword})
+        lat, lng = location
+        name = keyword or type or "place"
+        return {"results": [{
+            "name": f"{name} {i}",
+            "place_id": f"{name}-{i}",
+            "geometry": {"location": {"lat": lat + i * 0.0005, "lng": lng}},
+            "rating": 4.0 + i / 10,
+            "user_ratings_total": 10 * (i + 1),
+            "vicinity": "High Street",
+            "types": [type or "establishment"]
+        } for i in range(self.count)]}
+
+    def place(self, place_id, fields):
+        self.calls["place"] += 1
+        return {"result": {"name": place_id, "reviews": [
+            {"author_name": "A", "rating": 5, "text": "Great friendly staff and lovely coffee.", "time": 1},
+            {"author_name": "B", "rating": 1, "text": "Terrible slow service and cold food.", "time": 2}
+        ]}}
+
+@pytest.fixture
+def maps(monkeypatch):
+    """Replace the Google Maps client and start with empty upstream caches."""
+    from app import google_maps
+    fake = FakeMaps()
+    monkeypatch.setattr(google_maps, "get_gmaps_client", lambda: fake)
+    for cache in (google_maps._geocode_cache, google_maps._nearby_cache, google_maps._details_cache, google_maps._trends_cache):
+        cache.clear()
+    return fake
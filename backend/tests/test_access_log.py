@@ -0,0 +1,74 @@
+import json
+import os
+import time
+from app.access_log import AccessLogWriter
+
+def make_writer(path, **overrides):
+    options = dict(max_bytes=0, rotate_seconds=0, backup_count=3, flush_seconds=0.05, batch_size=50, queue_size=1000)
+    options.update(overrides)
+    return AccessLogWriter(str(path), **options)
+
+def read_lines(*paths):
+    lines = []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path) as f:
+                lines += [json.loads(line) for line in f]
+    return lines
+
+def test_stop_flushes_everything_queued(tmp_path):
+    path = tmp_path / "access.log"
+    writer = make_writer(path)
+    for i in range(120):
+        writer.enqueue({"n": i, "path": "/heatmap"})
+    writer.stop()
+    assert [r["n"] for r in read_lines(path)] == list(range(120))
+
+def test_records_are_flushed_without_stopping(tmp_path):
+    path = tmp_path / "access.log"
+    writer = make_writer(path)
+    writer.enqueue({"n": 1})
+    deadline = time.time() + 2
+    while not read_lines(path) and time.time() < deadline:
+        time.sleep(0.02)
+    assert read_lines(path) == [{"n": 1}]
+    writer.stop()
+
+def test_size_rotation_keeps_backup_count_files(tmp_path):
+    path = tmp_path / "access.log"
+    writer = make_writer(path, max_bytes=200, batch_size=1)
+    for i in range(60):
+        writer.enqueue({"n": i, "padding": "x" * 40})
+    writer.stop()
+    backups = sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("access.log."))
+    assert backups == ["access.log.1", "access.log.2", "access.log.3", "access.log.lock"]
+    assert os.path.getsize(path) < 200 + 80
+    # Oldest backups are dropped; what remains is the newest, in order and without gaps
+    kept = [r["n"] for r in read_lines(f"{path}.3", f"{path}.2", f"{path}.1", path)]
+    assert kept == list(range(kept[0], 60))
+
+def test_writer_reopens_a_file_rotated_by_another_process(tmp_path):
+    path = tmp_path / "access.log"
+    writer = make_writer(path)
+    writer.enqueue({"n": 1})
+    time.sleep(0.2)
+    # Another worker rotating the log moves the file away under this writer
+    os.replace(path, f"{path}.1")
+    writer.enqueue({"n": 2})
+    writer.stop()
+    assert read_lines(f"{path}.1") == [{"n": 1}]
+    assert read_lines(path) == [{"n": 2}]
+
+def test_full_queue_drops_and_stop_does_not_hang(tmp_path):
+    writer = make_writer(tmp_path / "access.log", queue_size=1, flush_seconds=5)
+    writer._ensure_started()
+    # Occupy the writer so the queue cannot drain while we fill it
+    writer._write = lambda batch: time.sleep(1)
+    writer.enqueue({"n": 0})
+    time.sleep(0.1)
+    for i in range(5):
+        writer.enqueue({"n": i})
+    assert writer.dropped >= 3
+    started = time.time()
+    writer.stop(timeout=0.2)
+    assert time.time() - started < 1.5
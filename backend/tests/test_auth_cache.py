@@ -0,0 +1,80 @@
+import time
+import jwt
+import pytest
+from app import auth
+from app import cache as cache_module
+from app.auth import generate_token, get_user, invalidate_user, verify_token
+from app.cache import TTLCache
+from app.database import get_db
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Count signature checks; the token cache is cleared so tests start cold."""
+    auth._token_cache.clear()
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+def test_repeat_verification_skips_the_signature_check(app, decodes):
+    with app.app_context():
+        app.config.update(JWT_SECRET="secret-" + "x" * 32, JWT_EXPIRATION=1, TOKEN_CACHE_TTL=3600)
+        token = generate_token(5)
+        assert verify_token(token) == 5
+        assert verify_token(token) == 5
+        assert len(decodes) == 1
+
+def test_cached_claims_expire_with_the_token(app, decodes, monkeypatch):
+    with app.app_context():
+        app.config.update(JWT_SECRET="secret-" + "x" * 32, JWT_EXPIRATION=1, TOKEN_CACHE_TTL=3600)
+        token = generate_token(5)
+        assert verify_token(token) == 5
+        # Two hours on, the cached claims are past the token's exp and must be checked again
+        later = time.time() + 7200
+        monkeypatch.setattr(auth.time, "time", lambda: later)
+
+        def expired(*args, **kwargs):
+            decodes.append(args[0])
+            raise jwt.ExpiredSignatureError()
+        monkeypatch.setattr(auth.jwt, "decode", expired)
+        assert verify_token(token) is None
+        assert len(decodes) == 2
+
+def test_invalid_tokens_are_not_cached(app, decodes):
+    with app.app_context():
+        app.config.update(JWT_SECRET="secret-" + "x" * 32, JWT_EXPIRATION=1, TOKEN_CACHE_TTL=3600)
+        assert verify_token("not-a-token") is None
+        assert verify_token("not-a-token") is None
+        assert len(decodes) == 2
+
+def test_user_rows_are_cached_until_invalidated(app):
+    with app.app_context():
+        db = get_db()
+        user_id = db.execute(
+            "INSERT INTO users (username, password_hash, email, business_name) VALUES ('u', 'h', 'u@example.com', 'Old')"
+        ).lastrowid
+        db.commit()
+        auth._user_cache.delete(user_id)
+        assert get_user(user_id)["business_name"] == "Old"
+        assert "password_hash" not in get_user(user_id)
+        db.execute("UPDATE users SET business_name = 'New' WHERE id = ?", (user_id,))
+        db.commit()
+        assert get_user(user_id)["business_name"] == "Old"
+        invalidate_user(user_id)
+        assert get_user(user_id)["business_name"] == "New"
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: clock[0])
+    cache = TTLCache("test", ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    clock[0] += 11
+    assert cache.get("a") is None and "c" not in cache
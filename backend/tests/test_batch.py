@@ -0,0 +1,57 @@
+import json
+import pytest
+from app.batch import parse_batch_request
+from app.config import Config
+
+def test_request_validation():
+    params = parse_batch_request({"locations": [" London ", "London", "Leeds"], "categories": ["cafe", "cafe"]})
+    assert params == {"locations": ["London", "Leeds"], "categories": ["cafe"],
+                      "analyses": ["competitors", "heatmap"], "radius": None}
+    for bad in (
+        {"locations": [], "categories": ["cafe"]},
+        {"locations": ["London"], "categories": [""]},
+        {"locations": ["London"], "categories": ["cafe"], "analyses": ["weather"]},
+        {"locations": ["London"], "categories": ["cafe"], "radius": True},
+        {"locations": ["London"], "categories": ["cafe"], "radius": -1},
+        {"locations": [f"loc {i}" for i in range(Config.BATCH_MAX_CELLS + 1)], "categories": ["cafe"]},
+    ):
+        with pytest.raises(ValueError):
+            parse_batch_request(bad)
+
+def test_geocodes_searches_and_details_are_planned_once(api, auth_header, maps):
+    # "London" geocodes to 51.5,-0.12; the second literal is about 33 m north of it
+    body = {"locations": ["London", "51.5,-0.12", "51.5003,-0.12", "52.0,-1.0"],
+            "categories": ["cafe", "gym"], "radius": 800}
+    response = api.test_client().post("/batch-analysis", headers=auth_header(), json=body)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["cells"]) == 8
+    # One geocode and one search per category for the three nearby locations plus one for the far
+    # one. The fake returns the same place ids for every search of a category, so Details runs
+    # once per distinct place across all cells
+    assert data["stats"] == {"cells": 8, "geocodes": 1, "searches": 4, "details": 6}
+    assert maps.calls == {"geocode": 1, "places_nearby": 4, "place": 6}
+    assert {s["radius"] for s in maps.searches} == {800}
+    cells = {(c["location"], c["category"]): c for c in data["cells"]}
+    shared = cells[("51.5003,-0.12", "cafe")]
+    assert shared["center"] == {"lat": 51.5003, "lng": -0.12}
+    assert shared["competitors"]["details"] == cells[("London", "cafe")]["competitors"]["details"]
+    assert shared["heatmap"]["count"] == 3
+
+def test_results_are_saved_as_competitor_insights(api, auth_header, maps):
+    from app.database import get_db
+    api.test_client().post("/batch-analysis", headers=auth_header(),
+                           json={"locations": ["51.5,-0.12"], "categories": ["cafe"], "analyses": ["competitors"]})
+    with api.app_context():
+        rows = get_db().execute("SELECT location, category, total FROM competitor_insights").fetchall()
+    assert [tuple(r) for r in rows] == [("51.5,-0.12", "cafe", 3)]
+
+def test_stream_sends_one_line_per_cell_then_stats(api, auth_header, maps):
+    response = api.test_client().post("/batch-analysis", headers=auth_header(), json={
+        "locations": ["51.5,-0.12", "52.0,-1.0"], "categories": ["cafe"], "analyses": ["heatmap"], "stream": True, "save": False
+    })
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert sorted(line["location"] for line in lines[:-1]) == ["51.5,-0.12", "52.0,-1.0"]
+    assert lines[-1] == {"stats": {"cells": 2, "geocodes": 0, "searches": 2, "details": 0}}
+    assert "place" not in maps.calls
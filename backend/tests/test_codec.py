@@ -0,0 +1,43 @@
+import json
+from app.codec import MAGIC, LazyJSON, decode_json, decode_json_text, encode_json, migrate_json_columns
+
+DATA = {"points": [{"lat": 51.5, "lng": -0.12, "weight": 3}], "label": "café", "empty": None}
+
+def test_round_trip():
+    blob = encode_json(DATA)
+    assert blob.startswith(MAGIC)
+    assert decode_json(blob) == DATA
+    assert decode_json(memoryview(blob)) == DATA
+    assert json.loads(decode_json_text(blob)) == DATA
+
+def test_none_and_legacy_text_decode():
+    assert encode_json(None) is None
+    assert decode_json(None) is None
+    assert decode_json(json.dumps(DATA)) == DATA
+    assert decode_json(json.dumps(DATA).encode("utf-8")) == DATA
+
+def test_lazy_json_decodes_on_first_access():
+    lazy = LazyJSON(encode_json(DATA))
+    assert lazy._data is None
+    assert bool(lazy)
+    assert lazy._data is None
+    assert lazy["label"] == "café"
+    assert set(lazy) == set(DATA) and len(lazy) == len(DATA)
+    assert lazy.to_python() == DATA
+
+def test_lazy_json_over_missing_blob_is_empty():
+    lazy = LazyJSON(None)
+    assert not lazy
+    assert lazy.to_python() == {}
+
+def test_migration_re_encodes_only_legacy_text(db):
+    db.execute("INSERT INTO heatmap_data (user_id, location, category, heatmap_data) VALUES (1, 'a', 'cafe', ?)",
+               (json.dumps(DATA),))
+    db.execute("INSERT INTO heatmap_data (user_id, location, category, heatmap_data) VALUES (1, 'b', 'cafe', ?)",
+               (encode_json({"already": True}),))
+    db.execute("INSERT INTO heatmap_data (user_id, location, category, heatmap_data) VALUES (1, 'c', 'cafe', 'not json')")
+    assert migrate_json_columns(db.cursor(), [("heatmap_data", "heatmap_data")]) == 1
+    rows = {r["location"]: r["heatmap_data"] for r in db.execute("SELECT location, heatmap_data FROM heatmap_data")}
+    assert decode_json(rows["a"]) == DATA
+    assert decode_json(rows["b"]) == {"already": True}
+    assert rows["c"] == "not json"
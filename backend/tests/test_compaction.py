@@ -0,0 +1,98 @@
+import gzip
+import json
+import sqlite3
+import pytest
+from app.codec import encode_json
+from app.compaction import compact, duplicate_ids, expired_ids
+
+RETENTION = {"heatmap_data": 30, "landmark_data": 30, "competitor_insights": 30, "business_strategies": 30}
+
+@pytest.fixture
+def conn(app):
+    connection = sqlite3.connect(app.config["DATABASE_PATH"], isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    yield connection
+    connection.close()
+
+def add_heatmap(conn, data, location="Town", user_id=1, days_old=0):
+    return conn.execute(
+        "INSERT INTO heatmap_data (user_id, location, category, heatmap_data, created_at) "
+        "VALUES (?, ?, 'cafe', ?, datetime('now', ?))",
+        (user_id, location, encode_json(data), f"-{days_old} days")
+    ).lastrowid
+
+def add_insight(conn, place_ids, total=2, user_id=1):
+    insight_id = conn.execute(
+        "INSERT INTO competitor_insights (user_id, location, category, total, avg_rating, avg_reviews) "
+        "VALUES (?, 'Town', 'cafe', ?, 4.0, 10)", (user_id, total)
+    ).lastrowid
+    for place_id in place_ids:
+        conn.execute("INSERT OR IGNORE INTO places (place_id, name) VALUES (?, ?)", (place_id, place_id))
+        conn.execute("INSERT INTO insight_places (insight_id, place_id) VALUES (?, ?)", (insight_id, place_id))
+    return insight_id
+
+def ids(conn, table):
+    return [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+def run(app, tmp_path, **kwargs):
+    options = dict(retention_days=RETENTION, search_days=0, places_days=0,
+                   archive_dir=str(tmp_path / "archive"), run_vacuum=False)
+    options.update(kwargs)
+    return compact(app.config["DATABASE_PATH"], **options)
+
+def test_identical_results_keep_only_the_newest(conn):
+    first = add_heatmap(conn, {"count": 3})
+    add_heatmap(conn, {"count": 3})
+    newest = add_heatmap(conn, {"count": 3})
+    changed = add_heatmap(conn, {"count": 4})
+    other_user = add_heatmap(conn, {"count": 3}, user_id=2)
+    duplicates = duplicate_ids(conn, "heatmap_data")
+    assert first in duplicates and newest - 1 in duplicates
+    assert newest not in duplicates and changed not in duplicates and other_user not in duplicates
+
+def test_insights_are_duplicates_only_with_the_same_places(conn):
+    old = add_insight(conn, ["a", "b"])
+    add_insight(conn, ["a", "c"])
+    add_insight(conn, ["a", "c"])
+    assert duplicate_ids(conn, "competitor_insights") == [old + 1]
+
+def test_expiry_always_keeps_the_newest_of_a_group(conn):
+    stale = add_heatmap(conn, {"count": 1}, days_old=90)
+    add_heatmap(conn, {"count": 2}, days_old=60)
+    add_heatmap(conn, {"count": 5}, location="Village", days_old=90)
+    assert expired_ids(conn, "heatmap_data", 30) == [stale]
+    # No retention configured for the table means nothing expires
+    assert expired_ids(conn, "heatmap_data", 0) == []
+
+def test_compact_archives_what_it_expires(app, conn, tmp_path):
+    stale = add_heatmap(conn, {"count": 1}, days_old=90)
+    add_heatmap(conn, {"count": 1}, days_old=90)
+    kept = add_heatmap(conn, {"count": 2})
+    report = run(app, tmp_path)
+    assert report["deduplicated"]["heatmap_data"] == 1
+    assert report["expired"]["heatmap_data"] == 1
+    assert ids(conn, "heatmap_data") == [kept]
+    (archive,) = report["archives"]
+    with gzip.open(archive, "rt") as f:
+        archived = [json.loads(line) for line in f]
+    # The duplicate went first, so the archived row is the surviving copy of the old result
+    assert [(r["id"], r["heatmap_data"]) for r in archived] == [(stale + 1, {"count": 1})]
+
+def test_compact_removes_link_rows_with_their_insight(app, conn, tmp_path):
+    old = add_insight(conn, ["a", "b"])
+    new = add_insight(conn, ["a", "b"])
+    run(app, tmp_path)
+    assert ids(conn, "competitor_insights") == [new]
+    links = conn.execute("SELECT insight_id, place_id FROM insight_places ORDER BY place_id").fetchall()
+    assert [tuple(row) for row in links] == [(new, "a"), (new, "b")]
+    assert old not in ids(conn, "competitor_insights")
+
+def test_dry_run_changes_nothing(app, conn, tmp_path):
+    add_heatmap(conn, {"count": 1}, days_old=90)
+    add_heatmap(conn, {"count": 1}, days_old=90)
+    add_heatmap(conn, {"count": 2})
+    report = run(app, tmp_path, dry_run=True)
+    assert report["deduplicated"]["heatmap_data"] == 1
+    assert len(ids(conn, "heatmap_data")) == 3
+    assert report["archives"] == []
+    assert not (tmp_path / "archive").exists()
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+import pytest
+from app.codec import encode_json
+from app.database import get_db
+from app.endpoints import export_endpoints
+from app.export import export_stream
+
+def add_heatmaps(api, user_id, count):
+    with api.app_context():
+        db = get_db()
+        for i in range(count):
+            db.execute(
+                "INSERT INTO heatmap_data (user_id, location, category, heatmap_data) VALUES (?, ?, ?, ?)",
+                (user_id, f"loc {i}", "cafe", encode_json({"points": [[51.5, -0.12, i]], "label": "a,\"b\""}))
+            )
+        db.commit()
+
+def test_ndjson_is_one_decoded_row_per_line_in_id_order(api, auth_header):
+    headers = auth_header()
+    add_heatmaps(api, 1, 5)
+    add_heatmaps(api, 2, 2)
+    response = api.test_client().get("/export?dataset=heatmaps&format=ndjson", headers=headers)
+    assert response.status_code == 200 and response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="heatmaps.ndjson"'
+    rows = [json.loads(line) for line in response.data.splitlines()]
+    assert [r["location"] for r in rows] == [f"loc {i}" for i in range(5)]
+    assert rows[2]["heatmap_data"] == {"points": [[51.5, -0.12, 2]], "label": "a,\"b\""}
+
+def test_after_id_resumes_the_export(api, auth_header):
+    headers = auth_header()
+    add_heatmaps(api, 1, 4)
+    first = [json.loads(line) for line in api.test_client().get("/export?dataset=heatmaps", headers=headers).data.splitlines()]
+    rest = api.test_client().get(f"/export?dataset=heatmaps&after_id={first[1]['id']}", headers=headers)
+    assert [json.loads(line)["id"] for line in rest.data.splitlines()] == [r["id"] for r in first[2:]]
+
+def test_csv_has_one_header_and_json_columns_as_text(api, auth_header):
+    headers = auth_header()
+    add_heatmaps(api, 1, 3)
+    response = api.test_client().get("/export?dataset=heatmaps&format=csv", headers=headers)
+    assert response.mimetype == "text/csv"
+    rows = list(csv.reader(io.StringIO(response.data.decode("utf-8"))))
+    assert rows[0] == ["id", "location", "category", "heatmap_data", "created_at"]
+    assert len(rows) == 4
+    assert json.loads(rows[1][3]) == {"points": [[51.5, -0.12, 0]], "label": "a,\"b\""}
+
+def test_rows_are_read_in_batches(api):
+    add_heatmaps(api, 1, 5)
+    with api.app_context():
+        ndjson = list(export_stream(get_db(), "heatmaps", "ndjson", 1, batch_size=2))
+        csv_chunks = list(export_stream(get_db(), "heatmaps", "csv", 1, batch_size=2))
+        empty = list(export_stream(get_db(), "heatmaps", "csv", 99, batch_size=2))
+    assert [chunk.count(b"\n") for chunk in ndjson] == [2, 2, 1]
+    # The header goes out with the first batch
+    assert len(csv_chunks) == 3 and csv_chunks[0].startswith(b"id,location")
+    assert empty == [b"id,location,category,heatmap_data,created_at\r\n"]
+
+def test_arrow_stream_reads_back(api, auth_header):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    headers = auth_header()
+    add_heatmaps(api, 1, 3)
+    response = api.test_client().get("/export?dataset=heatmaps&format=arrow", headers=headers)
+    assert response.mimetype == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.num_rows == 3
+    assert table.schema.field("id").type == pa.int64()
+    assert json.loads(table.column("heatmap_data")[0].as_py())["points"] == [[51.5, -0.12, 0]]
+
+def test_bad_requests(api, auth_header, monkeypatch):
+    client, headers = api.test_client(), auth_header()
+    assert client.get("/export?dataset=users", headers=headers).status_code == 400
+    assert client.get("/export?dataset=heatmaps&format=xml", headers=headers).status_code == 400
+    assert client.get("/export?dataset=heatmaps").status_code == 401
+    monkeypatch.setattr(export_endpoints, "pa", None)
+    assert client.get("/export?dataset=heatmaps&format=arrow", headers=headers).status_code == 501
@@ -0,0 +1,84 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from app.endpoints import landmark_endpoints
+from app.footfall import candidate_grid, from_local_xy, kernel_density, pick_top, score_sites, to_local_xy
+
+CENTER = {"lat": 51.5, "lng": -0.12}
+OPTIONS = dict(category_weights={"schools": 1.0}, grid_step=100, bandwidth=300, competitor_weight=-2.0)
+
+def offset(east, north):
+    lat, lng = from_local_xy(east, north, CENTER["lat"], CENTER["lng"])
+    return {"lat": float(lat), "lng": float(lng), "user_ratings_total": 50}
+
+def test_local_projection_round_trips():
+    lat, lng = from_local_xy(1200.0, -800.0, CENTER["lat"], CENTER["lng"])
+    x, y = to_local_xy(lat, lng, CENTER["lat"], CENTER["lng"])
+    assert (round(float(x), 6), round(float(y), 6)) == (1200.0, -800.0)
+
+def test_candidate_grid_stays_inside_the_radius():
+    cx, cy = candidate_grid(500, 100)
+    assert np.all(cx ** 2 + cy ** 2 <= 500 ** 2)
+    inside = [(x, y) for x in range(-500, 501, 100) for y in range(-500, 501, 100) if x * x + y * y <= 500 ** 2]
+    assert len(cx) == len(inside)
+    assert (0.0, 500.0) in set(zip(cx.tolist(), cy.tolist()))
+
+def test_kernel_density_matches_the_formula_across_chunks():
+    cx, cy = np.array([0.0, 300.0, 600.0]), np.array([0.0, 0.0, 0.0])
+    px, py, w = np.array([0.0, 300.0]), np.array([0.0, 0.0]), np.array([2.0, 1.0])
+    scores = kernel_density(cx, cy, px, py, w, bandwidth=300, chunk=2)
+    expected = [2 + math.exp(-0.5), 2 * math.exp(-0.5) + 1, 2 * math.exp(-2) + math.exp(-0.5)]
+    assert np.allclose(scores, expected)
+    assert not kernel_density(cx, cy, np.array([]), np.array([]), np.array([]), 300).any()
+
+def test_pick_top_keeps_sites_apart_and_skips_non_positive():
+    cx, cy = np.array([0.0, 100.0, 1000.0, 2000.0]), np.zeros(4)
+    assert pick_top(cx, cy, np.array([5.0, 4.0, 3.0, -1.0]), k=3, min_separation=600) == [0, 2]
+
+def test_sites_follow_landmarks_and_avoid_competitors():
+    landmarks = {"schools": [offset(800, 0), offset(850, 50), offset(-800, 0), offset(-850, 50)]}
+    sites = score_sites(CENTER, landmarks, [], radius=1500, top_k=2, **OPTIONS)
+    assert len(sites) == 2 and {s["landmarks_nearby"]["schools"] for s in sites} == {2}
+    # Competitors around the eastern cluster push the best site to the west
+    crowded = score_sites(CENTER, landmarks, [offset(820, 20)] * 3, radius=1500, top_k=2, **OPTIONS)
+    best = crowded[0]
+    x, _ = to_local_xy(best["lat"], best["lng"], CENTER["lat"], CENTER["lng"])
+    assert float(x) < 0 and best["competitors_nearby"] == 0
+    assert crowded[0]["score"] >= crowded[-1]["score"]
+
+@pytest.fixture
+def landmark_calls(monkeypatch):
+    calls = {}
+
+    def nearby(location, keyword=None, radius=None, fields=None, **kwargs):
+        calls["competitor_radius"] = radius
+        return pd.DataFrame([{"lat": 51.5, "lng": -0.12}]), None
+
+    def sweep(location, categories, api_key, radius=None):
+        calls["sweep_radius"] = radius
+        return {"schools": [{"name": "School", "geometry": {"location": {"lat": 51.5, "lng": -0.12}}}]}, {}
+
+    def score(center, landmarks, competitors, radius, **kwargs):
+        calls["grid_radius"] = radius
+        return []
+
+    monkeypatch.setattr(landmark_endpoints, "geocode_location", lambda location: ({"lat": 51.5, "lng": -0.12}, None))
+    monkeypatch.setattr(landmark_endpoints, "sweep_landmarks", sweep)
+    monkeypatch.setattr(landmark_endpoints, "get_nearby_places", nearby)
+    monkeypatch.setattr(landmark_endpoints, "score_sites", score)
+    monkeypatch.setattr(landmark_endpoints, "call_groq_ai", lambda prompt, system_message=None: "explanation")
+    return calls
+
+def test_competitor_search_uses_the_grid_radius(api, auth_header, landmark_calls):
+    response = api.test_client().post("/landmark-mapper", headers=auth_header(),
+                                      json={"business": "cafe", "location": "London", "radius": 8000})
+    assert response.status_code == 200
+    assert landmark_calls == {"sweep_radius": 8000, "competitor_radius": 8000, "grid_radius": 8000}
+
+@pytest.mark.parametrize("radius", [0, -5, 10001, True, "500", 2.5])
+def test_invalid_radius_is_rejected(api, auth_header, landmark_calls, radius):
+    response = api.test_client().post("/landmark-mapper", headers=auth_header(),
+                                      json={"business": "cafe", "location": "London", "radius": radius})
+    assert response.status_code == 400
+    assert landmark_calls == {}
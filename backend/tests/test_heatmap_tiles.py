@@ -0,0 +1,56 @@
+import math
+import numpy as np
+from app.heatmap_tiles import TILE_SIZE, aggregate_grid, aggregate_tile, point_weights, project, unproject
+
+def tile_of(lat, lng, zoom):
+    px, py = project(lat, lng, zoom)
+    return int(px // TILE_SIZE), int(py // TILE_SIZE)
+
+def test_projection_matches_the_standard_tile_scheme():
+    px, py = project(0.0, 0.0, 0)
+    assert (float(px), float(py)) == (128.0, 128.0)
+    # London at zoom 10 is slippy-map tile 511/340
+    assert tile_of(51.5074, -0.1278, 10) == (511, 340)
+    # Latitudes past the Mercator limit clamp to the edge of the world
+    assert abs(float(project(89.9, 0.0, 3)[1])) < 1e-6
+
+def test_unproject_inverts_project():
+    lat, lng = unproject(*project([51.5, -33.9], [-0.12, 151.2], 14), 14)
+    assert np.allclose(lat, [51.5, -33.9]) and np.allclose(lng, [-0.12, 151.2])
+
+def test_tile_cells_count_only_points_inside_the_tile():
+    zoom = 15
+    x, y = tile_of(51.5, -0.12, zoom)
+    lat, lng = unproject((x + 0.1) * TILE_SIZE, (y + 0.1) * TILE_SIZE, zoom)
+    inside = {"lat": float(lat), "lng": float(lng)}
+    outside_lat, outside_lng = unproject((x + 1.5) * TILE_SIZE, (y + 0.5) * TILE_SIZE, zoom)
+    points = [inside, dict(inside), {"lat": float(outside_lat), "lng": float(outside_lng)}]
+    (cell,) = aggregate_tile(points, zoom, x, y, cell_px=32)
+    assert cell["count"] == 2 and cell["weight"] == 2
+    # The cell is reported at its centre, 16 px into the tile
+    centre_lat, centre_lng = unproject(x * TILE_SIZE + 16, y * TILE_SIZE + 16, zoom)
+    assert (cell["lat"], cell["lng"]) == (round(float(centre_lat), 6), round(float(centre_lng), 6))
+    assert aggregate_tile(points, zoom, x + 5, y, cell_px=32) == []
+
+def test_tile_payload_is_bounded_by_the_cell_size():
+    rng = np.random.default_rng(7)
+    zoom = 12
+    x, y = tile_of(51.5, -0.12, zoom)
+    lat, lng = unproject(x * TILE_SIZE + rng.uniform(0, TILE_SIZE, 5000), y * TILE_SIZE + rng.uniform(0, TILE_SIZE, 5000), zoom)
+    points = [{"lat": float(a), "lng": float(b)} for a, b in zip(lat, lng)]
+    cells = aggregate_tile(points, zoom, x, y, cell_px=64)
+    assert len(cells) <= (TILE_SIZE // 64) ** 2
+    assert sum(c["count"] for c in cells) == 5000
+
+def test_grid_covers_every_point_once():
+    points = [{"lat": 51.5 + i * 0.001, "lng": -0.12 - i * 0.002, "rating": 4.0} for i in range(40)]
+    cells = aggregate_grid(points, 13, cell_px=16, weight="rating")
+    assert sum(c["count"] for c in cells) == 40
+    assert math.isclose(sum(c["weight"] for c in cells), 160.0)
+    assert aggregate_grid([], 13) == []
+
+def test_weight_modes():
+    points = [{"rating": 4.5, "user_ratings_total": 99}, {"rating": None}]
+    assert point_weights(points, "none").tolist() == [1.0, 1.0]
+    assert point_weights(points, "rating").tolist() == [4.5, 0.0]
+    assert np.allclose(point_weights(points, "reviews"), [math.log(100), 0.0])
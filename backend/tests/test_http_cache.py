@@ -0,0 +1,66 @@
+import requests
+from app import groq_ai
+from app.database import get_db
+from app.http_cache import invalidate
+
+def add_report(api, user_id, name):
+    with api.app_context():
+        db = get_db()
+        db.execute("INSERT INTO generated_reports (user_id, report_name, report_path) VALUES (?, ?, 'r.pdf')", (user_id, name))
+        db.commit()
+
+def test_unchanged_resource_revalidates_with_304(api, auth_header):
+    client = api.test_client()
+    headers = auth_header()
+    add_report(api, 1, "first")
+    response = client.get("/reports", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    revalidated = client.get("/reports", headers={**headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+    # Weak comparison: the strong form of the same tag matches too
+    strong = client.get("/reports", headers={**headers, "If-None-Match": etag[2:]})
+    assert strong.status_code == 304
+
+def test_invalidate_after_a_write_returns_the_new_representation(api, auth_header):
+    client = api.test_client()
+    headers = auth_header()
+    add_report(api, 1, "first")
+    etag = client.get("/reports", headers=headers).headers["ETag"]
+    add_report(api, 1, "second")
+    invalidate("reports", 1)
+    response = client.get("/reports", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [r["report_name"] for r in response.get_json()["reports"]] == ["second", "first"]
+
+def test_validators_are_per_user_and_per_query(api, auth_header):
+    client = api.test_client()
+    owner, other = auth_header("owner"), auth_header("other")
+    add_report(api, 1, "first")
+    etag = client.get("/reports", headers=owner).headers["ETag"]
+    assert client.get("/reports", headers={**other, "If-None-Match": etag}).status_code == 200
+    assert client.get("/reports?limit=5", headers={**owner, "If-None-Match": etag}).status_code == 200
+
+def test_failed_completion_is_not_given_a_validator(api, auth_header, monkeypatch):
+    with api.app_context():
+        db = get_db()
+        db.execute("INSERT INTO competitor_insights (user_id, location, category, total) VALUES (1, 'Town', 'cafe', 1)")
+        db.execute("INSERT INTO places (place_id, name, rating) VALUES ('p1', 'Cafe One', 4.2)")
+        db.execute("INSERT INTO insight_places (insight_id, place_id) VALUES (1, 'p1')")
+        db.commit()
+
+    def unavailable(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("groq is down")
+    monkeypatch.setattr(groq_ai.requests, "post", unavailable)
+
+    client = api.test_client()
+    headers = auth_header()
+    response = client.get("/competitor-strategy?location=Town&category=cafe", headers=headers)
+    assert response.status_code == 502
+    assert "groq is down" in response.get_json()["error"]
+    assert "ETag" not in response.headers
@@ -0,0 +1,59 @@
+from app import quota as quota_module
+from app.quota import QuotaExceeded
+
+URL = "/competitor-insights?location=51.5,-0.12&category=cafe"
+
+def test_incremental_refresh_only_re_enriches_changed_places(api, auth_header, maps):
+    client = api.test_client()
+    headers = auth_header()
+    full = client.get(URL, headers=headers).get_json()
+    assert full["total"] == 3 and maps.calls["place"] == 3
+
+    # One new place and one place with new reviews since the full run
+    maps.count = 4
+    search = maps.places_nearby
+
+    def changed(**kwargs):
+        result = search(**kwargs)
+        result["results"][0]["user_ratings_total"] += 5
+        return result
+    maps.places_nearby = changed
+
+    refreshed = client.get(URL + "&refresh=incremental", headers=headers).get_json()
+    assert refreshed["total"] == 4
+    assert refreshed["refresh"]["mode"] == "incremental"
+    assert sorted(refreshed["refresh"]["refreshed"]) == ["cafe-0", "cafe-3"]
+    assert sorted(refreshed["refresh"]["carried_forward"]) == ["cafe-1", "cafe-2"]
+    assert refreshed["refresh"]["deferred"] == [] and refreshed["refresh"]["removed"] == []
+    assert maps.calls["place"] == 5
+    # Carried-forward places keep the enrichment stored by the full run
+    carried = next(p for p in refreshed["details"] if p["place_id"] == "cafe-1")
+    assert carried["summaries"]["positive_summary"]
+    assert carried["top_reviews"]
+
+def test_places_that_disappear_are_reported_removed(api, auth_header, maps):
+    client = api.test_client()
+    headers = auth_header()
+    client.get(URL, headers=headers)
+    maps.count = 2
+    refreshed = client.get(URL + "&refresh=incremental", headers=headers).get_json()
+    assert refreshed["refresh"]["removed"] == ["cafe-2"]
+    assert refreshed["total"] == 2
+    assert maps.calls["place"] == 3
+
+def test_out_of_quota_places_are_deferred_with_stored_data(api, auth_header, maps, monkeypatch):
+    client = api.test_client()
+    headers = auth_header()
+    client.get(URL, headers=headers)
+    maps.count = 4
+    real_spend = quota_module.quota.spend
+
+    def no_details(sku):
+        if sku == "place_details":
+            raise QuotaExceeded("Daily Google API budget used up", "budget", 60)
+        return real_spend(sku)
+    monkeypatch.setattr(quota_module.quota, "spend", no_details)
+    refreshed = client.get(URL + "&refresh=incremental", headers=headers).get_json()
+    assert refreshed["refresh"]["deferred"] == ["cafe-3"]
+    assert sorted(refreshed["refresh"]["carried_forward"]) == ["cafe-0", "cafe-1", "cafe-2"]
+    assert refreshed["total"] == 4
@@ -0,0 +1,51 @@
+import threading
+import pytest
+from app import landmarks
+from app.config import Config
+from app.landmarks import parse_categories, search_nearby, sweep_landmarks
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+def test_categories_run_concurrently_and_failures_stay_isolated(monkeypatch):
+    categories = {"Schools": "school", "Stations": "train_station", "Malls": "shopping_mall"}
+    # Every search waits for the others, so this only completes if they run at the same time
+    barrier = threading.Barrier(len(categories), timeout=5)
+    calls = []
+
+    def fake_search(location, place_type, api_key, radius, timeout):
+        calls.append((location, place_type, radius))
+        barrier.wait()
+        if place_type == "shopping_mall":
+            raise RuntimeError("Places API status OVER_QUERY_LIMIT")
+        return [{"name": f"{place_type} 1"}]
+    monkeypatch.setattr(landmarks, "search_nearby", fake_search)
+
+    results, errors = sweep_landmarks("1.0,2.0", categories, "key", radius=2500)
+    assert results == {"Schools": [{"name": "school 1"}], "Stations": [{"name": "train_station 1"}]}
+    assert errors == {"Malls": "Places API status OVER_QUERY_LIMIT"}
+    assert sorted(calls) == sorted(("1.0,2.0", t, 2500) for t in categories.values())
+
+def test_no_categories_makes_no_calls():
+    assert sweep_landmarks("1.0,2.0", {}, "key") == ({}, {})
+
+def test_search_status_errors_raise(monkeypatch):
+    monkeypatch.setattr(landmarks._session, "get", lambda *a, **k: FakeResponse({"status": "REQUEST_DENIED", "error_message": "bad key"}))
+    with pytest.raises(RuntimeError, match="REQUEST_DENIED: bad key"):
+        search_nearby("1.0,2.0", "school", "key")
+    monkeypatch.setattr(landmarks._session, "get", lambda *a, **k: FakeResponse({"status": "ZERO_RESULTS"}))
+    assert search_nearby("1.0,2.0", "school", "key") == []
+
+def test_parse_categories():
+    assert parse_categories(None) == dict(Config.LANDMARK_CATEGORIES)
+    assert parse_categories(["school", "gym"]) == {"school": "school", "gym": "gym"}
+    assert parse_categories({"Stations": "train_station"}) == {"Stations": "train_station"}
+    with pytest.raises(ValueError):
+        parse_categories("school")
@@ -0,0 +1,52 @@
+import json
+import os
+from app.metrics import Registry, merge_snapshots, read_snapshots, render, retire_snapshot
+
+def write_snapshot(directory, pid, requests, latency):
+    registry = Registry()
+    registry.inc("http_requests_total", {"endpoint": "/heatmap", "status": "200"}, requests)
+    registry.observe("http_request_duration_seconds", latency, {"endpoint": "/heatmap"})
+    with open(os.path.join(directory, f"metrics_{pid}.json"), "w") as f:
+        json.dump(registry.snapshot(), f)
+
+def totals(directory):
+    counters, histograms = merge_snapshots(read_snapshots(str(directory)))
+    requests = counters[("http_requests_total", (("endpoint", "/heatmap"), ("status", "200")))]
+    count = histograms[("http_request_duration_seconds", (("endpoint", "/heatmap"),))][2]
+    return requests, count
+
+def test_histogram_buckets_render_cumulatively():
+    registry = Registry(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        registry.observe("http_request_duration_seconds", value, {"endpoint": "/x"})
+    text = render(*merge_snapshots([registry.snapshot()]), buckets=(0.1, 1.0))
+    assert 'http_request_duration_seconds_bucket{endpoint="/x",le="0.1"} 1' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="/x",le="1.0"} 3' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="/x",le="+Inf"} 4' in text
+    assert 'http_request_duration_seconds_count{endpoint="/x"} 4' in text
+
+def test_workers_are_summed(tmp_path):
+    write_snapshot(tmp_path, 101, 5, 0.2)
+    write_snapshot(tmp_path, 102, 7, 0.3)
+    assert totals(tmp_path) == (12, 2)
+
+def test_retired_worker_counts_are_kept_once(tmp_path):
+    write_snapshot(tmp_path, 101, 5, 0.2)
+    write_snapshot(tmp_path, 102, 7, 0.3)
+    retire_snapshot(str(tmp_path), 101)
+    assert not (tmp_path / "metrics_101.json").exists()
+    assert totals(tmp_path) == (12, 2)
+    # Retiring twice, or a pid that never wrote a snapshot, changes nothing
+    retire_snapshot(str(tmp_path), 101)
+    retire_snapshot(str(tmp_path), 999)
+    assert totals(tmp_path) == (12, 2)
+
+def test_reused_pid_does_not_overwrite_a_dead_workers_counts(tmp_path):
+    write_snapshot(tmp_path, 101, 5, 0.2)
+    retire_snapshot(str(tmp_path), 101)
+    # A new worker gets the same pid and starts counting from zero
+    write_snapshot(tmp_path, 101, 1, 0.1)
+    assert totals(tmp_path) == (6, 2)
+    retire_snapshot(str(tmp_path), 101)
+    assert totals(tmp_path) == (6, 2)
+    assert sorted(p.name for p in tmp_path.glob("metrics_*.json")) == ["metrics_retired.json"]
@@ -0,0 +1,57 @@
+import sqlite3
+from flask import Flask
+from app.database import init_db
+
+LEGACY = '''
+    CREATE TABLE competitor_places (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, insight_id INTEGER NOT NULL, name TEXT, place_id TEXT,
+        lat REAL, lng REAL, rating REAL, user_ratings_total INTEGER, vicinity TEXT, types TEXT,
+        positive_summary TEXT, negative_summary TEXT, positive_highlight TEXT, negative_highlight TEXT
+    );
+    INSERT INTO competitor_places (insight_id, name, place_id, lat, lng, rating, user_ratings_total, types, positive_summary)
+    VALUES (1, 'A', 'p1', 1, 2, 4, 10, '[]', 'old'),
+           (2, 'A2', 'p1', 1, 2, 4.5, 12, '[]', NULL),
+           (2, 'B', 'p2', 1.1, 2, 3, 5, '[]', 'b');
+'''
+
+def legacy_app(tmp_path):
+    path = str(tmp_path / "market_research.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY)
+    conn.close()
+    application = Flask(__name__)
+    application.config.update(TESTING=True, DATABASE_PATH=path)
+    return application, path
+
+def migrate(application):
+    with application.app_context():
+        init_db()
+
+def snapshot(path):
+    conn = sqlite3.connect(path)
+    try:
+        kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'competitor_places'").fetchone()[0]
+        places = {row[0]: row[1:] for row in conn.execute(
+            "SELECT place_id, name, rating, user_ratings_total, positive_summary FROM places")}
+        links = set(conn.execute("SELECT insight_id, place_id FROM insight_places"))
+        view = conn.execute("SELECT insight_id, place_id, name FROM competitor_places ORDER BY insight_id, place_id").fetchall()
+        return kind, places, links, view
+    finally:
+        conn.close()
+
+def test_legacy_rows_fold_into_places_and_links(tmp_path):
+    application, path = legacy_app(tmp_path)
+    migrate(application)
+    kind, places, links, view = snapshot(path)
+    assert kind == "view"
+    # The latest copy wins, but a missing summary does not wipe out an earlier one
+    assert places == {"p1": ("A2", 4.5, 12, "old"), "p2": ("B", 3, 5, "b")}
+    assert links == {(1, "p1"), (2, "p1"), (2, "p2")}
+    assert view == [(1, "p1", "A2"), (2, "p1", "A2"), (2, "p2", "B")]
+
+def test_migration_is_idempotent(tmp_path):
+    application, path = legacy_app(tmp_path)
+    migrate(application)
+    before = snapshot(path)
+    migrate(application)
+    assert snapshot(path) == before
@@ -0,0 +1,34 @@
+from app.google_maps import PLACE_FIELDS, get_nearby_places
+
+def test_coordinate_only_fields_cost_one_nearby_search(api, maps):
+    with api.app_context():
+        df, error = get_nearby_places("London", keyword="cafe", fields=("lat", "lng"))
+    assert error is None
+    assert list(df.columns) == ["lat", "lng"] and len(df) == 3
+    assert maps.calls == {"geocode": 1, "places_nearby": 1}
+
+def test_review_fields_fetch_details_for_each_place(api, maps):
+    with api.app_context():
+        df, error = get_nearby_places("51.5,-0.12", keyword="cafe", fields=("name", "summaries"))
+    assert error is None
+    assert list(df.columns) == ["name", "summaries"]
+    assert maps.calls == {"places_nearby": 1, "place": 3}
+    assert all(s["positive_summary"] for s in df["summaries"])
+
+def test_default_is_every_field(api, maps):
+    with api.app_context():
+        df, _ = get_nearby_places("51.5,-0.12", keyword="cafe")
+    assert tuple(df.columns) == PLACE_FIELDS
+
+def test_unknown_fields_are_rejected_before_any_call(api, maps):
+    with api.app_context():
+        df, error = get_nearby_places("London", keyword="cafe", fields=("lat", "password"))
+    assert df is None and error == "Unknown place fields: password"
+    assert not maps.calls
+
+def test_repeat_search_is_answered_without_the_api(api, maps):
+    with api.app_context():
+        first, _ = get_nearby_places("51.5,-0.12", keyword="cafe", fields=("place_id", "lat", "lng"))
+        second, _ = get_nearby_places("51.5,-0.12", keyword="cafe", fields=("place_id", "lat", "lng"))
+    assert maps.calls["places_nearby"] == 1
+    assert sorted(second["place_id"]) == sorted(first["place_id"])
@@ -0,0 +1,37 @@
+import json
+
+URL = "/api/nearby-places?location=51.5,-0.12&keyword=cafe&stream=1"
+
+def read_lines(response):
+    return [json.loads(line) for line in response.data.splitlines()]
+
+def test_one_line_per_place_then_stats(api, auth_header, maps):
+    response = api.test_client().get(URL, headers=auth_header())
+    assert response.status_code == 200 and response.mimetype == "application/x-ndjson"
+    lines = read_lines(response)
+    assert sorted(p["place_id"] for p in lines[:-1]) == ["cafe-0", "cafe-1", "cafe-2"]
+    stats = lines[-1]["stats"]
+    assert stats["places"] == 3 and stats["enriched"] == 3 and stats["degraded"] is None
+    assert maps.calls == {"places_nearby": 1, "place": 3}
+
+def test_stream_matches_the_buffered_response(api, auth_header, maps):
+    client, headers = api.test_client(), auth_header()
+    buffered = client.get(URL.replace("&stream=1", ""), headers=headers).get_json()
+    streamed = read_lines(client.get(URL, headers=headers))[:-1]
+    by_id = {p["place_id"]: p for p in streamed}
+    assert all(by_id[p["place_id"]] == p for p in buffered)
+
+def test_fields_and_review_text_are_honoured(api, auth_header, maps):
+    client, headers = api.test_client(), auth_header()
+    coords = read_lines(client.get(URL + "&fields=place_id,lat,lng", headers=headers))
+    assert all(set(p) == {"place_id", "lat", "lng"} for p in coords[:-1])
+    assert "place" not in maps.calls
+    bare = read_lines(client.get(URL + "&include_reviews=0", headers=headers))
+    assert all(p["top_reviews"] and all("text" not in r for r in p["top_reviews"]) for p in bare[:-1])
+
+def test_errors_before_the_first_line_keep_their_status(api, auth_header, maps):
+    client, headers = api.test_client(), auth_header()
+    response = client.get(URL + "&fields=password", headers=headers)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Unknown place fields: password"}
+    assert not maps.calls
@@ -0,0 +1,62 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+from app.utils import decode_cursor, encode_cursor, keyset_page, parse_fields, parse_page_args
+
+def add_reports(db, user_id, stamps):
+    ids = []
+    for stamp in stamps:
+        ids.append(db.execute(
+            "INSERT INTO generated_reports (user_id, report_name, report_path, created_at) VALUES (?, ?, 'x.pdf', ?)",
+            (user_id, f"report {len(ids)}", stamp)
+        ).lastrowid)
+    db.commit()
+    return ids
+
+def all_pages(db, user_id, limit):
+    pages, after = [], None
+    while True:
+        rows, next_cursor, _ = keyset_page(db.cursor(), "generated_reports", ["id", "created_at"], user_id, limit, after)
+        pages.append([row["id"] for row in rows])
+        if not next_cursor:
+            return pages
+        after = decode_cursor(next_cursor)
+
+def test_pages_are_newest_first_and_break_ties_on_id(db):
+    # Three rows share a timestamp; a page boundary falls between them
+    ids = add_reports(db, 1, ["2024-01-01 10:00:00", "2024-01-02 10:00:00", "2024-01-02 10:00:00",
+                              "2024-01-02 10:00:00", "2024-01-03 10:00:00"])
+    add_reports(db, 2, ["2024-01-05 10:00:00"])
+    pages = all_pages(db, 1, 2)
+    assert pages == [[ids[4], ids[3]], [ids[2], ids[1]], [ids[0]]]
+
+def test_rows_inserted_during_paging_are_not_repeated(db):
+    add_reports(db, 1, ["2024-01-01 10:00:00", "2024-01-02 10:00:00", "2024-01-03 10:00:00"])
+    rows, next_cursor, _ = keyset_page(db.cursor(), "generated_reports", ["id"], 1, 2)
+    add_reports(db, 1, ["2024-01-04 10:00:00"])
+    rest, _, _ = keyset_page(db.cursor(), "generated_reports", ["id"], 1, 2, decode_cursor(next_cursor))
+    seen = [row["id"] for row in rows + rest]
+    assert len(seen) == len(set(seen)) == 3
+
+def test_projection_and_total(db):
+    add_reports(db, 1, ["2024-01-01 10:00:00", "2024-01-02 10:00:00", "2024-01-03 10:00:00"])
+    rows, _, total = keyset_page(db.cursor(), "generated_reports", ["report_name"], 1, 2)
+    assert total is None
+    assert all(set(row) == {"report_name"} for row in rows)
+    _, _, total = keyset_page(db.cursor(), "generated_reports", ["report_name"], 1, 2, include_total=True)
+    assert total == 3
+
+def test_page_args_default_to_a_bounded_page_without_total():
+    assert parse_page_args(MultiDict(), 20, 100) == {"limit": 20, "cursor": None, "include_total": False}
+    page = parse_page_args(MultiDict({"limit": "500", "include_total": "true"}), 20, 100)
+    assert page["limit"] == 100 and page["include_total"] is True
+    with pytest.raises(ValueError):
+        parse_page_args(MultiDict({"limit": "0"}), 20, 100)
+    with pytest.raises(ValueError):
+        parse_page_args(MultiDict({"cursor": "not-a-cursor"}), 20, 100)
+
+def test_cursor_round_trip_and_field_whitelist():
+    assert decode_cursor(encode_cursor("2024-01-02 10:00:00", 7)) == ("2024-01-02 10:00:00", 7)
+    assert parse_fields("id, report_name", {"id", "report_name"}, ["id"]) == ["id", "report_name"]
+    assert parse_fields(None, {"id"}, ["id"]) == ["id"]
+    with pytest.raises(ValueError):
+        parse_fields("id,password_hash", {"id"}, ["id"])
@@ -0,0 +1,80 @@
+import threading
+import time
+from flask import Flask, g
+from app.endpoints.profile_endpoints import profile_bp
+from app.profiling import ProfileStore, StackSampler, init_profiling
+
+ADMIN_TOKEN = "profile-admin-token"
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(200))
+
+def make_app(tmp_path, token=ADMIN_TOKEN, sample_rate=0.0):
+    application = Flask(__name__)
+    application.config.update(
+        PROFILE_DIR=str(tmp_path / "profiles"), PROFILE_MAX_BYTES=1024 * 1024,
+        PROFILE_ADMIN_TOKEN=token, PROFILE_SAMPLE_RATE=sample_rate, PROFILE_INTERVAL=0.002
+    )
+
+    @application.before_request
+    def set_request_id():
+        g.request_id = "req-1"
+
+    init_profiling(application)
+    application.register_blueprint(profile_bp)
+
+    @application.route("/slow")
+    def slow():
+        busy_loop(0.1)
+        return "done"
+
+    return application
+
+def test_sampler_records_the_target_threads_stack():
+    sampler = StackSampler(threading.get_ident(), 0.002)
+    sampler.start()
+    busy_loop(0.1)
+    sampler.stop()
+    assert sampler.samples > 5
+    folded = sampler.folded()
+    assert "busy_loop (test_profiling.py:" in folded
+    stack, count = folded.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+def test_store_prunes_oldest_and_rejects_paths(tmp_path):
+    store = ProfileStore(str(tmp_path), max_bytes=250)
+    names = []
+    for i in range(4):
+        names.append(store.save(f"r{i}", "/api/nearby-places", "x" * 100))
+        time.sleep(0.002)
+    kept = [p["name"] for p in store.list()]
+    assert kept == [names[3], names[2]]
+    assert store.path(names[3]) is not None
+    assert store.path(names[0]) is None
+    assert store.path("../" + names[3]) is None
+    assert store.path("secrets.txt") is None
+
+def test_admin_header_profiles_a_request_and_serves_it(tmp_path):
+    client = make_app(tmp_path).test_client()
+    assert client.get("/slow").status_code == 200
+    assert client.get("/profiles", headers={"X-Admin-Token": ADMIN_TOKEN}).get_json()["total"] == 0
+
+    client.get("/slow", headers={"X-Profile": ADMIN_TOKEN})
+    listing = client.get("/profiles", headers={"X-Admin-Token": ADMIN_TOKEN}).get_json()
+    assert listing["total"] == 1
+    name = listing["profiles"][0]["name"]
+    assert name.endswith("_req-1_slow.folded")
+    profile = client.get(f"/profiles/{name}", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert b"busy_loop" in profile.data
+
+def test_wrong_or_missing_tokens_are_rejected(tmp_path):
+    client = make_app(tmp_path).test_client()
+    client.get("/slow", headers={"X-Profile": "wrong"})
+    assert client.get("/profiles", headers={"X-Admin-Token": ADMIN_TOKEN}).get_json()["total"] == 0
+    assert client.get("/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.get("/profiles").status_code == 401
+    # With no admin token configured the endpoints stay closed
+    disabled = make_app(tmp_path, token="").test_client()
+    assert disabled.get("/profiles", headers={"X-Admin-Token": ""}).status_code == 401
@@ -0,0 +1,73 @@
+import pytest
+from app import quota as quota_module
+from app.quota import QuotaExceeded, QuotaManager, QuotaStore, SharedTokenBucket
+
+COSTS = {"geocoding": 0.005, "nearby_search": 0.032}
+
+@pytest.fixture
+def as_user():
+    """Charge spend() calls to a user, as auth_required does for a request."""
+    tokens = []
+
+    def set_user(user_id, endpoint="test"):
+        tokens.append((quota_module._user.set(user_id), quota_module._endpoint.set(endpoint)))
+    yield set_user
+    for user_token, endpoint_token in reversed(tokens):
+        quota_module._user.reset(user_token)
+        quota_module._endpoint.reset(endpoint_token)
+
+def make_manager(path, budget=0.0, rate=100, burst=100, max_wait=0.5):
+    return QuotaManager(str(path), rate=rate, burst=burst, sku_costs=COSTS, user_daily_budget=budget, max_wait=max_wait)
+
+def test_bucket_allows_burst_then_reports_wait(tmp_path):
+    bucket = SharedTokenBucket(QuotaStore(str(tmp_path / "quota.db")), "maps", rate=10, burst=2)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 0.1 + 1e-6
+
+def test_bucket_state_is_shared_between_stores(tmp_path):
+    # Two stores on one file stand in for two worker processes
+    path = str(tmp_path / "quota.db")
+    first = SharedTokenBucket(QuotaStore(path), "maps", rate=1, burst=1)
+    second = SharedTokenBucket(QuotaStore(path), "maps", rate=1, burst=1)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() > 0
+    assert second.acquire(timeout=0) is False
+
+def test_spend_records_usage_per_user_endpoint_and_sku(tmp_path, as_user):
+    manager = make_manager(tmp_path / "quota.db")
+    as_user(7, "heatmap.get_heatmap_data")
+    manager.spend("geocoding")
+    manager.spend("nearby_search")
+    manager.spend("nearby_search")
+    assert manager.spent_today(7) == pytest.approx(0.005 + 2 * 0.032)
+    usage = {(u["endpoint"], u["sku"]): u["calls"] for u in manager.usage(7)}
+    assert usage == {("heatmap.get_heatmap_data", "nearby_search"): 2, ("heatmap.get_heatmap_data", "geocoding"): 1}
+
+def test_spend_over_daily_budget_raises_with_retry_after(tmp_path, as_user):
+    manager = make_manager(tmp_path / "quota.db", budget=0.05)
+    as_user(7)
+    manager.spend("nearby_search")
+    with pytest.raises(QuotaExceeded) as raised:
+        manager.spend("nearby_search")
+    assert raised.value.reason == "budget"
+    assert raised.value.retry_after > 0
+    # The rejected call is not charged, and other users keep their own budget
+    assert manager.spent_today(7) == pytest.approx(0.032)
+    as_user(8)
+    manager.spend("nearby_search")
+
+def test_zero_budget_means_unlimited(tmp_path, as_user):
+    manager = make_manager(tmp_path / "quota.db", budget=0)
+    as_user(7)
+    for _ in range(50):
+        manager.spend("nearby_search")
+    assert manager.spent_today(7) == pytest.approx(50 * 0.032)
+
+def test_background_calls_never_wait_for_the_rate_limit(tmp_path):
+    manager = make_manager(tmp_path / "quota.db", rate=0.001, burst=1, max_wait=5)
+    manager.spend("geocoding")
+    with pytest.raises(QuotaExceeded) as raised:
+        manager.spend("geocoding")
+    assert raised.value.reason == "rate"
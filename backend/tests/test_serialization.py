@@ -0,0 +1,66 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+from app import compression
+from app.compression import choose_encoding, init_compression, parse_accept_encoding
+from app.json_provider import FastJSONProvider, dumps_bytes
+
+def make_app():
+    application = Flask(__name__)
+    application.json = FastJSONProvider(application)
+    application.config.update(COMPRESSION_MIN_SIZE=100, COMPRESSION_LEVEL=6)
+    init_compression(application)
+
+    @application.route("/big")
+    def big():
+        return jsonify({"rows": [{"name": "place", "rating": 4.5}] * 200})
+
+    @application.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    return application
+
+def test_numpy_pandas_and_datetime_values_serialize_directly():
+    frame = pd.DataFrame({"rating": [4.5, np.nan], "reviews": [10, 20]})
+    payload = {
+        "records": frame.to_dict(orient="records"),
+        "int": np.int64(3),
+        "array": np.arange(3),
+        "when": datetime(2024, 1, 2, 3, 4, 5),
+        "price": Decimal("1.25"),
+        "missing": pd.NaT,
+    }
+    decoded = json.loads(dumps_bytes(payload))
+    assert decoded["records"][0] == {"rating": 4.5, "reviews": 10}
+    assert decoded["records"][1]["rating"] is None
+    assert decoded["int"] == 3 and decoded["array"] == [0, 1, 2]
+    assert decoded["when"] == "2024-01-02T03:04:05"
+    assert decoded["price"] == 1.25 and decoded["missing"] is None
+
+def test_accept_encoding_negotiation(monkeypatch):
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0") is None
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip;q=0.8") == "gzip"
+    assert choose_encoding("*") == "gzip"
+
+def test_large_responses_are_compressed_and_small_ones_are_not():
+    client = make_app().test_client()
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(response.data))["rows"]) == 200
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["Server-Timing"].startswith("serialize;dur=")
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"ok": True}
+
+    response = client.get("/big")
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,30 @@
+from flask import Flask
+from app.cache import SQLiteCache
+
+def test_main_exposes_the_wsgi_app():
+    import main
+    import wsgi
+    assert isinstance(main.app, Flask)
+    assert main.app is wsgi.app
+
+def test_sqlite_cache_is_shared_between_workers(tmp_path):
+    # Two instances on one file stand in for two gunicorn workers
+    path = str(tmp_path / "shared_cache.db")
+    first = SQLiteCache("users", path, ttl=60)
+    second = SQLiteCache("users", path, ttl=60)
+    first.set(1, {"id": 1, "username": "owner"})
+    assert second.get(1) == {"id": 1, "username": "owner"}
+    second.delete(1)
+    assert first.get(1) is None
+    # Names are separate namespaces in the same file
+    SQLiteCache("places", path, ttl=60).set(1, "place")
+    assert first.get(1) is None
+
+def test_expired_entries_are_missing_everywhere(tmp_path, monkeypatch):
+    from app import cache
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: clock[0])
+    path = str(tmp_path / "shared_cache.db")
+    SQLiteCache("geocode", path, ttl=10).set("London", (51.5, -0.12))
+    clock[0] += 11
+    assert SQLiteCache("geocode", path, ttl=10).get("London") is None
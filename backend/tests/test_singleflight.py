@@ -0,0 +1,95 @@
+import threading
+import time
+import pytest
+from app.singleflight import SingleFlight, coalesce
+
+def run_concurrently(count, target):
+    results, errors = [None] * count, [None] * count
+
+    def call(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def slow_leader(release, calls, value):
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return value
+    return fn
+
+def test_concurrent_callers_share_one_execution():
+    group, release, calls = SingleFlight("test"), threading.Event(), []
+    fn = slow_leader(release, calls, {"places": [1, 2]})
+    threading.Timer(0.1, release.set).start()
+    results, errors = run_concurrently(4, lambda: group.do("key", fn))
+    assert calls == [1]
+    assert errors == [None] * 4
+    assert all(r == {"places": [1, 2]} for r in results)
+
+def test_every_caller_gets_its_own_copy():
+    group, release, calls = SingleFlight("test"), threading.Event(), []
+    fn = slow_leader(release, calls, {"places": [1, 2]})
+
+    def mutate():
+        result = group.do("key", fn)
+        # The leader returns first; its caller mutating the result must not reach the waiters
+        result["places"].append("mine")
+        return result
+    threading.Timer(0.1, release.set).start()
+    results, _ = run_concurrently(3, mutate)
+    assert calls == [1]
+    assert all(r["places"] == [1, 2, "mine"] for r in results)
+    assert len({id(r) for r in results}) == 3
+    assert len({id(r["places"]) for r in results}) == 3
+
+def test_errors_reach_every_waiter_and_nothing_is_cached():
+    group, release = SingleFlight("test"), threading.Event()
+
+    def failing():
+        release.wait(2)
+        raise RuntimeError("upstream down")
+    threading.Timer(0.1, release.set).start()
+    results, errors = run_concurrently(3, lambda: group.do("key", failing))
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert group.do("key", lambda: "fresh") == "fresh"
+
+def test_coalesce_keys_on_bound_arguments():
+    calls, release = [], threading.Event()
+
+    @coalesce("search")
+    def search(location, keyword=None, radius=1000):
+        calls.append((location, keyword, radius))
+        release.wait(2)
+        return [location]
+
+    # Defaults are bound and whitespace is normalised, so these share one execution
+    variants = iter([lambda: search("London", "cafe"),
+                     lambda: search(" London ", keyword="cafe", radius=1000)])
+    lock = threading.Lock()
+
+    def next_call():
+        with lock:
+            call = next(variants)
+        return call()
+    threading.Timer(0.1, release.set).start()
+    results, errors = run_concurrently(2, next_call)
+    assert errors == [None, None]
+    assert len(calls) == 1
+    assert results[0] == results[1] and results[0] is not results[1]
+    assert search.singleflight.name == "search"
+
+def test_different_keys_run_separately():
+    group = SingleFlight("test")
+    assert group.do("a", lambda: 1) == 1
+    assert group.do("b", lambda: 2) == 2
+    with pytest.raises(ValueError):
+        group.do("a", lambda: (_ for _ in ()).throw(ValueError("x")))
@@ -0,0 +1,37 @@
+from app.spatial import covering_search, record_search, places_within, METRES_PER_DEGREE, SEARCH_PAGE_SIZE
+
+TOLERANCE = 0.1
+MAX_AGE = 3600
+
+def north(metres):
+    return metres / METRES_PER_DEGREE
+
+def places(count, prefix="p"):
+    return [{"place_id": f"{prefix}{i}", "name": f"Place {i}", "lat": north(10 * i), "lng": 0.0, "types": ["cafe"]}
+            for i in range(count)]
+
+def test_partial_page_covers_circles_inside_it(db):
+    record_search(db, "cafe", 0.0, 0.0, 1000, places(5))
+    assert covering_search(db, "cafe", north(100), 0.0, 500, MAX_AGE, TOLERANCE) is not None
+    # 100 m off-centre plus 950 m reaches past the stored 1000 m circle
+    assert covering_search(db, "cafe", north(100), 0.0, 950, MAX_AGE, TOLERANCE) is None
+
+def test_full_page_only_covers_nearly_the_same_query(db):
+    record_search(db, "cafe", 0.0, 0.0, 1000, places(SEARCH_PAGE_SIZE))
+    assert covering_search(db, "cafe", north(50), 0.0, 1000, MAX_AGE, TOLERANCE) is not None
+    # A truncated page says nothing about what else lies inside a smaller circle
+    assert covering_search(db, "cafe", 0.0, 0.0, 500, MAX_AGE, TOLERANCE) is None
+    assert covering_search(db, "cafe", north(300), 0.0, 1000, MAX_AGE, TOLERANCE) is None
+
+def test_category_and_age_must_match(db):
+    record_search(db, "cafe", 0.0, 0.0, 1000, places(5))
+    assert covering_search(db, "gym", 0.0, 0.0, 500, MAX_AGE, TOLERANCE) is None
+    db.execute("UPDATE place_searches SET searched_at = datetime('now', '-2 hours')")
+    db.commit()
+    assert covering_search(db, "cafe", 0.0, 0.0, 500, MAX_AGE, TOLERANCE) is None
+
+def test_places_within_uses_the_stored_positions(db):
+    record_search(db, "cafe", 0.0, 0.0, 1000, places(5))
+    rows = places_within(db, 0.0, 0.0, 25, category="cafe")
+    assert [row["place_id"] for _, row in rows] == ["p0", "p1", "p2"]
+    assert [round(d) for d, _ in rows] == [0, 10, 20]
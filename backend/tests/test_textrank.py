@@ -0,0 +1,46 @@
+import numpy as np
+from app.textrank import textrank, extract_summary, review_corpora, split_sentences
+
+REVIEWS = [
+    "The coffee here is strong and the coffee beans are roasted fresh every morning.",
+    "Friendly staff serve great coffee with fresh pastries. Parking nearby is difficult.",
+    "Fresh coffee, fresh pastries and friendly staff make mornings better.",
+    "The music was loud on Saturday night.",
+]
+
+def test_scores_form_a_distribution():
+    scores = textrank(split_sentences(" ".join(REVIEWS)))
+    assert np.all(scores > 0)
+    assert abs(scores.sum() - 1.0) < 1e-6
+
+def test_central_sentences_outrank_outliers():
+    sentences = split_sentences(" ".join(REVIEWS))
+    scores = dict(zip(sentences, textrank(sentences)))
+    assert scores["Fresh coffee, fresh pastries and friendly staff make mornings better."] > scores["The music was loud on Saturday night."]
+
+def test_sentences_without_shared_words_rank_equally():
+    scores = textrank(["Apples grow on trees.", "Rivers flow into seas.", "Engines burn diesel fuel."])
+    assert np.allclose(scores, 1 / 3)
+
+def test_empty_input():
+    assert textrank([]).size == 0
+    assert extract_summary([]) == ""
+
+def test_summary_keeps_original_order_and_length():
+    summary = extract_summary(REVIEWS, sentences=2)
+    chosen = split_sentences(summary)
+    assert len(chosen) == 2
+    corpus = split_sentences(" ".join(REVIEWS))
+    assert [corpus.index(s) for s in chosen] == sorted(corpus.index(s) for s in chosen)
+    assert "The music was loud on Saturday night." not in chosen
+
+def test_short_and_duplicate_sentences_are_skipped():
+    summary = extract_summary(["Great!", "Lovely staff and quick service today.", "lovely staff and quick service today."], sentences=3)
+    assert summary == "Lovely staff and quick service today."
+
+def test_review_corpora_split_on_sentiment():
+    positive, negative = review_corpora([
+        {"text": "good", "sentiment": 0.4}, {"text": "bad", "sentiment": -0.2}, {"text": "plain"}
+    ])
+    assert positive == ["good", "plain"]
+    assert negative == ["bad"]
@@ -0,0 +1,46 @@
+import math
+from app.trend_rings import ring_counts
+from app.spatial import EARTH_RADIUS_M
+
+def north(metres):
+    return math.degrees(metres / EARTH_RADIUS_M)
+
+def place(metres, *types):
+    return {"place_id": f"p{metres}", "lat": north(metres), "lng": 0.0, "types": list(types)}
+
+PLACES = [
+    place(100, "cafe", "bakery"),
+    place(600, "cafe"),
+    place(2000, "gym"),
+    place(5000, "cafe"),  # outside every ring
+]
+
+def test_counts_are_cumulative_per_catchment():
+    rings = ring_counts(0.0, 0.0, PLACES, [500, 1000, 3000])
+    assert [r["radius"] for r in rings] == [500, 1000, 3000]
+    assert [r["establishments"] for r in rings] == [1, 2, 3]
+    assert rings[0]["counts"] == {"cafe": 1, "bakery": 1}
+    assert rings[1]["counts"] == {"cafe": 2, "bakery": 1}
+    assert rings[2]["counts"] == {"cafe": 2, "bakery": 1, "gym": 1}
+    assert rings[2]["top_categories"][0] == ("cafe", 2)
+
+def test_places_either_side_of_a_ring_boundary():
+    rings = ring_counts(0.0, 0.0, [place(999.5, "cafe"), place(1000.5, "gym")], [1000, 2000])
+    assert [r["counts"] for r in rings] == [{"cafe": 1}, {"cafe": 1, "gym": 1}]
+
+def test_rings_are_sorted_and_deduplicated():
+    rings = ring_counts(0.0, 0.0, PLACES, [3000, 500, 3000])
+    assert [r["radius"] for r in rings] == [500, 3000]
+
+def test_no_places_gives_empty_rings():
+    rings = ring_counts(0.0, 0.0, [], [500, 1000])
+    assert [(r["establishments"], r["counts"]) for r in rings] == [(0, {}), (0, {})]
+
+def test_matches_a_per_ring_distance_filter():
+    # The searchsorted/cumsum bucketing must agree with filtering each ring on its own
+    spread = [place(d, "cafe" if d % 3 else "gym") for d in range(50, 4000, 137)]
+    radii = [300, 900, 1500, 3500]
+    for ring in ring_counts(0.0, 0.0, spread, radii):
+        inside = [p for p in spread if int(p["place_id"][1:]) <= ring["radius"]]
+        assert ring["establishments"] == len(inside)
+        assert sum(ring["counts"].values()) == len(inside)
@@ -0,0 +1,69 @@
+from app import google_maps
+from app.warmup import CallBudget, WarmupScheduler, hot_pairs, warm_pair
+
+def add_query(db, location, category, hours_ago):
+    db.execute(
+        "INSERT INTO competitor_insights (user_id, location, category, total, created_at) "
+        "VALUES (1, ?, ?, 0, datetime('now', ?))", (location, category, f"-{hours_ago} hours")
+    )
+    db.commit()
+
+def test_hot_pairs_weigh_frequency_by_recency(db):
+    add_query(db, "London", "cafe", 1)
+    add_query(db, " london ", "cafe", 2)
+    add_query(db, "Leeds", "gym", 0)
+    for _ in range(3):
+        add_query(db, "York", "bar", 24 * 5)
+    add_query(db, "Bath", "spa", 24 * 30)
+    pairs = hot_pairs(db, window_days=14, half_life_hours=24, limit=10)
+    assert [(p["location"], p["category"], p["hits"]) for p in pairs] == [
+        ("London", "cafe", 2), ("Leeds", "gym", 1), ("York", "bar", 3)
+    ]
+    assert hot_pairs(db, window_days=14, half_life_hours=24, limit=1)[0]["location"] == "London"
+
+def test_warm_pair_pays_only_for_cache_misses(app, maps):
+    spent = []
+
+    def take(cost):
+        spent.append(cost)
+        return True
+    with app.app_context():
+        warm_pair("London", "cafe", take)
+        assert spent == [1, 1, 1, 1, 1]  # geocode, nearby search, three Details calls
+        assert maps.calls == {"geocode": 1, "places_nearby": 1, "place": 3}
+        spent.clear()
+        warm_pair("London", "cafe", take)
+    assert spent == []
+    assert maps.calls == {"geocode": 1, "places_nearby": 1, "place": 3}
+
+def test_warm_pair_stops_when_the_budget_says_no(app, maps):
+    allowance = [2]
+
+    def take(cost):
+        allowance[0] -= cost
+        return allowance[0] >= 0
+    with app.app_context():
+        warm_pair("51.5,-0.12", "cafe", take)
+    assert maps.calls == {"places_nearby": 1, "place": 1}
+
+def test_call_budget_is_a_rolling_hour(monkeypatch):
+    from app import warmup
+    clock = [0.0]
+    monkeypatch.setattr(warmup.time, "monotonic", lambda: clock[0])
+    budget = CallBudget(3)
+    assert budget.take(2) and not budget.take(2) and budget.take(1)
+    clock[0] += 3601
+    assert budget.remaining() == 3
+
+def test_scheduler_warms_only_while_quiet(app, db, maps):
+    add_query(db, "51.5,-0.12", "cafe", 1)
+    scheduler = WarmupScheduler(app, interval=60, quiet_seconds=0, budget=10, top_pairs=5, window_days=7, half_life_hours=24)
+    # A request in flight means the worker is busy and nothing is fetched
+    scheduler._in_flight = 1
+    assert scheduler.run_once() == 0
+    assert not maps.calls
+    scheduler._in_flight = 0
+    assert scheduler.run_once() == 1
+    assert maps.calls == {"places_nearby": 1, "place": 3}
+    assert scheduler.budget.remaining() == 6
+    assert google_maps._details_cache.get("cafe-0") is not None
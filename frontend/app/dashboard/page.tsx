@@ -15,6 +15,7 @@ export default function Dashboard() {
   const { toast } = useToast()
   const [isLoading, setIsLoading] = useState(false)
   const [strategies, setStrategies] = useState<any[]>([])
+  const [hasMoreStrategies, setHasMoreStrategies] = useState(false)
   const [location, setLocation] = useState("")
   const [businessType, setBusinessType] = useState("")
 
@@ -33,7 +34,8 @@ export default function Dashboard() {
   const fetchStrategies = async () => {
     try {
       const token = localStorage.getItem("token")
-      const response = await fetch("http://localhost:5000/strategies", {
+      // Only the six most recent are shown; next_cursor tells us whether there are more
+      const response = await fetch("http://localhost:5000/strategies?limit=6", {
         headers: {
           Authorization: `Bearer ${token}`,
         },
@@ -45,6 +47,7 @@ export default function Dashboard() {
 
       const data = await response.json()
       setStrategies(data.strategies || [])
+      setHasMoreStrategies(Boolean(data.next_cursor))
     } catch (error) {
       toast({
         title: "Error",
@@ -217,7 +220,7 @@ export default function Dashboard() {
             </Card>
           ) : (
             <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
-              {strategies.slice(0, 6).map((strategy) => (
+              {strategies.map((strategy) => (
                 <Card key={strategy.id} className="overflow-hidden">
                   <CardHeader className="bg-emerald-50 border-b pb-3">
                     <CardTitle className="text-lg">{strategy.business_type}</CardTitle>
@@ -240,7 +243,7 @@ export default function Dashboard() {
             </div>
           )}
 
-          {strategies.length > 6 && (
+          {hasMoreStrategies && (
             <div className="text-center mt-6">
               <Button variant="outline" onClick={() => router.push("/dashboard/strategies")}>
                 View all strategies
@@ -14,6 +14,8 @@ export default function ReportsPage() {
   const [isGenerating, setIsGenerating] = useState(false)
   const [isLoading, setIsLoading] = useState(true)
   const [reports, setReports] = useState<any[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
 
   useEffect(() => {
     // Check if user is logged in
@@ -27,22 +29,28 @@ export default function ReportsPage() {
     fetchReports()
   }, [router])
 
+  const fetchReportsPage = async (cursor: string | null) => {
+    const token = localStorage.getItem("token")
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""
+    const response = await fetch(`http://localhost:5000/reports${query}`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    })
+
+    if (!response.ok) {
+      throw new Error("Failed to fetch reports")
+    }
+
+    return response.json()
+  }
+
   const fetchReports = async () => {
     setIsLoading(true)
     try {
-      const token = localStorage.getItem("token")
-      const response = await fetch("http://localhost:5000/reports", {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      })
-
-      if (!response.ok) {
-        throw new Error("Failed to fetch reports")
-      }
-
-      const data = await response.json()
+      const data = await fetchReportsPage(null)
       setReports(data.reports || [])
+      setNextCursor(data.next_cursor || null)
     } catch (error) {
       toast({
         title: "Error",
@@ -54,6 +62,24 @@ export default function ReportsPage() {
     }
   }
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    setIsLoadingMore(true)
+    try {
+      const data = await fetchReportsPage(nextCursor)
+      setReports((current) => [...current, ...(data.reports || [])])
+      setNextCursor(data.next_cursor || null)
+    } catch (error) {
+      toast({
+        title: "Error",
+        description: error instanceof Error ? error.message : "Failed to fetch reports",
+        variant: "destructive",
+      })
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
   const handleGenerateReport = async () => {
     setIsGenerating(true)
     try {
@@ -207,6 +233,21 @@ export default function ReportsPage() {
               ))}
             </div>
           )}
+
+          {nextCursor && (
+            <div className="text-center mt-6">
+              <Button variant="outline" onClick={handleLoadMore} disabled={isLoadingMore}>
+                {isLoadingMore ? (
+                  <>
+                    <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+                    Loading...
+                  </>
+                ) : (
+                  "Load more reports"
+                )}
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </DashboardLayout>